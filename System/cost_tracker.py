@@ -9,6 +9,7 @@ Usage:
   python cost_tracker.py status     # Show today's spending
   python cost_tracker.py check      # Check if budget available
   python cost_tracker.py log <service> <cost> <task>  # Log a call
+  python cost_tracker.py avoided    # Spend avoided by the response cache
   python cost_tracker.py reset      # Reset today's counter (emergency)
 
 Author: Diesel-Goose AI
@@ -17,6 +18,7 @@ Born: Feb 21, 2026 at 4:20 PM, Cheyenne WY
 
 import json
 import sys
+import threading
 from datetime import datetime
 from pathlib import Path
 
@@ -29,6 +31,9 @@ DAILY_BUDGET = 2.00    # $2/day maximum
 WEEKLY_BUDGET = 10.00  # $10/week maximum
 MONTHLY_BUDGET = 50.00 # $50/month maximum
 
+# Serializes log read-modify-writes (llm_wrapper.generate_many logs from worker threads)
+_log_lock = threading.Lock()
+
 def ensure_log():
     """Ensure cost log file exists."""
     COST_LOG.parent.mkdir(parents=True, exist_ok=True)
@@ -43,9 +48,11 @@ def load_log():
         return json.load(f)
 
 def save_log(data):
-    """Save cost log."""
-    with open(COST_LOG, 'w') as f:
+    """Save cost log (atomically, so concurrent readers never see a partial file)."""
+    tmp = COST_LOG.with_suffix(".tmp")
+    with open(tmp, 'w') as f:
         json.dump(data, f, indent=2)
+    tmp.replace(COST_LOG)
 
 def get_today():
     """Get today's date string."""
@@ -61,6 +68,10 @@ def get_month():
 
 def log_api_call(service, cost, task):
     """Log an API call with cost."""
+    with _log_lock:
+        return _log_api_call(service, cost, task)
+
+def _log_api_call(service, cost, task):
     data = load_log()
     today = get_today()
     
@@ -84,13 +95,43 @@ def log_api_call(service, cost, task):
     save_log(data)
     return data[today]["total"]
 
-def get_spending(period="today"):
-    """Get spending for a period."""
+def log_cache_hit(service, cost, task):
+    """Log a response cache hit: the cost the original call had is avoided spend."""
+    with _log_lock:
+        return _log_cache_hit(service, cost, task)
+
+def _log_cache_hit(service, cost, task):
+    data = load_log()
+    today = get_today()
+    
+    if today not in data:
+        data[today] = {
+            "calls": [],
+            "total": 0.0,
+            "budget": DAILY_BUDGET
+        }
+    
+    day = data[today]
+    day["cache_hits"] = day.get("cache_hits", 0) + 1
+    day["avoided"] = round(day.get("avoided", 0.0) + cost, 4)
+    if cost > 0:
+        day.setdefault("avoided_calls", []).append({
+            "time": datetime.now().isoformat(),
+            "service": service,
+            "cost": round(cost, 4),
+            "task": task[:100]
+        })
+    
+    save_log(data)
+    return day["avoided"]
+
+def get_spending(period="today", field="total"):
+    """Get spending for a period (field="avoided" for cache savings)."""
     data = load_log()
     
     if period == "today":
         key = get_today()
-        return data.get(key, {}).get("total", 0.0)
+        return data.get(key, {}).get(field, 0.0)
     
     elif period == "week":
         # Sum all days in current week
@@ -101,7 +142,7 @@ def get_spending(period="today"):
                 date_obj = datetime.strptime(date, "%Y-%m-%d")
                 week_key = date_obj.strftime("%Y-W%W")
                 if week_key == current_week:
-                    total += info.get("total", 0.0)
+                    total += info.get(field, 0.0)
             except:
                 pass
         return round(total, 2)
@@ -115,7 +156,7 @@ def get_spending(period="today"):
                 date_obj = datetime.strptime(date, "%Y-%m-%d")
                 month_key = date_obj.strftime("%Y-%m")
                 if month_key == current_month:
-                    total += info.get("total", 0.0)
+                    total += info.get(field, 0.0)
             except:
                 pass
         return round(total, 2)
@@ -171,6 +212,11 @@ def show_status():
     print(f"   Spent: ${monthly_spent:.2f} / ${MONTHLY_BUDGET:.2f}")
     print(f"   Remaining: ${MONTHLY_BUDGET - monthly_spent:.2f}")
     print()
+    print(f"⚡ Response Cache:")
+    print(f"   Hits today: {data.get(today, {}).get('cache_hits', 0)}")
+    print(f"   Avoided: ${get_spending('today', 'avoided'):.4f} today, "
+          f"${get_spending('month', 'avoided'):.2f} this month")
+    print()
     
     # Show today's calls
     if today in data and data[today].get("calls"):
@@ -194,7 +240,7 @@ def reset_today():
     
     if today in data:
         old_total = data[today].get("total", 0.0)
-        data[today] = {"calls": [], "total": 0.0, "budget": DAILY_BUDGET}
+        data[today].update({"calls": [], "total": 0.0, "budget": DAILY_BUDGET})
         save_log(data)
         print(f"🔄 Reset today's counter (was ${old_total:.2f})")
     else:
@@ -228,6 +274,16 @@ def main():
         total = log_api_call(service, cost, task)
         print(f"✅ Logged: ${cost:.4f} | Total today: ${total:.2f}")
     
+    elif command == "avoided":
+        data = load_log()
+        day = data.get(get_today(), {})
+        print(f"⚡ Cache hits today: {day.get('cache_hits', 0)}")
+        print(f"   Avoided today: ${get_spending('today', 'avoided'):.4f}")
+        print(f"   Avoided this week: ${get_spending('week', 'avoided'):.2f}")
+        print(f"   Avoided this month: ${get_spending('month', 'avoided'):.2f}")
+        for call in day.get("avoided_calls", [])[-5:]:
+            print(f"   ${call['cost']:.4f} | {call['service'][:15]:15} | {call['task'][:40]}...")
+    
     elif command == "reset":
         confirm = input("Reset today's spending counter? Type 'yes': ")
         if confirm.lower() == "yes":
@@ -237,7 +293,7 @@ def main():
     
     else:
         print(f"Unknown command: {command}")
-        print("Usage: cost_tracker.py [status|check|log|reset]")
+        print("Usage: cost_tracker.py [status|check|log|avoided|reset]")
 
 if __name__ == "__main__":
     main()
@@ -210,17 +210,12 @@ if doc:
             echo "✏️  Editing: $result"
             ${EDITOR:-nano} "$DUCK_POND_ROOT/$doc_path"
             
-            # Update modification time in index
+            # Re-read edited files (modified time, keywords, word count)
             python3 -c "
 import sys
 sys.path.insert(0, '$DUCK_SYSTEM')
 from vault_core import get_vault
-from datetime import datetime
-vault = get_vault()
-for doc in vault.index['documents']:
-    if doc['id'] == '$result':
-        doc['modified'] = datetime.now().isoformat()
-vault._save_index()
+get_vault().rebuild_index()
 " 2>/dev/null
         fi
     else
@@ -28,11 +28,12 @@ import requests
 # Configuration
 DUCK_POND = Path.home() / "Documents" / "HonkNode" / "Duck-Pond"
 JOURNAL_DIR = DUCK_POND / "Journal"
-OLLAMA_API = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "llama3"
+JOURNAL_TIMEOUT = 120  # seconds
 
 sys.path.insert(0, str(DUCK_POND / "System"))
 from vault_core import get_vault, store
+from ollama_client import get_client
 
 def get_system_metrics():
     """Gather system metrics from the previous day."""
@@ -169,25 +170,19 @@ Recommendations for where the Chairman should direct attention today
 Make it professional yet engaging. Use emojis sparingly. Write as if reporting to a billionaire founder. Be concise but comprehensive."""
 
     try:
-        response = requests.post(
-            OLLAMA_API,
-            json={
-                "model": DEFAULT_MODEL,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.8,
-                    "num_ctx": 4096
-                }
+        result = get_client().generate(
+            prompt,
+            model=DEFAULT_MODEL,
+            options={
+                "temperature": 0.8,
+                "num_ctx": 4096
             },
-            timeout=120
+            timeout=JOURNAL_TIMEOUT
         )
-        
-        if response.status_code == 200:
-            return response.json().get("response", "Error generating content")
-        else:
-            return f"Error: Ollama returned {response.status_code}"
+        return result["text"] or "Error generating content"
     
+    except requests.HTTPError as e:
+        return f"Error: Ollama returned {e.response.status_code if e.response is not None else e}"
     except Exception as e:
         return f"Error generating journal: {e}"
 
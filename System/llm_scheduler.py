@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+LLM Scheduler – Priority Queue in Front of the Local Ollama Server
+
+Cron jobs (morning journal, email triage, context summaries) and
+interactive `dp ask` calls share one Ollama instance. This small local
+server speaks Ollama's API on port 11435 and decides who goes next, so an
+interactive question no longer waits behind a batch of background work.
+
+Features:
+- Two priority queues per model: interactive before background (FIFO within each)
+- Per-model concurrency limits; background work never takes the last slot
+- Deadlines: a request still queued when its deadline (or, TIMEOUT_MARGIN
+  early, its caller's timeout) passes is dropped with HTTP 408; it is
+  forwarded with what is left of the caller's timeout, so the scheduler
+  always answers first; running requests are cut off only at an explicit
+  deadline (a stream's timeout applies between chunks)
+- Streaming passthrough (/api/generate, /api/chat) and /api/* passthrough
+- GET /scheduler/status: queue depths, running requests, waits, expirations
+
+ollama_client.get_client() routes through the scheduler whenever it is
+running, and straight to Ollama otherwise. Callers mark requests with
+X-LLM-Priority (interactive | background), X-LLM-Deadline (epoch
+seconds) and X-LLM-Timeout (seconds they will wait).
+
+Usage:
+  python llm_scheduler.py serve      # Run the scheduler (default)
+  python llm_scheduler.py status     # Show queues of the running scheduler
+
+Configuration (environment):
+  LLM_SCHEDULER_URL       http://127.0.0.1:11435
+  LLM_MODEL_CONCURRENCY   "llama3=2,nomic-embed-text=4" (others: 2)
+
+Author: Diesel-Goose AI
+Version: 1.0 – Priority Scheduler
+"""
+
+import heapq
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Any
+from urllib.parse import urlparse
+
+import requests
+
+from ollama_client import (
+    OllamaClient, OLLAMA_API, OLLAMA_CONNECT_TIMEOUT, SCHEDULER_URL, PRIORITIES, DEADLINE_EXCEEDED,
+    UPSTREAM_UNREACHABLE
+)
+
+DEFAULT_MODEL_CONCURRENCY = 2          # requests in flight per model
+INTERACTIVE_RESERVED = 1               # slots per model background work may not take
+DEFAULT_DEADLINES = {"interactive": 300, "background": 3600}  # seconds, if the caller sets none
+STREAM_ENDPOINTS = ("generate", "chat")
+TIMEOUT_MARGIN = 1.0                   # seconds the scheduler answers before its caller times out
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before it could run (or finish)."""
+    pass
+
+
+def parse_limits(spec: str) -> Dict[str, int]:
+    """"llama3=2,nomic-embed-text=4" -> {"llama3": 2, "nomic-embed-text": 4}"""
+    limits = {}
+    for item in spec.split(","):
+        if "=" in item:
+            model, limit = item.split("=", 1)
+            limits[model.strip()] = max(1, int(limit))
+    return limits
+
+
+class Scheduler:
+    """Per-model priority queues with concurrency limits and deadlines."""
+    
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = DEFAULT_MODEL_CONCURRENCY):
+        self.limits = limits or {}
+        self.default_limit = default_limit
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self.queues: Dict[str, list] = {}    # model -> heap of (rank, seq, priority)
+        self.running: Dict[str, int] = {}
+        self.counters = {
+            priority: {"served": 0, "expired": 0, "wait_ms": 0.0, "max_wait_ms": 0.0}
+            for priority in PRIORITIES
+        }
+    
+    def limit(self, model: str, priority: str) -> int:
+        limit = self.limits.get(model, self.limits.get(model.split(":")[0], self.default_limit))
+        if priority == "background":
+            return max(1, limit - INTERACTIVE_RESERVED)
+        return limit
+    
+    def acquire(self, model: str, priority: str, deadline: float) -> float:
+        """
+        Wait for a slot on model.
+        
+        Returns:
+            Seconds spent queued
+        
+        Raises:
+            DeadlineExceeded: the deadline passed while queued
+        """
+        start = time.time()
+        entry = (PRIORITIES.index(priority), next(self._seq), priority)
+        with self._cond:
+            queue = self.queues.setdefault(model, [])
+            heapq.heappush(queue, entry)
+            while True:
+                remaining = deadline - time.time()
+                if remaining > 0 and queue[0] is entry and self.running.get(model, 0) < self.limit(model, priority):
+                    break
+                if remaining <= 0:
+                    queue.remove(entry)
+                    heapq.heapify(queue)
+                    self.counters[priority]["expired"] += 1
+                    # The next in line may be runnable now
+                    self._cond.notify_all()
+                    raise DeadlineExceeded(f"queued {time.time() - start:.1f}s past deadline")
+                self._cond.wait(remaining)
+            heapq.heappop(queue)
+            self.running[model] = self.running.get(model, 0) + 1
+            waited = time.time() - start
+            counters = self.counters[priority]
+            counters["served"] += 1
+            counters["wait_ms"] += waited * 1000
+            counters["max_wait_ms"] = max(counters["max_wait_ms"], waited * 1000)
+            # Another slot may still be free for the next in line
+            self._cond.notify_all()
+        return waited
+    
+    def release(self, model: str):
+        with self._cond:
+            self.running[model] -= 1
+            self._cond.notify_all()
+    
+    def expired(self, priority: str):
+        """Count a request cut off while running."""
+        with self._cond:
+            self.counters[priority]["expired"] += 1
+    
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            models = {}
+            for model in set(self.queues) | set(self.running):
+                waiting = {priority: 0 for priority in PRIORITIES}
+                for _, _, priority in self.queues.get(model, []):
+                    waiting[priority] += 1
+                models[model] = {
+                    "running": self.running.get(model, 0),
+                    "limit": self.limit(model, "interactive"),
+                    "waiting": waiting
+                }
+            return {
+                "models": models,
+                "priorities": {
+                    priority: {
+                        **c,
+                        "avg_wait_ms": c["wait_ms"] / c["served"] if c["served"] else 0.0
+                    }
+                    for priority, c in self.counters.items()
+                }
+            }
+
+
+class SchedulerHandler(BaseHTTPRequestHandler):
+    """Ollama-compatible front end; every POST waits for a scheduler slot."""
+    
+    protocol_version = "HTTP/1.1"
+    scheduler: Scheduler = None
+    upstream: OllamaClient = None
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, obj: Any, status: int = 200):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+    
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/scheduler/status":
+            return self._send_json(self.scheduler.status())
+        if not path.startswith("/api/"):
+            return self._send_json({"error": "not found"}, 404)
+        try:
+            response = self.upstream.session.get(
+                f"{self.upstream.base_url}/{path[len('/api/'):]}", timeout=(OLLAMA_CONNECT_TIMEOUT, 10)
+            )
+        except requests.RequestException as e:
+            return self._send_json({"error": f"ollama unreachable: {e}"}, UPSTREAM_UNREACHABLE)
+        self._send_json(response.json() if response.content else {}, response.status_code)
+    
+    def do_POST(self):
+        path = urlparse(self.path).path
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not path.startswith("/api/"):
+            return self._send_json({"error": "not found"}, 404)
+        endpoint = path[len('/api/'):]
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            return self._send_json({"error": "invalid JSON"}, 400)
+        
+        model = payload.get("model", "")
+        priority = self.headers.get("X-LLM-Priority", "background").lower()
+        if priority not in PRIORITIES:
+            priority = "background"
+        now = time.time()
+        deadline = float(self.headers["X-LLM-Deadline"]) if self.headers.get("X-LLM-Deadline") else None
+        timeout = float(self.headers["X-LLM-Timeout"]) if self.headers.get("X-LLM-Timeout") else None
+        
+        # Queued: give up at the deadline, or just before the caller would time out
+        queue_deadline = deadline or now + DEFAULT_DEADLINES[priority]
+        if timeout:
+            queue_deadline = min(queue_deadline, now + timeout - TIMEOUT_MARGIN)
+        
+        try:
+            waited = self.scheduler.acquire(model, priority, queue_deadline)
+        except DeadlineExceeded as e:
+            return self._send_json({"error": f"deadline exceeded ({e})"}, DEADLINE_EXCEEDED)
+        if timeout:
+            # The caller's clock has been running while this request was queued
+            timeout -= waited + TIMEOUT_MARGIN
+        try:
+            streaming = endpoint in STREAM_ENDPOINTS and payload.get("stream", True)
+            self._forward(endpoint, raw, streaming, priority, deadline, timeout)
+        finally:
+            self.scheduler.release(model)
+    
+    def _forward(
+        self,
+        endpoint: str,
+        raw: bytes,
+        streaming: bool,
+        priority: str,
+        deadline: Optional[float],
+        timeout: Optional[float]
+    ):
+        """
+        Send the request to Ollama.
+        
+        timeout is what is left of the caller's read timeout after queueing:
+        for a stream it applies between chunks, otherwise to the whole
+        response. Only an explicit deadline cuts off a running request.
+        """
+        read_timeout = timeout or self.upstream.timeout
+        if deadline:
+            read_timeout = min(read_timeout, deadline - time.time())
+        try:
+            response = self.upstream.session.post(
+                f"{self.upstream.base_url}/{endpoint}",
+                data=raw,
+                headers={"Content-Type": "application/json"},
+                timeout=(OLLAMA_CONNECT_TIMEOUT, max(0.1, read_timeout)),
+                stream=streaming
+            )
+        except requests.Timeout:
+            if deadline and time.time() >= deadline:
+                self.scheduler.expired(priority)
+                return self._send_json({"error": "deadline exceeded (running)"}, DEADLINE_EXCEEDED)
+            return self._send_json({"error": "ollama timed out"}, 504)
+        except requests.RequestException as e:
+            return self._send_json({"error": f"ollama unreachable: {e}"}, UPSTREAM_UNREACHABLE)
+        
+        with response:
+            if not streaming or response.status_code != 200:
+                self.send_response(response.status_code)
+                self.send_header("Content-Type", response.headers.get("Content-Type", "application/json"))
+                self.send_header("Content-Length", str(len(response.content)))
+                self.end_headers()
+                self.wfile.write(response.content)
+                return
+            
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for line in response.iter_lines():
+                    if deadline and time.time() > deadline:
+                        self.scheduler.expired(priority)
+                        self._write_chunk(b'{"error": "deadline exceeded", "done": true}\n')
+                        break
+                    if line:
+                        self._write_chunk(line + b"\n")
+            except requests.RequestException as e:
+                self._write_chunk(json.dumps({"error": str(e), "done": True}).encode('utf-8') + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Caller went away (cancelled); closing the response stops Ollama
+                return
+            self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(url: str = SCHEDULER_URL):
+    """Run the scheduler until interrupted."""
+    address = urlparse(url)
+    limits = parse_limits(os.environ.get("LLM_MODEL_CONCURRENCY", ""))
+    SchedulerHandler.scheduler = Scheduler(limits)
+    SchedulerHandler.upstream = OllamaClient(base_url=OLLAMA_API)
+    server = ThreadingHTTPServer((address.hostname, address.port), SchedulerHandler)
+    server.daemon_threads = True
+    print(f"🚦 LLM scheduler on {url} -> {OLLAMA_API}")
+    print(f"   Per-model concurrency: {limits or {}} (default {DEFAULT_MODEL_CONCURRENCY})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Scheduler stopped")
+    finally:
+        server.server_close()
+
+
+def show_status(url: str = SCHEDULER_URL):
+    try:
+        status = requests.get(f"{url}/scheduler/status", timeout=2).json()
+    except requests.RequestException:
+        print(f"❌ Scheduler not running at {url} (requests go straight to Ollama)")
+        return
+    print("🚦 LLM SCHEDULER")
+    print("=" * 50)
+    for model, info in sorted(status["models"].items()):
+        waiting = info["waiting"]
+        print(f"   {model}: {info['running']}/{info['limit']} running, "
+              f"{waiting['interactive']} interactive + {waiting['background']} background waiting")
+    for priority, c in status["priorities"].items():
+        print(f"   {priority}: {c['served']} served, {c['expired']} expired, "
+              f"avg wait {c['avg_wait_ms']:.0f} ms, max {c['max_wait_ms']:.0f} ms")
+
+
+def main():
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else "serve"
+    if command == "serve":
+        serve()
+    elif command == "status":
+        show_status()
+    else:
+        print(f"Unknown command: {command}")
+        print("Usage: llm_scheduler.py [serve|status]")
+
+
+if __name__ == "__main__":
+    main()
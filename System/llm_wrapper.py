@@ -13,6 +13,24 @@ Usage:
   result = generate("Your prompt here")
   print(result["text"])  # Generated text
   print(result["cost"])  # $0.00 for Ollama, $0.002+ for cloud
+  
+  # Identical requests are answered from the response cache
+  result = generate("Your prompt here", cache=False)  # force a fresh generation
+  
+  # Stream text as it is produced (Ctrl-C / break keeps the partial answer)
+  with generate_stream("Your prompt here") as stream:
+      for delta in stream:
+          print(delta, end="", flush=True)
+  print(stream.result["usage"])  # prompt/eval tokens and durations
+  
+  # Many prompts, OLLAMA_NUM_PARALLEL at a time, results in order
+  batch = generate_many(["Summarize A...", "Summarize B..."])
+  for result in batch["results"]:
+      print(result["text"] if "error" not in result else result["error"])
+  print(batch["stats"]["items_per_sec"])
+  
+  # With llm_scheduler.py running, requests queue by priority
+  result = generate("Summarize...", priority="background", deadline=time.time() + 600)
 
 Author: Diesel-Goose AI
 Born: Feb 21, 2026 at 4:20 PM, Cheyenne WY
@@ -22,27 +40,44 @@ import requests
 import json
 import os
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Add cost tracker to path
 sys.path.insert(0, str(Path(__file__).parent))
-from cost_tracker import log_api_call, check_budget
+from cost_tracker import log_api_call, log_cache_hit, check_budget
+from ollama_client import get_client, DEADLINE_EXCEEDED
+from response_cache import get_cache, response_key
 
 # Configuration
-OLLAMA_URL = "http://localhost:11434/api/generate"
 DEFAULT_MODEL = "llama3"
 MAX_OLLAMA_RETRIES = 2
+OLLAMA_TIMEOUT = 120  # 2 minute timeout
+CACHE_RESPONSES = os.environ.get("LLM_CACHE", "1") != "0"  # LLM_CACHE=0 disables by default
+# Requests Ollama serves at once (same variable the server reads; its default is 4)
+OLLAMA_NUM_PARALLEL = max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "4")))
 
-def generate(prompt, model=DEFAULT_MODEL, max_retries=MAX_OLLAMA_RETRIES, temperature=0.7):
+def generate(prompt, model=DEFAULT_MODEL, max_retries=MAX_OLLAMA_RETRIES, temperature=0.7, cache=None,
+             priority=None, deadline=None):
     """
     Generate text using Ollama (FREE) first.
     Only fall back to cloud API if Ollama fails AND budget allows.
     
+    Identical requests (model, prompt, temperature, options) are answered
+    from the on-disk response cache. cache=False skips it for this call,
+    cache=True uses it even when LLM_CACHE=0.
+    
+    priority ("interactive" / "background", default from the process) and
+    deadline (epoch seconds) are honored by llm_scheduler when it runs; a
+    request dropped at its deadline is not retried in the cloud.
+    
     Returns dict with:
     - text: generated content
     - source: "ollama" or "openai" or "error"
-    - cost: $0.00 for Ollama, actual cost for cloud
+    - cost: $0.00 for Ollama, actual cost for cloud ($0.00 on a cache hit)
     - model: which model was used
+    - cache_hit: True if answered from the response cache
     """
     
     # Validate prompt
@@ -51,58 +86,86 @@ def generate(prompt, model=DEFAULT_MODEL, max_retries=MAX_OLLAMA_RETRIES, temper
             "text": "Error: Empty prompt",
             "source": "error",
             "cost": 0.0,
-            "model": "none"
+            "model": "none",
+            "cache_hit": False
         }
     
     # Truncate very long prompts (save tokens)
     if len(prompt) > 8000:
         prompt = prompt[:8000] + "\n\n[Content truncated for efficiency]"
     
+    options = {
+        "temperature": temperature,
+        "num_ctx": 4096,
+        "num_predict": 2048  # Limit response length
+    }
+    use_cache = CACHE_RESPONSES if cache is None else cache
+    
+    if use_cache:
+        key = response_key(model, prompt, temperature, options)
+        cached = get_cache().get(key)
+        if cached is not None:
+            avoided = cached.get("cost", 0.0)
+            log_cache_hit(f"{cached['source']}_{cached['model']}", avoided, prompt[:50])
+            print(f"⚡ Cache hit ({cached['source']}/{cached['model']}, saved ${avoided:.4f})")
+            return {**cached, "cost": 0.0, "cache_hit": True}
+        result = _generate(prompt, model, max_retries, options, priority, deadline)
+        if result["source"] != "error":
+            get_cache().put(key, result)
+        return {**result, "cache_hit": False}
+    
+    return {**_generate(prompt, model, max_retries, options, priority, deadline), "cache_hit": False}
+
+def _generate(prompt, model, max_retries, options, priority=None, deadline=None):
+    """Ollama first, then budget-checked cloud fallback (uncached)."""
     # Try Ollama first (FREE)
     print(f"🦆 Trying Ollama/{model} (free)...")
     
-    for attempt in range(max_retries):
-        try:
-            response = requests.post(
-                OLLAMA_URL,
-                json={
-                    "model": model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": temperature,
-                        "num_ctx": 4096,
-                        "num_predict": 2048  # Limit response length
-                    }
-                },
-                timeout=120  # 2 minute timeout
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                text = result.get("response", "").strip()
-                
-                if text:
-                    print(f"✅ Ollama success (free)")
-                    return {
-                        "text": text,
-                        "source": "ollama",
-                        "cost": 0.0,
-                        "model": model
-                    }
-                else:
-                    print(f"⚠️  Ollama returned empty response")
-            else:
-                print(f"⚠️  Ollama error: HTTP {response.status_code}")
-                
-        except requests.exceptions.Timeout:
-            print(f"⚠️  Ollama timeout (attempt {attempt + 1}/{max_retries})")
-        except requests.exceptions.ConnectionError:
-            print(f"⚠️  Ollama not running (attempt {attempt + 1}/{max_retries})")
-            print(f"   Start with: ollama serve")
-            break  # Don't retry if Ollama isn't running
-        except Exception as e:
-            print(f"⚠️  Ollama error: {e}")
+    # Timeouts and server errors are retried by the shared client;
+    # a refused connection (Ollama not running) fails immediately
+    try:
+        result = get_client().generate(
+            prompt,
+            model=model,
+            options=options,
+            timeout=OLLAMA_TIMEOUT,
+            retries=max(0, max_retries - 1),
+            priority=priority,
+            deadline=deadline
+        )
+        text = result["text"].strip()
+        
+        if text:
+            print(f"✅ Ollama success (free, {result['latency']:.1f}s)")
+            return {
+                "text": text,
+                "source": "ollama",
+                "cost": 0.0,
+                "model": model,
+                "tokens": result["tokens"]
+            }
+        else:
+            print(f"⚠️  Ollama returned empty response")
+    
+    except requests.exceptions.Timeout:
+        print(f"⚠️  Ollama timeout ({max_retries} attempts)")
+    except requests.exceptions.ConnectionError:
+        print(f"⚠️  Ollama not running")
+        print(f"   Start with: ollama serve")
+    except requests.exceptions.HTTPError as e:
+        status = e.response.status_code if e.response is not None else None
+        if status == DEADLINE_EXCEEDED:
+            # Dropped by the scheduler: nobody is waiting for it, don't pay for it
+            print(f"⏰ Deadline passed before Ollama could answer")
+            return {
+                "text": "Error: Deadline exceeded",
+                "source": "error",
+                "cost": 0.0,
+                "model": "none"
+            }
+        print(f"⚠️  Ollama error: HTTP {status or e}")
+    except Exception as e:
+        print(f"⚠️  Ollama error: {e}")
     
     # Ollama failed - check if we can use cloud API
     print("\n⚠️  Ollama unavailable, checking budget for cloud fallback...")
@@ -171,19 +234,7 @@ def try_openai(prompt, model="gpt-3.5-turbo"):
         text = response['choices'][0]['message']['content'].strip()
         usage = response['usage']
         
-        # Calculate cost
-        if model == "gpt-3.5-turbo":
-            # $0.002 per 1K tokens
-            cost = (usage['total_tokens'] / 1000) * 0.002
-        elif model == "gpt-4":
-            # $0.03 per 1K tokens (input) + $0.06 per 1K tokens (output)
-            input_cost = (usage['prompt_tokens'] / 1000) * 0.03
-            output_cost = (usage['completion_tokens'] / 1000) * 0.06
-            cost = input_cost + output_cost
-        else:
-            cost = 0.01  # Default estimate
-        
-        cost = round(cost, 4)
+        cost = openai_cost(model, usage['prompt_tokens'], usage['completion_tokens'])
         
         # Log the cost
         log_api_call(f"openai_{model}", cost, prompt[:50])
@@ -202,6 +253,315 @@ def try_openai(prompt, model="gpt-3.5-turbo"):
         print(f"❌ OpenAI error: {e}")
         return None
 
+def openai_cost(model, prompt_tokens, completion_tokens):
+    """Dollar cost of an OpenAI call."""
+    if model == "gpt-3.5-turbo":
+        # $0.002 per 1K tokens
+        cost = ((prompt_tokens + completion_tokens) / 1000) * 0.002
+    elif model == "gpt-4":
+        # $0.03 per 1K tokens (input) + $0.06 per 1K tokens (output)
+        input_cost = (prompt_tokens / 1000) * 0.03
+        output_cost = (completion_tokens / 1000) * 0.06
+        cost = input_cost + output_cost
+    else:
+        cost = 0.01  # Default estimate
+    
+    return round(cost, 4)
+
+class GenerationStream:
+    """
+    Text deltas of one generation, as they arrive.
+    
+    Iterate for the deltas; afterwards .result holds a generate()-style dict
+    (text, source, cost, model, cache_hit) plus:
+    - usage: prompt_tokens, tokens, ttft, prompt_seconds, eval_seconds,
+      total_seconds, tokens_per_sec (estimated counts for cloud streams)
+    - cancelled: True if closed before the model finished (text is partial)
+    - error: set if the stream broke after some text had arrived
+    
+    Breaking out of the loop, close(), or leaving a with-block ends the
+    request and keeps the partial text. .text is the text so far at any time.
+    """
+    
+    def __init__(self, prompt, model, temperature, timeout, cache, priority=None, deadline=None):
+        self.parts = []
+        self.result = None
+        self.model = model
+        self._gen = self._run(prompt, model, temperature, timeout, cache, priority, deadline)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self._gen)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+        return False
+    
+    @property
+    def text(self):
+        return "".join(self.parts)
+    
+    def close(self):
+        """Stop generating; .result keeps what arrived so far."""
+        self._gen.close()
+        if self.result is None:
+            # Closed before the first delta was requested: nothing ran
+            self._finish("none", self.model, cancelled=True)
+    
+    def _finish(self, source, model, cost=0.0, usage=None, **extra):
+        self.result = {
+            "text": self.text.strip(),
+            "source": source,
+            "cost": cost,
+            "model": model,
+            "cache_hit": False,
+            "usage": usage or {},
+            "cancelled": False,
+            **extra
+        }
+    
+    def _emit(self, delta):
+        self.parts.append(delta)
+        return delta
+    
+    def _run(self, prompt, model, temperature, timeout, cache, priority, deadline):
+        if not prompt or not prompt.strip():
+            self._finish("error", "none")
+            self.result["text"] = "Error: Empty prompt"
+            return
+        
+        if len(prompt) > 8000:
+            prompt = prompt[:8000] + "\n\n[Content truncated for efficiency]"
+        
+        options = {
+            "temperature": temperature,
+            "num_ctx": 4096,
+            "num_predict": 2048
+        }
+        use_cache = CACHE_RESPONSES if cache is None else cache
+        key = response_key(model, prompt, temperature, options) if use_cache else None
+        
+        if key:
+            cached = get_cache().get(key)
+            if cached is not None:
+                avoided = cached.get("cost", 0.0)
+                log_cache_hit(f"{cached['source']}_{cached['model']}", avoided, prompt[:50])
+                self.parts.append(cached["text"])
+                self.result = {"usage": {}, **cached, "cost": 0.0, "cache_hit": True, "cancelled": False}
+                yield cached["text"]
+                return
+        
+        start = time.perf_counter()
+        source, used_model, cost, usage = "ollama", model, 0.0, {}
+        try:
+            print(f"🦆 Streaming Ollama/{model} (free)...", file=sys.stderr)
+            try:
+                # timeout applies between chunks, so long answers don't expire
+                stream = get_client().generate_stream(
+                    prompt, model=model, options=options, timeout=timeout, priority=priority, deadline=deadline
+                )
+                done = False
+                try:
+                    for chunk in stream:
+                        if chunk.get("error"):
+                            # Cut off by the scheduler's deadline or a broken upstream
+                            self._finish("ollama" if self.parts else "error", model, usage=usage, error=chunk["error"])
+                            if not self.parts:
+                                self.result["text"] = f"Error: {chunk['error']}"
+                            return
+                        delta = chunk.get("response", "")
+                        if delta:
+                            if "ttft" not in usage:
+                                usage["ttft"] = time.perf_counter() - start
+                            yield self._emit(delta)
+                        if chunk.get("done"):
+                            done = True
+                            eval_seconds = chunk.get("eval_duration", 0) / 1e9
+                            usage.update({
+                                "prompt_tokens": chunk.get("prompt_eval_count", 0),
+                                "tokens": chunk.get("eval_count", 0),
+                                "prompt_seconds": chunk.get("prompt_eval_duration", 0) / 1e9,
+                                "eval_seconds": eval_seconds,
+                                "total_seconds": chunk.get("total_duration", 0) / 1e9,
+                                "tokens_per_sec": chunk.get("eval_count", 0) / eval_seconds if eval_seconds else 0.0
+                            })
+                finally:
+                    stream.close()
+                if not done:
+                    # Connection ended without the final chunk: the text is partial
+                    self._finish("ollama" if self.parts else "error", model, usage=usage,
+                                 error="Ollama stream ended before the answer was complete")
+                    if not self.parts:
+                        self.result["text"] = "Error: Ollama stream ended without an answer"
+                    return
+            
+            except requests.exceptions.RequestException as e:
+                if self.parts:
+                    # Mid-answer failure: keep what arrived rather than restart in the cloud
+                    self._finish("ollama", model, usage=usage, error=f"Ollama stream broke: {e}")
+                    return
+                if isinstance(e, requests.exceptions.HTTPError) and e.response is not None \
+                        and e.response.status_code == DEADLINE_EXCEEDED:
+                    self._finish("error", "none", error="deadline exceeded")
+                    self.result["text"] = "Error: Deadline exceeded"
+                    return
+                print(f"⚠️  Ollama unavailable ({e.__class__.__name__}), checking budget for cloud fallback...",
+                      file=sys.stderr)
+                can_use_cloud, remaining = check_budget()
+                if not can_use_cloud:
+                    self._finish("error", "none")
+                    self.result["text"] = ("Error: Ollama unavailable and budget exceeded. "
+                                           "Please start Ollama or wait for budget reset.")
+                    return
+                
+                source, used_model = "openai", "gpt-3.5-turbo"
+                try:
+                    for delta in _openai_stream(prompt, used_model):
+                        if "ttft" not in usage:
+                            usage["ttft"] = time.perf_counter() - start
+                        yield self._emit(delta)
+                except Exception as e:
+                    # Broke mid-answer: the partial text is still billed, never cached
+                    usage.update({"prompt_tokens": len(prompt) // 4, "tokens": len(self.text) // 4, "estimated": True})
+                    cost = openai_cost(used_model, usage["prompt_tokens"], usage["tokens"])
+                    log_api_call(f"openai_{used_model}", cost, prompt[:50])
+                    self._finish(source, used_model, cost, usage, error=f"OpenAI stream broke: {e}")
+                    return
+                if not self.parts:
+                    self._finish("error", "none")
+                    self.result["text"] = "Error: All LLM options exhausted (Ollama + cloud APIs failed)"
+                    return
+                usage.update({
+                    "prompt_tokens": len(prompt) // 4,
+                    "tokens": len(self.text) // 4,
+                    "estimated": True
+                })
+            
+            usage.setdefault("total_seconds", time.perf_counter() - start)
+            if source == "openai":
+                cost = openai_cost(used_model, usage["prompt_tokens"], usage["tokens"])
+                log_api_call(f"openai_{used_model}", cost, prompt[:50])
+            self._finish(source, used_model, cost, usage)
+            # Only complete answers are cached, never partial or failed ones
+            if key and self.result["text"] and not self.result.get("error"):
+                get_cache().put(key, {k: v for k, v in self.result.items() if k not in ("cache_hit", "cancelled")})
+        
+        finally:
+            if self.result is None:
+                # Closed mid-stream: keep the partial answer
+                usage["total_seconds"] = time.perf_counter() - start
+                if source == "openai":
+                    usage.update({"prompt_tokens": len(prompt) // 4, "tokens": len(self.text) // 4, "estimated": True})
+                    cost = openai_cost(used_model, usage["prompt_tokens"], usage["tokens"])
+                    log_api_call(f"openai_{used_model}", cost, prompt[:50])
+                self._finish(source, used_model, cost, usage, cancelled=True)
+
+def _openai_stream(prompt, model="gpt-3.5-turbo"):
+    """
+    Yield OpenAI chat deltas; yields nothing if the call fails before the
+    first delta, and re-raises if it fails after some text was yielded.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        print("❌ OPENAI_API_KEY not set", file=sys.stderr)
+        return
+    started = False
+    try:
+        import openai
+        openai.api_key = api_key
+        
+        response = openai.ChatCompletion.create(
+            model=model,
+            messages=[
+                {"role": "system", "content": "You are a helpful AI assistant. Be concise."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1500,
+            temperature=0.7,
+            stream=True
+        )
+        for chunk in response:
+            delta = chunk['choices'][0]['delta'].get('content')
+            if delta:
+                started = True
+                yield delta
+    except Exception as e:
+        print(f"❌ OpenAI error: {e}", file=sys.stderr)
+        if started:
+            raise
+
+def generate_stream(prompt, model=DEFAULT_MODEL, temperature=0.7, timeout=OLLAMA_TIMEOUT, cache=None,
+                    priority=None, deadline=None):
+    """
+    Stream a generation: Ollama (FREE) first, cloud fallback if Ollama is
+    down AND budget allows. Shares the response cache with generate().
+    
+    Returns a GenerationStream; iterate it for text deltas, then read
+    stream.result for the final dict with usage stats.
+    """
+    return GenerationStream(prompt, model, temperature, timeout, cache, priority, deadline)
+
+def generate_many(prompts, concurrency=None, progress=None, **kwargs):
+    """
+    Run generate() over many prompts with bounded concurrency.
+    
+    Args:
+        prompts: Prompts to complete
+        concurrency: Requests in flight (default and ceiling: OLLAMA_NUM_PARALLEL,
+            since Ollama queues anything beyond it anyway)
+        progress: Optional callback(done, total) after each completion
+        **kwargs: Passed to generate() (model, temperature, cache, ...)
+    
+    Returns:
+        {"results": one generate() dict per prompt, in order; failed items
+         have source "error" and an "error" message,
+         "stats": items, ok, errors, cache_hits, tokens, cost, seconds,
+         items_per_sec, tokens_per_sec, concurrency}
+    """
+    prompts = list(prompts)
+    concurrency = max(1, min(concurrency or OLLAMA_NUM_PARALLEL, OLLAMA_NUM_PARALLEL))
+    results = [None] * len(prompts)
+    start = time.perf_counter()
+    
+    def run(i):
+        try:
+            result = generate(prompts[i], **kwargs)
+        except Exception as e:
+            result = {"text": f"Error: {e}", "source": "error", "cost": 0.0, "model": "none", "cache_hit": False}
+        if result["source"] == "error":
+            result["error"] = result["text"]
+        results[i] = result
+        if progress:
+            progress(sum(1 for r in results if r is not None), len(prompts))
+    
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, range(len(prompts))))
+    
+    seconds = time.perf_counter() - start
+    tokens = sum(r.get("tokens", 0) for r in results if not r["cache_hit"])
+    errors = sum(1 for r in results if "error" in r)
+    stats = {
+        "items": len(results),
+        "ok": len(results) - errors,
+        "errors": errors,
+        "cache_hits": sum(1 for r in results if r["cache_hit"]),
+        "tokens": tokens,
+        "cost": round(sum(r["cost"] for r in results), 4),
+        "seconds": seconds,
+        "items_per_sec": len(results) / seconds if seconds else 0.0,
+        "tokens_per_sec": tokens / seconds if seconds else 0.0,
+        "concurrency": concurrency
+    }
+    print(f"📦 {stats['ok']}/{stats['items']} done in {seconds:.1f}s "
+          f"({stats['items_per_sec']:.2f}/s, {stats['tokens_per_sec']:.0f} tok/s, "
+          f"{stats['cache_hits']} cached, {errors} errors)")
+    return {"results": results, "stats": stats}
+
 # Convenience functions
 def quick_generate(prompt, **kwargs):
     """Quick generation - returns text only."""
@@ -241,6 +601,7 @@ if __name__ == "__main__":
     print(f"  Source: {result['source']}")
     print(f"  Cost: ${result['cost']:.4f}")
     print(f"  Model: {result['model']}")
+    print(f"  Cache hit: {result['cache_hit']}")
     
     if result['cost'] == 0.0:
         print("\n✅ Success! Using free Ollama.")
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Ollama Client – Shared, Pooled Connection to the Local Ollama Server
+
+One keep-alive HTTP session for every Ollama call in the system
+(llm_wrapper, vault search, embedding pipeline, morning journal), instead
+of a new TCP connection per request with ad-hoc timeouts.
+
+Features:
+- Keep-alive connection pool (requests.Session + HTTPAdapter)
+- generate / generate_stream / chat / embed with uniform timeouts
+- Retries with backoff on timeouts and 5xx; fails fast when Ollama is down
+- Per-endpoint latency metrics (calls, errors, retries, avg/max ms)
+- Multi-input /api/embed with fallback to /api/embeddings (Ollama < 0.3)
+- Routed through the llm_scheduler priority queue when it is running
+  (interactive or background priority, optional deadline per request)
+
+Usage:
+  from ollama_client import get_client
+  
+  client = get_client()
+  result = client.generate("Why is the sky blue?", model="llama3")
+  print(result["text"], result["latency"])
+  vectors = client.embed(["first text", "second text"], model="nomic-embed-text")
+
+Errors are raised as requests exceptions (Timeout, ConnectionError,
+HTTPError), so callers keep their existing handlers. A request the
+scheduler dropped because its deadline passed raises HTTPError 408; an
+Ollama the scheduler cannot reach raises ConnectionError, as it would
+without the scheduler.
+
+Priority defaults to "interactive" when stdin is a terminal and
+"background" otherwise (cron); override with LLM_PRIORITY or per call.
+
+Author: Diesel-Goose AI
+Version: 1.0 – Shared Ollama Client
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from typing import List, Dict, Optional, Iterator, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+OLLAMA_API = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/") + "/api"
+DEFAULT_MODEL = "llama3"
+OLLAMA_CONNECT_TIMEOUT = 3.0   # seconds to establish a connection
+OLLAMA_TIMEOUT = 120.0         # seconds to wait for a response
+OLLAMA_RETRIES = 2             # extra attempts after a timeout or 5xx
+OLLAMA_RETRY_BACKOFF = 0.5     # seconds, doubled per retry
+OLLAMA_POOL_SIZE = 8           # keep-alive connections
+OLLAMA_PROBE_TIMEOUT = 1.0     # seconds for available()
+
+SCHEDULER_URL = os.environ.get("LLM_SCHEDULER_URL", "http://127.0.0.1:11435").rstrip("/")
+USE_SCHEDULER = os.environ.get("LLM_SCHEDULER", "1") != "0"
+SCHEDULER_PROBE_TIMEOUT = 0.2  # seconds; a local refusal is immediate
+PRIORITIES = ("interactive", "background")
+DEADLINE_EXCEEDED = 408        # status the scheduler answers expired requests with
+UPSTREAM_UNREACHABLE = 502     # status the scheduler answers when Ollama is down
+
+
+def default_priority() -> str:
+    """LLM_PRIORITY, else interactive at a terminal and background under cron."""
+    priority = os.environ.get("LLM_PRIORITY", "").lower()
+    if priority in PRIORITIES:
+        return priority
+    try:
+        return "interactive" if sys.stdin and sys.stdin.isatty() else "background"
+    except ValueError:
+        return "background"
+
+
+class OllamaClient:
+    """Thread-safe Ollama API client over one pooled keep-alive session."""
+    
+    def __init__(
+        self,
+        base_url: str = OLLAMA_API,
+        timeout: float = OLLAMA_TIMEOUT,
+        retries: int = OLLAMA_RETRIES,
+        pool_size: int = OLLAMA_POOL_SIZE,
+        priority: Optional[str] = None
+    ):
+        self.base_url = base_url
+        self.direct_url = base_url
+        self.timeout = timeout
+        self.retries = retries
+        self.priority = priority or default_priority()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._legacy_embed = False
+        self._metrics_lock = threading.Lock()
+        # endpoint -> {"calls", "errors", "retries", "total_ms", "max_ms", "last_ms"}
+        self.metrics: Dict[str, Dict[str, float]] = {}
+    
+    def _record(self, endpoint: str, elapsed: float, error: bool = False, retried: bool = False):
+        ms = elapsed * 1000
+        with self._metrics_lock:
+            m = self.metrics.setdefault(
+                endpoint, {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "last_ms": 0.0}
+            )
+            if retried:
+                m["retries"] += 1
+                return
+            m["calls"] += 1
+            m["errors"] += int(error)
+            m["total_ms"] += ms
+            m["max_ms"] = max(m["max_ms"], ms)
+            m["last_ms"] = ms
+    
+    def use_scheduler(self, url: str = SCHEDULER_URL) -> bool:
+        """Route requests through the llm_scheduler at url if it answers."""
+        try:
+            up = self.session.get(f"{url}/scheduler/status", timeout=SCHEDULER_PROBE_TIMEOUT).status_code == 200
+        except requests.RequestException:
+            up = False
+        if up:
+            self.base_url = f"{url}/api"
+        return up
+    
+    def _post(
+        self,
+        endpoint: str,
+        payload: Dict,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        stream: bool = False,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> requests.Response:
+        """
+        POST with uniform timeouts and retries.
+        
+        Timeouts and 5xx responses are retried with exponential backoff;
+        connection errors are not (Ollama is not running). If the scheduler
+        has gone away, requests go straight to Ollama from then on.
+        
+        Through the scheduler, timeouts are not retried (the original
+        request may still hold a model slot), and its 502 – Ollama
+        unreachable – is raised as ConnectionError.
+        
+        Args:
+            priority: "interactive" or "background" (default self.priority)
+            deadline: Epoch seconds after which the scheduler drops the request
+        
+        Raises:
+            requests.RequestException: after the last failed attempt
+        """
+        retries = self.retries if retries is None else retries
+        # The scheduler drops a queued request once its caller would have timed
+        # out; a running one is only cut off at an explicit deadline
+        headers = {"X-LLM-Priority": priority or self.priority, "X-LLM-Timeout": str(timeout or self.timeout)}
+        if deadline:
+            headers["X-LLM-Deadline"] = str(deadline)
+        start = time.perf_counter()
+        for attempt in range(retries + 1):
+            try:
+                try:
+                    response = self.session.post(
+                        f"{self.base_url}/{endpoint}",
+                        json=payload,
+                        headers=headers,
+                        timeout=(OLLAMA_CONNECT_TIMEOUT, timeout or self.timeout),
+                        stream=stream
+                    )
+                except requests.ConnectionError:
+                    if self.base_url == self.direct_url:
+                        raise
+                    self.base_url = self.direct_url
+                    response = self.session.post(
+                        f"{self.base_url}/{endpoint}",
+                        json=payload,
+                        timeout=(OLLAMA_CONNECT_TIMEOUT, timeout or self.timeout),
+                        stream=stream
+                    )
+                if response.status_code == UPSTREAM_UNREACHABLE and self.base_url != self.direct_url:
+                    response.close()
+                    raise requests.ConnectionError("Ollama unreachable (via scheduler)")
+                if response.status_code >= 500 and attempt < retries:
+                    response.close()
+                    raise requests.HTTPError(f"HTTP {response.status_code}", response=response)
+                if response.status_code != 200:
+                    response.raise_for_status()
+                if not stream:
+                    self._record(endpoint, time.perf_counter() - start)
+                return response
+            except requests.RequestException as e:
+                status = e.response.status_code if e.response is not None else 0
+                timed_out = isinstance(e, requests.Timeout) and self.base_url == self.direct_url
+                if (timed_out or status >= 500) and attempt < retries:
+                    self._record(endpoint, 0, retried=True)
+                    time.sleep(OLLAMA_RETRY_BACKOFF * 2 ** attempt)
+                    continue
+                self._record(endpoint, time.perf_counter() - start, error=True)
+                raise
+    
+    def generate(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        One-shot completion (/api/generate, stream=False).
+        
+        Returns:
+            {"text", "model", "prompt_tokens", "tokens", "latency" (seconds)}
+        """
+        start = time.perf_counter()
+        payload = {"model": model, "prompt": prompt, "stream": False}
+        if options:
+            payload["options"] = options
+        data = self._post("generate", payload, timeout, retries, priority=priority, deadline=deadline).json()
+        return {
+            "text": data.get("response", ""),
+            "model": model,
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "tokens": data.get("eval_count", 0),
+            "latency": time.perf_counter() - start
+        }
+    
+    def generate_stream(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming completion: yields Ollama's chunks ({"response", "done",
+        and on the last one eval_count, eval_duration, ...}).
+        
+        Only the initial request is retried; a stream that breaks midway
+        raises to the caller.
+        """
+        start = time.perf_counter()
+        payload = {"model": model, "prompt": prompt, "stream": True}
+        if options:
+            payload["options"] = options
+        error = True
+        with self._post("generate", payload, timeout, stream=True, priority=priority, deadline=deadline) as response:
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        yield json.loads(line)
+                error = False
+            except GeneratorExit:
+                # The caller stopped reading; not an Ollama error
+                error = False
+                raise
+            finally:
+                self._record("generate_stream", time.perf_counter() - start, error=error)
+    
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        model: str = DEFAULT_MODEL,
+        options: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        priority: Optional[str] = None,
+        deadline: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        One-shot chat completion (/api/chat, stream=False).
+        
+        Args:
+            messages: [{"role": "system" | "user" | "assistant", "content": str}, ...]
+        
+        Returns:
+            {"text", "message", "model", "prompt_tokens", "tokens", "latency"}
+        """
+        start = time.perf_counter()
+        payload = {"model": model, "messages": messages, "stream": False}
+        if options:
+            payload["options"] = options
+        data = self._post("chat", payload, timeout, retries, priority=priority, deadline=deadline).json()
+        message = data.get("message", {})
+        return {
+            "text": message.get("content", ""),
+            "message": message,
+            "model": model,
+            "prompt_tokens": data.get("prompt_eval_count", 0),
+            "tokens": data.get("eval_count", 0),
+            "latency": time.perf_counter() - start
+        }
+    
+    def embed(
+        self,
+        texts: List[str],
+        model: str = DEFAULT_MODEL,
+        timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        priority: Optional[str] = None
+    ) -> List[List[float]]:
+        """
+        Embed several texts in one request (/api/embed); falls back to one
+        /api/embeddings call per text on Ollama versions without it.
+        """
+        if not self._legacy_embed:
+            try:
+                response = self._post("embed", {"model": model, "input": texts}, timeout, retries, priority=priority)
+                return response.json().get("embeddings", [])
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                # Ollama < 0.3 has no /api/embed
+                self._legacy_embed = True
+        return [
+            self._post(
+                "embeddings", {"model": model, "prompt": text}, timeout, retries, priority=priority
+            ).json().get("embedding", [])
+            for text in texts
+        ]
+    
+    def available(self, timeout: float = OLLAMA_PROBE_TIMEOUT) -> bool:
+        """Quick reachability probe (GET /api/tags, passed through by the scheduler)."""
+        start = time.perf_counter()
+        try:
+            up = self.session.get(f"{self.base_url}/tags", timeout=timeout).status_code == 200
+        except requests.RequestException:
+            up = False
+        self._record("tags", time.perf_counter() - start, error=not up)
+        return up
+    
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-endpoint metrics with average latency."""
+        with self._metrics_lock:
+            return {
+                endpoint: {**m, "avg_ms": m["total_ms"] / m["calls"] if m["calls"] else 0.0}
+                for endpoint, m in self.metrics.items()
+            }
+    
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[OllamaClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    """Process-wide shared client (one connection pool), via the scheduler if it runs."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+            if USE_SCHEDULER:
+                _client.use_scheduler()
+        return _client
+
+
+if __name__ == "__main__":
+    client = get_client()
+    print("🦆 Ollama Client")
+    print(f"   {client.base_url} ({client.priority})")
+    if not client.available():
+        print(f"❌ Ollama not reachable at {client.base_url}")
+    else:
+        result = client.generate("What is 2+2? Answer in one word.")
+        print(f"✅ {result['text'].strip()} ({result['latency'] * 1000:.0f} ms)")
+        for endpoint, m in client.stats().items():
+            print(f"   {endpoint}: {m['calls']} calls, avg {m['avg_ms']:.0f} ms, max {m['max_ms']:.0f} ms")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Response Cache – Content-Addressed Cache for llm_wrapper.generate()
+
+Identical requests (same model, prompt, temperature and options) are
+answered from .vault/response_cache.db instead of being regenerated.
+Cron jobs that re-run summarize() / code_review() on unchanged input stop
+paying for it, in local compute and in cloud fallback dollars.
+
+Features:
+- Key: sha256 over model, prompt, temperature and options (canonical JSON)
+- LRU eviction by entry count and total size
+- Original cost kept with each entry, so hits can be logged as avoided spend
+
+Usage:
+  python response_cache.py stats     # Entries, size, hit rate
+  python response_cache.py clear     # Drop every cached response
+
+Author: Diesel-Goose AI
+Version: 1.0 – Response Cache
+"""
+
+import hashlib
+import json
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Any
+
+DUCK_POND = Path.home() / "Documents" / "HonkNode" / "Duck-Pond"
+RESPONSE_CACHE_DB = DUCK_POND / ".vault" / "response_cache.db"
+RESPONSE_CACHE_MAX_ENTRIES = 5000
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB of responses
+
+
+def response_key(model: str, prompt: str, temperature: float, options: Optional[Dict[str, Any]] = None) -> str:
+    """Content address of a request."""
+    request = {"model": model, "prompt": prompt, "temperature": temperature, "options": options or {}}
+    return hashlib.sha256(json.dumps(request, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """Persistent LRU cache of generate() results (SQLite, WAL)."""
+    
+    def __init__(
+        self,
+        path: Path = RESPONSE_CACHE_DB,
+        max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                result TEXT NOT NULL,
+                cost REAL NOT NULL,
+                nbytes INTEGER NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_used);
+        """)
+        self.conn.commit()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result dict (its original "cost" included), or None."""
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT result FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key)
+            )
+        self.hits += 1
+        return json.loads(row[0])
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """Store a successful result, then evict least recently used entries over the limits."""
+        blob = json.dumps(result)
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, result, cost, nbytes, hits, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, 0, ?, ?)",
+                (key, result.get("model", ""), blob, result.get("cost", 0.0), len(blob), now, now)
+            )
+            self._evict()
+    
+    def _evict(self):
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(nbytes), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, nbytes in self.conn.execute("SELECT key, nbytes FROM responses ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= nbytes
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+    
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
+    
+    def stats(self) -> Dict[str, Any]:
+        count, total, hits = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(nbytes), 0), COALESCE(SUM(hits), 0) FROM responses"
+        ).fetchone()
+        return {
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "lifetime_hits": hits,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def close(self):
+        self.conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """Process-wide shared cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
+
+
+def main():
+    command = sys.argv[1].lower() if len(sys.argv) > 1 else "stats"
+    cache = get_cache()
+    
+    if command == "stats":
+        stats = cache.stats()
+        print("🗄️  RESPONSE CACHE")
+        print("=" * 50)
+        print(f"   Entries: {stats['entries']} / {stats['max_entries']}")
+        print(f"   Size: {stats['bytes'] / 1024:.1f} KB / {stats['max_bytes'] / 1024 / 1024:.0f} MB")
+        print(f"   Hits (all time): {stats['lifetime_hits']}")
+    
+    elif command == "clear":
+        cache.clear()
+        print("🧹 Response cache cleared")
+    
+    else:
+        print(f"Unknown command: {command}")
+        print("Usage: response_cache.py [stats|clear]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Local Vault ANN – Approximate Nearest Neighbour Search
+
+Inverted-file (IVF) index over an EmbeddingStore, in pure NumPy. Vectors
+are clustered with spherical k-means; a query scores only the rows in
+the `nprobe` clusters closest to it instead of the whole matrix.
+
+Features:
+- Incremental inserts (new rows are assigned to their nearest cluster)
+- Deletes via the store's tombstones (no index rewrite needed)
+- Tunable recall/latency: nlist (clusters) and nprobe (clusters scanned)
+- Automatic retraining once the store outgrows the trained clustering
+- recall@k report against exact search
+
+Author: Diesel-Goose AI
+Version: 1.0 – Approximate Search
+"""
+
+import json
+import time
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from vault_embeddings import EmbeddingStore
+
+ANN_MIN_ROWS = 10000        # below this, exact search is already fast
+ANN_NPROBE = 8              # clusters scanned per query
+ANN_TRAIN_SAMPLE = 50000    # rows sampled for k-means
+ANN_TRAIN_ITERS = 12
+ANN_RETRAIN_GROWTH = 4.0    # retrain once the store is this many times larger
+ASSIGN_CHUNK = 8192
+
+
+def _unit(rows: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(rows, axis=1, keepdims=True)
+    return rows / np.where(norms > 0, norms, 1.0)
+
+
+def _assign(rows: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Nearest centroid (by cosine) for each row, in chunks to bound memory."""
+    labels = np.empty(len(rows), dtype=np.int32)
+    for start in range(0, len(rows), ASSIGN_CHUNK):
+        block = np.asarray(rows[start:start + ASSIGN_CHUNK], dtype=np.float32)
+        labels[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def _assign_store(store: EmbeddingStore, centroids: np.ndarray, start: int, stop: int) -> np.ndarray:
+    """_assign() over store rows [start, stop), dequantizing one chunk at a time."""
+    labels = np.empty(max(0, stop - start), dtype=np.int32)
+    for offset in range(start, stop, ASSIGN_CHUNK):
+        block = store.decode(slice(offset, min(offset + ASSIGN_CHUNK, stop)))
+        labels[offset - start:offset - start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return labels
+
+
+def spherical_kmeans(data: np.ndarray, k: int, iters: int = ANN_TRAIN_ITERS, seed: int = 0) -> np.ndarray:
+    """Cluster unit vectors; returns k unit-norm centroids."""
+    rng = np.random.default_rng(seed)
+    x = _unit(np.asarray(data, dtype=np.float32))
+    centroids = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        labels = _assign(x, centroids)
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        sums = np.zeros_like(centroids)
+        sums[present] = np.add.reduceat(x[order], starts, axis=0)
+        # Reseed empty clusters with random points
+        empty = np.setdiff1d(np.arange(k), present)
+        if len(empty):
+            sums[empty] = x[rng.choice(len(x), size=len(empty), replace=False)]
+        centroids = _unit(sums)
+    return centroids
+
+
+class IVFIndex:
+    """
+    IVF index stored next to its EmbeddingStore:
+        ivf_centroids.f32   nlist x D unit centroids
+        ivf_assign.i32      cluster id per store row (row-aligned)
+        ivf.json            nlist, store epoch, rows at training time
+    
+    Row assignments follow the store's append-only layout, so inserts only
+    append; when the store compacts (epoch changes) rows are reassigned.
+    """
+    
+    def __init__(self, store: EmbeddingStore, nprobe: int = ANN_NPROBE):
+        self.store = store
+        self.nprobe = nprobe
+        self.centroids_path = store.dir / "ivf_centroids.f32"
+        self.assign_path = store.dir / "ivf_assign.i32"
+        self.meta_path = store.dir / "ivf.json"
+        self.centroids: Optional[np.ndarray] = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.meta: Dict = {}
+        self._lists = None
+        self._stamp = None
+        self._load()
+    
+    def _load(self):
+        if not (self.meta_path.exists() and self.centroids_path.exists()):
+            return
+        self._stamp = self._file_stamp()
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get("dim") != self.store.dim:
+            self.meta = {}
+            return
+        self.centroids = np.fromfile(self.centroids_path, dtype=np.float32).reshape(-1, self.store.dim)
+        if self.assign_path.exists():
+            self.assign = np.fromfile(self.assign_path, dtype=np.int32)
+        self._lists = None
+    
+    def _file_stamp(self) -> Tuple:
+        """Changes when any process retrains or appends assignments."""
+        return tuple(
+            (p.stat().st_mtime_ns, p.stat().st_size) if p.exists() else None
+            for p in (self.meta_path, self.assign_path)
+        )
+    
+    def _save_meta(self):
+        with open(self.meta_path, 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f)
+    
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+    
+    def train(self, nlist: Optional[int] = None, sample: int = ANN_TRAIN_SAMPLE):
+        """Cluster the live rows and assign every row to a list."""
+        with self.store.locked():
+            _, _, _, alive, _ = self.store.arrays()
+            live = np.flatnonzero(alive)
+            if len(live) == 0:
+                return
+            nlist = nlist or max(1, min(int(4 * np.sqrt(len(live))), len(live)))
+            rng = np.random.default_rng(0)
+            picked = np.sort(rng.choice(live, size=min(sample, len(live)), replace=False))
+            self.centroids = spherical_kmeans(self.store.decode(picked), min(nlist, len(picked)))
+            self.centroids.tofile(self.centroids_path)
+            self.assign = _assign_store(self.store, self.centroids, 0, len(alive))
+            self.assign.tofile(self.assign_path)
+            self.meta = {
+                "nlist": len(self.centroids),
+                "dim": self.store.dim,
+                "epoch": self.store.epoch,
+                "trained_rows": len(live)
+            }
+            self._save_meta()
+            self._lists = None
+            self._stamp = self._file_stamp()
+    
+    def sync(self):
+        """Assign rows appended since the last call; retrain when stale."""
+        if not self.trained:
+            return
+        with self.store.locked():
+            # Another process may have retrained or appended assignments
+            if self._file_stamp() != self._stamp:
+                self._load()
+            n_rows = self.store.n_rows
+            if (self.meta.get("epoch") != self.store.epoch
+                    or self.meta.get("dim") != self.store.dim
+                    or self.store.live > ANN_RETRAIN_GROWTH * self.meta.get("trained_rows", 1)):
+                self.train(nlist=None)
+                return
+            if len(self.assign) > n_rows:
+                self.assign = self.assign[:n_rows]
+                self.assign.tofile(self.assign_path)
+                self._lists = None
+            if len(self.assign) < n_rows:
+                fresh = _assign_store(self.store, self.centroids, len(self.assign), n_rows)
+                with open(self.assign_path, 'ab') as f:
+                    f.write(fresh.tobytes())
+                self.assign = np.concatenate([self.assign, fresh])
+                self._lists = None
+            self._stamp = self._file_stamp()
+    
+    def _inverted_lists(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row ids grouped by cluster, plus per-cluster offsets."""
+        if self._lists is None:
+            order = np.argsort(self.assign, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        return self._lists
+    
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        category: str = "",
+        nprobe: Optional[int] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Approximate cosine search over the nprobe nearest clusters.
+        
+        Returns:
+            List of (doc_id, similarity), best first
+        """
+        if not self.trained:
+            self.train()
+        else:
+            self.sync()
+        if not self.trained:
+            return []
+        with self.store.locked(shared=True):
+            return self._search(query_vector, top_k, category, nprobe)
+    
+    def _search(
+        self,
+        query_vector: List[float],
+        top_k: int,
+        category: str,
+        nprobe: Optional[int]
+    ) -> List[Tuple[str, float]]:
+        vectors, norms, codes, alive, categories = self.store.arrays()
+        query = np.asarray(query_vector, dtype=np.float32)
+        q_norm = float(np.linalg.norm(query))
+        if q_norm == 0 or query.shape[0] != vectors.shape[1]:
+            return []
+        if category and category not in categories:
+            return []
+        
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ (query / q_norm)
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        order, bounds = self._inverted_lists()
+        candidates = np.concatenate([order[bounds[c]:bounds[c + 1]] for c in probe])
+        
+        keep = alive[candidates] & (norms[candidates] > 0)
+        if category:
+            keep &= codes[candidates] == categories[category]
+        candidates = np.sort(candidates[keep])
+        if len(candidates) == 0:
+            return []
+        
+        scores = self.store.dot(query, candidates) / (norms[candidates] * q_norm)
+        k = min(top_k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        doc_ids = self.store.doc_for(candidates[top])
+        return [(doc_id, float(scores[i])) for i, doc_id in zip(top, doc_ids) if doc_id is not None]
+
+
+def recall_report(
+    store: EmbeddingStore,
+    k: int = 10,
+    queries: int = 100,
+    nprobes: Tuple[int, ...] = (1, 2, 4, 8, 16, 32)
+) -> List[Dict]:
+    """
+    Measure recall@k and latency of IVF search against exact search,
+    using stored vectors (slightly perturbed) as queries.
+    
+    Returns:
+        One dict per nprobe: {"nprobe", "recall", "ann_ms", "exact_ms"}
+    """
+    index = IVFIndex(store)
+    if not index.trained:
+        index.train()
+    else:
+        index.sync()
+    _, _, _, alive, _ = store.arrays()
+    live = np.flatnonzero(alive)
+    if len(live) == 0:
+        return []
+    rng = np.random.default_rng(1)
+    picks = np.sort(rng.choice(live, size=min(queries, len(live)), replace=False))
+    probes = [
+        row + rng.normal(0, 0.01, store.dim).astype(np.float32)
+        for row in store.decode(picks)
+    ]
+    
+    start = time.perf_counter()
+    truth = [{doc_id for doc_id, _ in store.search(q, top_k=k)} for q in probes]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(probes)
+    
+    report = []
+    for nprobe in nprobes:
+        if nprobe > len(index.centroids):
+            break
+        start = time.perf_counter()
+        found = [{doc_id for doc_id, _ in index.search(q, top_k=k, nprobe=nprobe)} for q in probes]
+        ann_ms = (time.perf_counter() - start) * 1000 / len(probes)
+        hits = sum(len(t & f) for t, f in zip(truth, found))
+        total = sum(len(t) for t in truth)
+        report.append({
+            "nprobe": nprobe,
+            "recall": hits / total if total else 0.0,
+            "ann_ms": ann_ms,
+            "exact_ms": exact_ms
+        })
+    return report
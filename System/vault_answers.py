@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Local Vault Answers – Persistent Answer Cache
+
+Caches VaultSearch.ask() answers in .vault/answers.db. An answer is keyed
+on the normalized question, the model and the ids and content hashes of
+the documents packed into its context, so a repeated question over
+unchanged documents skips generation entirely.
+
+Features:
+- Normalized questions ("What are the Year 1 goals?" == "what are the year 1 goals")
+- TTL expiry and LRU eviction (config "answer_cache_ttl" / "answer_cache_size")
+- Answers dropped as soon as any contributing document changes or is archived
+- Hit/miss counters for the current process
+
+Author: Diesel-Goose AI
+Version: 1.0 – Answer Cache
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from vault_core import VAULT_ROOT
+
+ANSWERS_DB = VAULT_ROOT / ".vault" / "answers.db"
+ANSWER_CACHE_TTL = 86400     # seconds an answer stays valid
+ANSWER_CACHE_SIZE = 1000     # answers kept (least recently used evicted)
+
+WORD_RE = re.compile(r"\w+")
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase words only, so casing, spacing and punctuation don't matter."""
+    return " ".join(WORD_RE.findall(question.lower()))
+
+
+def answer_key(question: str, model: str, sources: Iterable[Tuple[str, str]], budget: int = 0) -> str:
+    """
+    Cache key for an answer.
+    
+    Args:
+        question: Question as asked (normalized here)
+        model: Generating model
+        sources: (doc_id, content hash) of each document in the context, in order
+        budget: Context token budget the context was packed with
+    """
+    parts = [normalize_question(question), model, str(budget)]
+    parts.extend(f"{doc_id}:{digest}" for doc_id, digest in sources)
+    return hashlib.sha256("\0".join(parts).encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """Answers with the documents they were generated from (SQLite, WAL)."""
+    
+    def __init__(
+        self,
+        path: Path = ANSWERS_DB,
+        ttl: float = ANSWER_CACHE_TTL,
+        max_entries: int = ANSWER_CACHE_SIZE
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                question TEXT NOT NULL,
+                model TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                created REAL NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS answers_used ON answers (last_used);
+            CREATE TABLE IF NOT EXISTS answer_docs (
+                doc_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (doc_id, key)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+    
+    def _delete(self, keys: List[str]):
+        for i in range(0, len(keys), 500):
+            batch = keys[i:i + 500]
+            marks = ",".join("?" * len(batch))
+            self.conn.execute(f"DELETE FROM answers WHERE key IN ({marks})", batch)
+            self.conn.execute(f"DELETE FROM answer_docs WHERE key IN ({marks})", batch)
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer, or None if missing or older than the TTL."""
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT answer, created FROM answers WHERE key = ?", (key,)).fetchone()
+            if row and self.ttl and now - row[1] > self.ttl:
+                self._delete([key])
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return row[0]
+    
+    def put(self, key: str, question: str, model: str, answer: str, doc_ids: Iterable[str]):
+        """Store an answer, then evict expired and least recently used entries."""
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO answers (key, question, model, answer, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, question, model, answer, now, now)
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO answer_docs (doc_id, key) VALUES (?, ?)",
+                [(doc_id, key) for doc_id in set(doc_ids)]
+            )
+            self._delete(self._stale(now))
+    
+    def _stale(self, now: float) -> List[str]:
+        """Keys past the TTL, plus the least recently used beyond the size limit."""
+        stale = []
+        if self.ttl:
+            stale += [k for (k,) in self.conn.execute("SELECT key FROM answers WHERE created < ?", (now - self.ttl,))]
+        stale += [k for (k,) in self.conn.execute(
+            "SELECT key FROM answers ORDER BY last_used DESC LIMIT -1 OFFSET ?", (self.max_entries,)
+        )]
+        return stale
+    
+    def invalidate_docs(self, doc_ids: Iterable[str]) -> int:
+        """Drop every answer built from any of these documents; returns how many."""
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return 0
+        with self._lock, self.conn:
+            keys = set()
+            for i in range(0, len(doc_ids), 500):
+                batch = doc_ids[i:i + 500]
+                keys.update(k for (k,) in self.conn.execute(
+                    f"SELECT key FROM answer_docs WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                ))
+            self._delete(list(keys))
+        return len(keys)
+    
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM answers")
+            self.conn.execute("DELETE FROM answer_docs")
+    
+    def stats(self) -> Dict:
+        return {
+            "entries": self.conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0],
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Local Vault Chunks – Heading-Aware Document Chunking
+
+Splits stored markdown into chunks that fit an embedding token budget,
+so content deep inside a long Knowledge-Base page is searchable. Chunk
+boundaries (character offsets into the document body) are kept in
+.vault/chunks.db; chunk text is always sliced from the file on disk.
+
+Features:
+- Sections split at markdown headings, labelled with their heading path
+- Long sections windowed by a token budget with overlap
+- Fast token estimate (~4 characters per token), no tokenizer needed
+- Per-document versions so only changed documents are re-chunked
+- Token-budgeted context packing (dedupes overlapping chunk windows)
+
+Author: Diesel-Goose AI
+Version: 1.0 – Chunked Content
+"""
+
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Iterable, Tuple
+
+from vault_core import VAULT_ROOT
+
+CHUNKS_DB = VAULT_ROOT / ".vault" / "chunks.db"
+CHUNK_TOKENS = 256     # token budget per chunk
+CHUNK_OVERLAP = 32     # tokens repeated between consecutive windows
+LOOKUP_BATCH = 400    # (doc_id, ordinal) pairs per query, under the 999-parameter limit
+
+HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.+?)[ \t#]*$", re.M)
+WORD_RE = re.compile(r"\S+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token count estimate (~4 characters per token)."""
+    return (len(text) + 3) // 4
+
+
+def chunk_id(doc_id: str, ordinal: int) -> str:
+    return f"{doc_id}#{ordinal}"
+
+
+def parent_id(chunk: str) -> str:
+    """Document id of a chunk id."""
+    return chunk.rsplit("#", 1)[0]
+
+
+def _sections(text: str) -> List[Tuple[int, int, str]]:
+    """(start, end, heading path) for each heading-delimited section."""
+    sections = []
+    stack: List[Tuple[int, str]] = []
+    start, body_start, heading = 0, 0, ""
+    for match in HEADING_RE.finditer(text):
+        # A heading with no body of its own stays attached to the next section
+        if text[body_start:match.start()].strip():
+            sections.append((start, match.start(), heading))
+            start = match.start()
+        body_start = match.end()
+        level = len(match.group(1))
+        while stack and stack[-1][0] >= level:
+            stack.pop()
+        stack.append((level, match.group(2).strip()))
+        heading = " > ".join(title for _, title in stack)
+    if text[body_start:].strip():
+        sections.append((start, len(text), heading))
+    return sections
+
+
+def split_markdown(
+    text: str,
+    max_tokens: int = CHUNK_TOKENS,
+    overlap: int = CHUNK_OVERLAP
+) -> List[Dict]:
+    """
+    Split markdown into chunks by heading, then by token budget.
+    
+    Args:
+        text: Document body (without the metadata header)
+        max_tokens: Token budget per chunk
+        overlap: Tokens shared by consecutive windows of one section
+    
+    Returns:
+        List of {"ordinal", "start", "end", "heading", "tokens"}; start/end
+        are character offsets into text
+    """
+    chunks = []
+    for start, end, heading in _sections(text):
+        words = list(WORD_RE.finditer(text, start, end))
+        costs = [estimate_tokens(w.group()) for w in words]
+        i = 0
+        while i < len(words):
+            j, budget = i, 0
+            while j < len(words) and (j == i or budget + costs[j] <= max_tokens):
+                budget += costs[j]
+                j += 1
+            chunks.append({
+                "ordinal": len(chunks),
+                "start": words[i].start(),
+                "end": words[j - 1].end(),
+                "heading": heading,
+                "tokens": budget
+            })
+            if j >= len(words):
+                break
+            # Step back far enough to repeat ~overlap tokens, always moving forward
+            back, shared = j, 0
+            while back > i + 1 and shared + costs[back - 1] <= overlap:
+                back -= 1
+                shared += costs[back]
+            i = back
+    return chunks
+
+
+def _merge_pieces(pieces: List[Dict]) -> str:
+    """Join overlapping slices of one body (each with start/end/text) into one text."""
+    pieces = sorted(pieces, key=lambda p: p["start"])
+    text, end = pieces[0]["text"], pieces[0]["end"]
+    for piece in pieces[1:]:
+        if piece["end"] > end:
+            text += piece["text"][max(0, end - piece["start"]):]
+            end = piece["end"]
+    return text
+
+
+def pack_chunks(docs: List[Dict], max_tokens: int) -> Dict:
+    """
+    Greedily pack the best chunks of ranked documents into a token budget.
+    
+    Chunks are taken round-robin by rank (every document's best chunk,
+    then every second-best, ...). A chunk that overlaps one already taken
+    from the same document is merged into it and only the new text is
+    charged; text already packed from another document is skipped.
+    Costs use each chunk's cached "tokens" count when it is packed whole.
+    
+    Args:
+        docs: Ranked documents, each with "id", "title" and "chunks" (best
+            first; each chunk has "start", "end", "text" and optionally
+            "tokens" and "heading")
+        max_tokens: Budget for the packed context
+    
+    Returns:
+        {"context": str, "tokens": estimated tokens used,
+         "sources": [{"id", "title", "spans": [(start, end), ...]}]}
+    """
+    # doc_id -> groups of overlapping pieces: {"pieces": [...], "cost": tokens}
+    packed: Dict[str, List[Dict]] = {}
+    seen = set()
+    used = 0
+    depth = max((len(doc.get("chunks", [])) for doc in docs), default=0)
+    
+    for rank in range(depth):
+        for doc in docs:
+            chunks = doc.get("chunks", [])
+            if rank >= len(chunks):
+                continue
+            chunk = chunks[rank]
+            key = " ".join(chunk["text"].split())
+            if not key or key in seen:
+                continue
+            groups = packed.get(doc["id"], [])
+            header = 0 if groups else estimate_tokens(f"Document 00: {doc['title']}\n")
+            touching = [
+                group for group in groups
+                if any(p["start"] < chunk["end"] and chunk["start"] < p["end"] for p in group["pieces"])
+            ]
+            if touching:
+                pieces = [p for group in touching for p in group["pieces"]] + [chunk]
+                cost = estimate_tokens(_merge_pieces(pieces))
+                extra = cost - sum(group["cost"] for group in touching)
+            else:
+                pieces = [chunk]
+                cost = extra = chunk.get("tokens") or estimate_tokens(chunk["text"])
+            if used + header + extra > max_tokens:
+                continue
+            
+            seen.add(key)
+            used += header + extra
+            packed[doc["id"]] = [g for g in groups if all(g is not t for t in touching)] + [{"pieces": pieces, "cost": cost}]
+    
+    sections, sources = [], []
+    for doc in docs:
+        groups = packed.get(doc["id"])
+        if not groups:
+            continue
+        spans = sorted(
+            ((min(p["start"] for p in g["pieces"]), max(p["end"] for p in g["pieces"]), g["pieces"]) for g in groups),
+            key=lambda span: span[0]
+        )
+        body = "\n...\n".join(_merge_pieces(pieces) for _, _, pieces in spans)
+        sections.append(f"Document {len(sections) + 1}: {doc['title']}\n{body}")
+        sources.append({"id": doc["id"], "title": doc["title"], "spans": [(a, b) for a, b, _ in spans]})
+    return {"context": "\n\n".join(sections), "tokens": used, "sources": sources}
+
+
+class ChunkIndex:
+    """
+    Chunk boundaries per document, stored in .vault/chunks.db.
+    
+    Document versions (their "modified" stamp) are mirrored in memory so
+    deciding what to re-chunk needs no queries; chunk rows are read on
+    demand.
+    """
+    
+    def __init__(self, path: Path = CHUNKS_DB):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                chunks INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS chunks (
+                doc_id TEXT NOT NULL,
+                ordinal INTEGER NOT NULL,
+                start INTEGER NOT NULL,
+                "end" INTEGER NOT NULL,
+                heading TEXT NOT NULL,
+                tokens INTEGER NOT NULL,
+                PRIMARY KEY (doc_id, ordinal)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+        # doc_id -> (version, chunk count)
+        self.docs: Dict[str, Tuple[str, int]] = {
+            doc_id: (version, count)
+            for doc_id, version, count in self.conn.execute("SELECT doc_id, version, chunks FROM docs")
+        }
+    
+    def version(self, doc_id: str):
+        entry = self.docs.get(doc_id)
+        return entry[0] if entry else None
+    
+    def chunk_ids(self, doc_id: str) -> List[str]:
+        entry = self.docs.get(doc_id)
+        return [chunk_id(doc_id, i) for i in range(entry[1])] if entry else []
+    
+    def replace(self, doc_id: str, version: str, chunks: List[Dict]) -> List[str]:
+        """
+        Store a document's chunks, replacing its previous ones.
+        
+        Returns:
+            Chunk ids that no longer exist (the document got shorter)
+        """
+        old = self.chunk_ids(doc_id)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+            self.conn.executemany(
+                'INSERT INTO chunks (doc_id, ordinal, start, "end", heading, tokens) VALUES (?, ?, ?, ?, ?, ?)',
+                [(doc_id, c["ordinal"], c["start"], c["end"], c["heading"], c["tokens"]) for c in chunks]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO docs (doc_id, version, chunks) VALUES (?, ?, ?)",
+                (doc_id, version, len(chunks))
+            )
+            self.docs[doc_id] = (version, len(chunks))
+        return old[len(chunks):]
+    
+    def remove_many(self, doc_ids: Iterable[str]) -> List[str]:
+        """Drop documents; returns the chunk ids that were removed."""
+        removed = []
+        with self._lock, self.conn:
+            for doc_id in doc_ids:
+                if doc_id not in self.docs:
+                    continue
+                removed.extend(self.chunk_ids(doc_id))
+                self.conn.execute("DELETE FROM chunks WHERE doc_id = ?", (doc_id,))
+                self.conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+                del self.docs[doc_id]
+        return removed
+    
+    def get(self, doc_id: str) -> List[Dict]:
+        """All chunks of one document, in order."""
+        return list(self.get_many(self.chunk_ids(doc_id)).values())
+    
+    def get_many(self, chunk_ids: Iterable[str]) -> Dict[str, Dict]:
+        """{chunk_id: {"doc_id", "ordinal", "start", "end", "heading", "tokens"}}"""
+        wanted = {}
+        for cid in chunk_ids:
+            doc_id, ordinal = cid.rsplit("#", 1)
+            wanted[(doc_id, int(ordinal))] = cid
+        keys = list(wanted)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                clause = " OR ".join(["(doc_id = ? AND ordinal = ?)"] * len(batch))
+                params = [value for key in batch for value in key]
+                for doc_id, ordinal, start, end, heading, tokens in self.conn.execute(
+                    f'SELECT doc_id, ordinal, start, "end", heading, tokens FROM chunks WHERE {clause}', params
+                ):
+                    found[wanted[(doc_id, ordinal)]] = {
+                        "doc_id": doc_id, "ordinal": ordinal, "start": start,
+                        "end": end, "heading": heading, "tokens": tokens
+                    }
+        return {cid: found[cid] for cid in wanted.values() if cid in found}
+    
+    def close(self):
+        self.conn.close()
@@ -6,6 +6,7 @@ Simple commands to interact with the Local Vault.
 
 Commands:
   store <title>           Store a new document (interactive)
+  import <dir|glob>       Bulk-import files as documents
   search <query>          Search documents
   ask <question>          Ask a question about your documents
   list [category]         List all documents
@@ -13,9 +14,12 @@ Commands:
   delete <doc_id>         Archive a document
   stats                   Show vault statistics
   index                   Rebuild search index
+  watch                   Keep the index live while files change
+  embed-worker            Embed newly stored documents in the background
 
 Examples:
   python vault_cli.py store "Q1 Financial Report"
+  python vault_cli.py import ~/Notes --category Business
   python vault_cli.py search "business plan"
   python vault_cli.py ask "What is our revenue target for Year 3?"
   python vault_cli.py list Business
@@ -25,13 +29,15 @@ Author: Diesel-Goose AI
 
 import sys
 import json
+import glob
+import time
 from pathlib import Path
 
 # Add system path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from vault_core import get_vault, store, search, retrieve
-from vault_search import VaultSearch
+from vault_search import VaultSearch, EmbedWorker
 
 def print_help():
     print("""
@@ -44,8 +50,11 @@ COMMANDS:
   store <title> [--category <cat>] [--tags <tag1,tag2>]
     Store a new document (interactive prompt for content)
     
-  search <query> [--category <cat>] [--limit <n>]
-    Search for documents
+  import <dir|glob> [--category <cat>] [--tags <tag1,tag2>] [--batch <n>]
+    Bulk-import .md/.txt files (one index flush, or every <n> docs)
+    
+  search <query> [--category <cat>] [--limit <n>] [--rank bm25]
+    Search for documents (--rank bm25 searches full text)
     
   ask <question>
     Ask a question about your documents (uses Ollama)
@@ -62,11 +71,19 @@ COMMANDS:
   stats
     Show vault statistics
     
-  index
-    Rebuild document index
+  index [--full]
+    Rescan the vault and update the index (only changed files; --full re-parses all)
+    
+  watch [--poll]
+    Keep the index live while files are edited (Ctrl+C to stop)
+    
+  embed-worker [--once]
+    Drain the embed-on-store queue (config "auto_embed") into the
+    embedding store (--once: exit when the queue is empty)
 
 EXAMPLES:
   python vault_cli.py store "Meeting Notes" --category Business --tags "xrpl,strategy"
+  python vault_cli.py import "~/Notes/**/*.md" --tags "notes,import"
   python vault_cli.py search "revenue targets"
   python vault_cli.py ask "What are our goals for Year 1?"
   python vault_cli.py list
@@ -128,6 +145,83 @@ def cmd_store(args):
     print(f"   ID: {doc['id']}")
     print(f"   Path: {doc['path']}")
 
+IMPORT_EXTENSIONS = {".md", ".markdown", ".txt"}
+
+def _import_files(target):
+    """Resolve an import target (directory or glob) to a sorted file list."""
+    path = Path(target).expanduser()
+    if path.is_dir():
+        files = [p for p in path.rglob("*") if p.suffix.lower() in IMPORT_EXTENSIONS]
+    else:
+        files = [Path(p) for p in glob.glob(str(path), recursive=True)]
+    return sorted(p for p in files if p.is_file())
+
+def cmd_import(args):
+    """Bulk-import files."""
+    if not args:
+        print("❌ Error: Directory or glob required")
+        print("Usage: python vault_cli.py import <dir|glob> [--category <cat>] [--tags <t1,t2>]")
+        return
+    
+    target = args[0]
+    category = "General"
+    tags = []
+    batch_size = 0
+    
+    # Parse optional args
+    i = 1
+    while i < len(args):
+        if args[i] == "--category" and i + 1 < len(args):
+            category = args[i + 1]
+            i += 2
+        elif args[i] == "--tags" and i + 1 < len(args):
+            tags = args[i + 1].split(",")
+            i += 2
+        elif args[i] == "--batch" and i + 1 < len(args):
+            batch_size = int(args[i + 1])
+            i += 2
+        else:
+            i += 1
+    
+    files = _import_files(target)
+    if not files:
+        print(f"📭 No files found: {target}")
+        return
+    
+    print(f"📥 Importing {len(files)} file(s)")
+    print(f"   Category: {category}")
+    print(f"   Tags: {tags}")
+    
+    def documents():
+        for path in files:
+            try:
+                content = path.read_text(encoding='utf-8')
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"\n⚠️  Skipping {path}: {e}")
+                continue
+            yield {
+                "content": content,
+                "title": path.stem.replace("-", " ").replace("_", " "),
+                "category": category,
+                "tags": tags,
+                "source": f"import:{path}",
+            }
+    
+    totals = {"bytes": 0}
+    
+    def progress(done, nbytes):
+        totals["bytes"] = nbytes
+        print(f"\r   {done}/{len(files)} docs", end="", flush=True)
+    
+    start = time.time()
+    vault = get_vault()
+    stored = vault.store_many(documents(), batch_size=batch_size, progress=progress)
+    elapsed = max(time.time() - start, 1e-6)
+    megabytes = totals["bytes"] / (1024 * 1024)
+    
+    print(f"\n\n✅ Imported {len(stored)} document(s) in {elapsed:.2f}s")
+    print(f"   Throughput: {len(stored) / elapsed:.1f} docs/sec, {megabytes / elapsed:.2f} MB/sec")
+
 def cmd_search(args):
     """Search documents."""
     if not args:
@@ -137,6 +231,7 @@ def cmd_search(args):
     query = args[0]
     category = ""
     limit = 10
+    rank = "recency"
     
     # Parse optional args
     i = 1
@@ -147,11 +242,14 @@ def cmd_search(args):
         elif args[i] == "--limit" and i + 1 < len(args):
             limit = int(args[i + 1])
             i += 2
+        elif args[i] == "--rank" and i + 1 < len(args):
+            rank = args[i + 1]
+            i += 2
         else:
             i += 1
     
     vault = get_vault()
-    results = vault.search(query, category=category, limit=limit)
+    results = vault.search(query, category=category, limit=limit, rank=rank)
     
     print(f"🔍 Search: '{query}'")
     if category:
@@ -170,6 +268,9 @@ def cmd_search(args):
         print(f"   Category: {doc['category']}")
         print(f"   Tags: {', '.join(doc.get('tags', []))}")
         print(f"   Created: {doc['created'][:10]}")
+        if "score" in doc:
+            print(f"   Score: {doc['score']:.2f}")
+            print(f"   {doc['snippet']}")
         print()
 
 def cmd_ask(args):
@@ -184,9 +285,22 @@ def cmd_ask(args):
     print("🤖 Querying Ollama...\n")
     
     search = VaultSearch()
-    answer = search.ask(question)
+    answering = False
+    for token in search.ask_stream(question):
+        if not answering:
+            # Retrieval runs before the first token arrives
+            print("💡 Answer:")
+            answering = True
+        sys.stdout.write(token)
+        sys.stdout.flush()
+    print()
     
-    print(f"💡 Answer:\n{answer}")
+    timing = search.last_generation
+    if timing.get("cached"):
+        print("\n⚡ Cached answer (context documents unchanged)")
+    elif timing:
+        print(f"\n⏱️  First token {timing['ttft'] or 0:.2f}s | "
+              f"{timing['tokens_per_sec']:.1f} tokens/sec ({timing['tokens']} tokens)")
 
 def cmd_list(args):
     """List documents."""
@@ -270,18 +384,34 @@ def cmd_stats():
     print("=" * 40)
     print(f"Total Documents: {stats['total_documents']}")
     print(f"Last Updated: {stats['last_updated']}")
+    print(f"Duplicates Merged: {stats['duplicates_merged']} ({stats['bytes_saved'] / 1024:.1f} KB saved)")
+    queue = stats["embed_queue"]
+    if stats["auto_embed"] or queue["depth"]:
+        print(f"Embed Queue: {queue['depth']} pending (lag {queue['lag_seconds']:.1f}s)")
     print(f"Vault Root: {stats['vault_root']}")
     print()
     print("Categories:")
     for cat, count in sorted(stats['categories'].items()):
         print(f"  {cat}: {count}")
 
-def cmd_index():
-    """Rebuild index."""
-    print("🔄 Rebuilding document index...")
+def cmd_index(args):
+    """Rebuild index from the files on disk."""
+    full = "--full" in args
+    print(f"🔄 Rebuilding document index{' (full)' if full else ''}...")
+    vault = get_vault()
+    result = vault.rebuild_index(full=full)
+    print(f"✅ Index rebuilt in {result['elapsed']:.2f}s")
+    print(f"   Scanned: {result['scanned']} | Unchanged: {result['unchanged']}")
+    print(f"   Updated: {result['updated']} | Removed: {result['removed']}")
+
+def cmd_watch(args):
+    """Watch the vault and re-index changed files."""
     vault = get_vault()
-    vault._save_index()
-    print("✅ Index rebuilt")
+    vault.watch(use_events="--poll" not in args)
+
+def cmd_embed_worker(args):
+    """Embed queued documents in the background."""
+    EmbedWorker().run(once="--once" in args)
 
 def main():
     if len(sys.argv) < 2:
@@ -293,6 +423,7 @@ def main():
     
     commands = {
         "store": cmd_store,
+        "import": cmd_import,
         "search": cmd_search,
         "ask": cmd_ask,
         "list": cmd_list,
@@ -300,11 +431,13 @@ def main():
         "delete": cmd_delete,
         "stats": cmd_stats,
         "index": cmd_index,
+        "watch": cmd_watch,
+        "embed-worker": cmd_embed_worker,
         "help": print_help,
     }
     
     if command in commands:
-        if command in ["stats", "index", "help"]:
+        if command in ["stats", "help"]:
             commands[command]()
         else:
             commands[command](args)
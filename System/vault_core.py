@@ -9,10 +9,14 @@ Features:
 - Semantic document storage with metadata
 - Ollama-powered embedding and search
 - Markdown-native (human readable)
-- JSON index for fast lookup
+- SQLite (WAL) index with per-row updates (JSON index still supported)
 - Category-based organization
 - Full-text search
 - Document versioning
+- Content-addressed deduplication (identical content stored once)
+- Incremental filesystem rebuild (picks up hand-edited/dropped-in files)
+- Watch mode that keeps the index live (native events or polling)
+- Embed-on-store queue (config "auto_embed") drained by a background worker
 
 Author: Diesel-Goose AI
 Version: 1.0 – Local Sovereignty
@@ -21,16 +25,550 @@ Version: 1.0 – Local Sovereignty
 import json
 import hashlib
 import shutil
+import sqlite3
+import threading
+import heapq
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import islice
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Callable, Tuple
 import re
+import sys
+
+from vault_fulltext import FullTextIndex, make_snippet
+from vault_queue import EmbedQueue
+
+# Optional watchdog for native change events (inotify on Linux, FSEvents on macOS)
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
 
 # Vault Configuration
 VAULT_ROOT = Path.home() / "Documents" / "HonkNode" / "Duck-Pond"
 INDEX_FILE = VAULT_ROOT / ".vault" / "index.json"
+INDEX_DB = VAULT_ROOT / ".vault" / "index.db"
+FULLTEXT_DB = VAULT_ROOT / ".vault" / "fulltext.db"
+EMBED_QUEUE_DB = VAULT_ROOT / ".vault" / "embed_queue.db"
+SCAN_STATE_FILE = VAULT_ROOT / ".vault" / "scan_state.json"
 CONFIG_FILE = VAULT_ROOT / ".vault" / "config.json"
 OLLAMA_API = "http://localhost:11434/api"
+DEFAULT_INDEX_BACKEND = "sqlite"
+
+# Bulk ingestion (store_many)
+INGEST_CHUNK_SIZE = 256    # documents pulled from the input per round
+INGEST_WRITE_WORKERS = 8   # threads writing document files
+
+# Filesystem rebuild (rebuild_index)
+SCAN_WORKERS = 8
+SCAN_EXTENSIONS = (".md", ".markdown")
+SCAN_EXCLUDE_DIRS = {"System", "Archive", "node_modules", "__pycache__"}  # plus any dot-dir
+SCAN_LOOKUP_BATCH = 500     # paths per scan-state query
+
+# Watch mode (VaultWatcher)
+WATCH_DEBOUNCE = 1.0        # seconds a file must be quiet before re-indexing
+WATCH_POLL_INTERVAL = 2.0   # seconds between scans when polling
+WATCH_BATCH_SIZE = 100      # files per index transaction
+
+
+def extract_keywords(content: str) -> List[str]:
+    """Extract keywords from content (module-level so process pools can pickle it)."""
+    # Simple keyword extraction (can be enhanced with Ollama)
+    words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', content)
+    return list(set(words))[:20]  # Top 20 unique capitalized phrases
+
+
+def content_hash(content: str) -> str:
+    """Hash used to detect identical content (surrounding whitespace ignored)."""
+    return hashlib.sha256(content.strip().encode('utf-8')).hexdigest()
+
+
+def split_frontmatter(text: str) -> Tuple[Optional[Dict], str]:
+    """
+    Split a vault markdown file into (metadata, body).
+    
+    Metadata is the JSON header written by store(); files without one
+    (or with a non-JSON header) return None and the text after it.
+    """
+    if not text.startswith("---\n"):
+        return None, text
+    end = text.find("\n---\n", 4)
+    if end == -1:
+        return None, text
+    header, body = text[4:end], text[end + 5:]
+    try:
+        metadata = json.loads(header)
+    except ValueError:
+        return None, body
+    return (metadata if isinstance(metadata, dict) else None), body
+
+
+def _in_scan_scope(rel_path: str) -> bool:
+    """Whether a vault-relative path lives where rebuild_index() looks."""
+    return not any(
+        part.startswith(".") or part in SCAN_EXCLUDE_DIRS
+        for part in Path(rel_path).parts[:-1]
+    )
+
+
+def _scan_dir(directory: str, root_len: int) -> Tuple[Dict[str, Tuple[int, int]], List[str]]:
+    """List one directory: markdown files with (mtime_ns, size), plus subdirs to visit."""
+    files, subdirs = {}, []
+    try:
+        entries = os.scandir(directory)
+    except OSError:
+        return files, subdirs
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if not entry.name.startswith(".") and entry.name not in SCAN_EXCLUDE_DIRS:
+                    subdirs.append(entry.path)
+            elif entry.name.endswith(SCAN_EXTENSIONS):
+                st = entry.stat()
+                files[entry.path[root_len:]] = (st.st_mtime_ns, st.st_size)
+    return files, subdirs
+
+
+def scan_vault_files(root: Path = VAULT_ROOT, workers: int = SCAN_WORKERS) -> Dict[str, Tuple[int, int]]:
+    """
+    Walk the vault in parallel (one task per directory).
+    
+    Returns:
+        {relative_path: (mtime_ns, size)} for every markdown file in scope
+    """
+    root_len = len(str(root)) + 1
+    found = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(_scan_dir, str(root), root_len)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                found.update(files)
+                pending |= {pool.submit(_scan_dir, d, root_len) for d in subdirs}
+    return found
+
+
+def write_tracked(path: Path, data: bytes) -> List:
+    """Write a file and return its scan-state row prefix: [mtime_ns, size, sha256]."""
+    path.write_bytes(data)
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size, hashlib.sha256(data).hexdigest()]
+
+
+def _category_for(rel_path: str) -> str:
+    """Infer a category from where a file sits in the vault."""
+    parts = Path(rel_path).parts
+    if parts[0] == "Knowledge-Base":
+        return parts[1] if len(parts) > 2 else "General"
+    if parts[0] == "Projects":
+        return "Project"
+    return parts[0] if len(parts) > 1 else "General"
+
+
+def parse_vault_file(text: str, rel_path: str, mtime_ns: int) -> Tuple[Dict[str, Any], str]:
+    """
+    Build an index entry from a file on disk.
+    
+    Files written by store() carry a JSON header with their id and tags.
+    Anything else (hand-written markdown, YAML headers) gets a stable id
+    derived from its path, a title from its first heading, and a
+    category from its folder.
+    
+    Returns:
+        (index entry, body text for full-text indexing)
+    """
+    metadata, body = split_frontmatter(text)
+    modified = datetime.fromtimestamp(mtime_ns / 1e9).isoformat()
+    
+    heading = re.search(r'^#\s+(.+)$', body, re.MULTILINE)
+    if metadata and metadata.get("id"):
+        title = metadata.get("title") or Path(rel_path).stem
+    else:
+        metadata = {}
+        title = heading.group(1).strip() if heading else Path(rel_path).stem.replace("-", " ")
+    
+    # store() writes "# <title>" above the content; don't count it as content
+    content = body
+    if heading and heading.group(1).strip() == title:
+        content = body[heading.end():]
+    
+    entry = {
+        "id": metadata.get("id") or hashlib.sha256(rel_path.encode()).hexdigest()[:16],
+        "title": title,
+        "category": metadata.get("category") or _category_for(rel_path),
+        "tags": metadata.get("tags", []),
+        "path": rel_path,
+        "created": metadata.get("created", modified),
+        "modified": max(metadata.get("modified", ""), modified),
+        "keywords": extract_keywords(content),
+        "word_count": len(content.split()),
+        "content_hash": content_hash(content)
+    }
+    return entry, f"{title}\n{content}"
+
+
+
+class JSONIndexBackend:
+    """
+    Legacy index backend: the whole index lives in one index.json file.
+    
+    Every commit rewrites the full file, so this is only suitable for
+    small vaults. Kept for compatibility and for vaults that want a
+    human-readable index.
+    """
+    
+    name = "json"
+    
+    def __init__(self, path: Path = INDEX_FILE, scan_state_path: Path = SCAN_STATE_FILE):
+        self.path = path
+        self.scan_state_path = scan_state_path
+    
+    def load(self) -> Dict:
+        """Load the full index."""
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {"documents": [], "version": "1.0", "last_updated": datetime.now().isoformat()}
+    
+    def save(self, index: Dict):
+        """Write the full index."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {**index, "documents": list(index.get("documents", []))}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    
+    def commit(
+        self,
+        index: Dict,
+        upserts: List[Dict] = (),
+        deletes: List[str] = (),
+        counters: Optional[Dict[str, Dict[str, int]]] = None,
+        scan_rows: Optional[Dict[str, List]] = None,
+        scan_removed: Iterable[str] = ()
+    ):
+        """
+        Persist changes. JSON has no row-level updates, so rewrite
+        everything (counters are already applied to the in-memory index).
+        """
+        self.save(index)
+        scan_removed = list(scan_removed)
+        if scan_rows or scan_removed:
+            self.update_scan_state(scan_rows or {}, removed=scan_removed)
+    
+    def scan_state(self, paths: Optional[Iterable[str]] = None) -> Dict[str, List]:
+        """Last scan: {relative_path: [mtime_ns, size, sha256, doc_id]} (optionally only `paths`)."""
+        state = {}
+        if self.scan_state_path.exists():
+            with open(self.scan_state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        if paths is not None:
+            state = {rel: state[rel] for rel in paths if rel in state}
+        return state
+    
+    def update_scan_state(self, rows: Dict[str, List], removed: Iterable[str] = (), replace: bool = False):
+        """Write changed scan-state rows and drop removed paths (rewrites scan_state.json)."""
+        state = {} if replace else self.scan_state()
+        for rel in removed:
+            state.pop(rel, None)
+        state.update(rows)
+        with open(self.scan_state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, separators=(',', ':'))
+    
+    def close(self):
+        pass
+
+
+class SQLiteIndexBackend:
+    """
+    Default index backend: one row per document in .vault/index.db.
+    
+    Runs in WAL mode so a store() touches a single row instead of
+    re-serializing the whole vault. On first open, an existing
+    index.json is imported once and renamed to index.json.migrated.
+    
+    The filesystem scan state (one row per file) lives here too, so the
+    watcher updates only the paths that changed.
+    
+    Commits write only the meta keys they change. Counters (COUNTER_KEYS)
+    are incremented in SQL, so a long-running process never rolls back
+    counts another process added.
+    """
+    
+    name = "sqlite"
+    COUNTER_KEYS = ("dedupe",)
+    
+    def __init__(
+        self,
+        path: Path = INDEX_DB,
+        legacy_json: Path = INDEX_FILE,
+        legacy_scan_state: Path = SCAN_STATE_FILE
+    ):
+        self.path = path
+        self.legacy_json = legacy_json
+        self.legacy_scan_state = legacy_scan_state
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id TEXT PRIMARY KEY,
+                category TEXT,
+                modified TEXT,
+                doc TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+            CREATE TABLE IF NOT EXISTS scan_state (
+                path TEXT PRIMARY KEY,
+                mtime_ns INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                doc_id TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+        if self.legacy_scan_state.exists():
+            self._migrate_scan_state()
+    
+    def _migrate_scan_state(self):
+        """One-shot import of scan_state.json (rewritten whole on every scan)."""
+        with open(self.legacy_scan_state, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        self.update_scan_state(state)
+        self.legacy_scan_state.unlink()
+    
+    def _migrate_legacy(self):
+        """One-shot import of a pre-existing index.json."""
+        if not self.legacy_json.exists():
+            return
+        legacy = JSONIndexBackend(self.legacy_json).load()
+        self.save(legacy)
+        self.legacy_json.rename(self.legacy_json.with_name(self.legacy_json.name + ".migrated"))
+        print(f"📦 Migrated {len(legacy.get('documents', []))} documents from {self.legacy_json.name}")
+    
+    def load(self) -> Dict:
+        """Load all rows into the in-memory index shape."""
+        row_count = self.conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        if row_count == 0:
+            self._migrate_legacy()
+        
+        index = {"version": "1.0", "last_updated": datetime.now().isoformat()}
+        for key, value in self.conn.execute("SELECT key, value FROM meta"):
+            index[key] = json.loads(value)
+        # rowid order keeps the "most recently stored last" ordering of index.json
+        index["documents"] = [
+            json.loads(doc) for (doc,) in self.conn.execute("SELECT doc FROM documents ORDER BY rowid")
+        ]
+        return index
+    
+    def _write_meta(self, index: Dict, keys: Optional[Iterable[str]] = None):
+        """Write meta keys (every one but "documents" by default); counters only if missing."""
+        keys = [k for k in (index if keys is None else keys) if k != "documents" and k in index]
+        for verb, names in (
+            ("INSERT OR REPLACE", [k for k in keys if k not in self.COUNTER_KEYS]),
+            ("INSERT OR IGNORE", [k for k in keys if k in self.COUNTER_KEYS])
+        ):
+            self.conn.executemany(
+                f"{verb} INTO meta (key, value) VALUES (?, ?)",
+                [(k, json.dumps(index[k])) for k in names]
+            )
+    
+    def _add_counters(self, index: Dict, key: str, deltas: Dict[str, int]):
+        """Increment the fields of a counter key in place and reload it into index."""
+        self.conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES (?, '{}')", (key,))
+        for field, amount in deltas.items():
+            path = f"$.{field}"
+            self.conn.execute(
+                "UPDATE meta SET value = json_set(value, ?, COALESCE(json_extract(value, ?), 0) + ?) WHERE key = ?",
+                (path, path, amount, key)
+            )
+        (value,) = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        index[key] = json.loads(value)
+    
+    def _write_rows(self, docs):
+        # INSERT OR REPLACE allocates a fresh rowid, so replaced docs move to the end
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO documents (id, category, modified, doc) VALUES (?, ?, ?, ?)",
+            [(d["id"], d.get("category", ""), d.get("modified", ""), json.dumps(d)) for d in docs]
+        )
+    
+    def save(self, index: Dict):
+        """Replace every row with the given index (full rebuild)."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM documents")
+            self._write_rows(index.get("documents", []))
+            self._write_meta(index)
+    
+    def commit(
+        self,
+        index: Dict,
+        upserts: List[Dict] = (),
+        deletes: List[str] = (),
+        counters: Optional[Dict[str, Dict[str, int]]] = None,
+        scan_rows: Optional[Dict[str, List]] = None,
+        scan_removed: Iterable[str] = ()
+    ):
+        """
+        Apply only the changed rows in a single transaction.
+        
+        Args:
+            counters: {key: {field: delta}} added to counter meta keys
+            scan_rows: Scan-state rows of files this process just wrote
+            scan_removed: Paths whose scan-state rows are dropped
+        """
+        with self._lock, self.conn:
+            if deletes:
+                self.conn.executemany("DELETE FROM documents WHERE id = ?", [(d,) for d in deletes])
+            if upserts:
+                self._write_rows(upserts)
+            self._write_meta(index, ["last_updated"])
+            for key, deltas in (counters or {}).items():
+                self._add_counters(index, key, deltas)
+            self._write_scan_state(scan_rows or {}, scan_removed)
+    
+    def scan_state(self, paths: Optional[Iterable[str]] = None) -> Dict[str, List]:
+        """Last scan: {relative_path: [mtime_ns, size, sha256, doc_id]} (optionally only `paths`)."""
+        query = "SELECT path, mtime_ns, size, sha256, doc_id FROM scan_state"
+        if paths is None:
+            return {row[0]: list(row[1:]) for row in self.conn.execute(query)}
+        paths = list(paths)
+        state = {}
+        for i in range(0, len(paths), SCAN_LOOKUP_BATCH):
+            batch = paths[i:i + SCAN_LOOKUP_BATCH]
+            state.update(
+                (row[0], list(row[1:]))
+                for row in self.conn.execute(f"{query} WHERE path IN ({','.join('?' * len(batch))})", batch)
+            )
+        return state
+    
+    def update_scan_state(self, rows: Dict[str, List], removed: Iterable[str] = (), replace: bool = False):
+        """Upsert changed scan-state rows and drop removed paths in one transaction."""
+        with self._lock, self.conn:
+            if replace:
+                self.conn.execute("DELETE FROM scan_state")
+            self._write_scan_state(rows, removed)
+    
+    def _write_scan_state(self, rows: Dict[str, List], removed: Iterable[str] = ()):
+        self.conn.executemany("DELETE FROM scan_state WHERE path = ?", [(rel,) for rel in removed])
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO scan_state (path, mtime_ns, size, sha256, doc_id) VALUES (?, ?, ?, ?, ?)",
+            [(rel, *row) for rel, row in rows.items()]
+        )
+    
+    def close(self):
+        self.conn.close()
+
+
+INDEX_BACKENDS = {
+    "json": JSONIndexBackend,
+    "sqlite": SQLiteIndexBackend,
+}
+
+
+class DocumentIndex:
+    """
+    In-memory document index with O(1) id lookup.
+    
+    Documents are keyed by id, and inverted maps (category, tag, keyword
+    -> ids) are kept in sync on every add/remove so filters become set
+    operations. Iterating yields entries in storage order, so code that
+    treated index["documents"] as a list keeps working.
+    """
+    
+    def __init__(self, documents: Iterable[Dict] = ()):
+        self.by_id: Dict[str, Dict] = {}
+        # dicts used as insertion-ordered sets of ids
+        self.by_category: Dict[str, Dict[str, None]] = {}
+        self.by_tag: Dict[str, Dict[str, None]] = {}
+        self.by_keyword: Dict[str, Dict[str, None]] = {}
+        self.by_hash: Dict[str, Dict[str, None]] = {}
+        for doc in documents:
+            self.add(doc)
+    
+    @staticmethod
+    def _link(mapping: Dict, key: str, doc_id: str):
+        mapping.setdefault(key, {})[doc_id] = None
+    
+    @staticmethod
+    def _unlink(mapping: Dict, key: str, doc_id: str):
+        ids = mapping.get(key)
+        if ids is not None:
+            ids.pop(doc_id, None)
+            if not ids:
+                del mapping[key]
+    
+    def add(self, doc: Dict):
+        """Add or replace an entry (replaced entries move to the end)."""
+        doc_id = doc["id"]
+        self.remove(doc_id)
+        self.by_id[doc_id] = doc
+        self._link(self.by_category, doc.get("category", ""), doc_id)
+        for tag in set(doc.get("tags", [])):
+            self._link(self.by_tag, tag, doc_id)
+        for kw in set(doc.get("keywords", [])):
+            self._link(self.by_keyword, kw, doc_id)
+        if doc.get("content_hash"):
+            # Several ids may share a hash (dedupe off, or stored before it)
+            self._link(self.by_hash, doc["content_hash"], doc_id)
+    
+    def remove(self, doc_id: str) -> Optional[Dict]:
+        """Remove an entry, returning it if it existed."""
+        doc = self.by_id.pop(doc_id, None)
+        if doc is None:
+            return None
+        self._unlink(self.by_category, doc.get("category", ""), doc_id)
+        for tag in set(doc.get("tags", [])):
+            self._unlink(self.by_tag, tag, doc_id)
+        for kw in set(doc.get("keywords", [])):
+            self._unlink(self.by_keyword, kw, doc_id)
+        if doc.get("content_hash"):
+            self._unlink(self.by_hash, doc["content_hash"], doc_id)
+        return doc
+    
+    def get(self, doc_id: str) -> Optional[Dict]:
+        return self.by_id.get(doc_id)
+    
+    def ids_in_category(self, category: str):
+        return self.by_category.get(category, {}).keys()
+    
+    def ids_with_all_tags(self, tags: List[str]) -> set:
+        """Ids carrying every tag, intersecting from the rarest tag up."""
+        postings = sorted((self.by_tag.get(t, {}) for t in set(tags)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        ids = set(postings[0])
+        for other in postings[1:]:
+            ids &= other.keys()
+        return ids
+    
+    def ids_with_hash(self, digest: str):
+        return self.by_hash.get(digest, {}).keys()
+    
+    def ids_with_any_keyword(self, keywords: List[str]) -> set:
+        ids = set()
+        for kw in keywords:
+            ids.update(self.by_keyword.get(kw, {}))
+        return ids
+    
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.by_id.values())
+    
+    def __len__(self) -> int:
+        return len(self.by_id)
+    
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.by_id
+
 
 class LocalVault:
     """
@@ -39,8 +577,14 @@ class LocalVault:
     
     def __init__(self):
         self._ensure_structure()
-        self.index = self._load_index()
         self.config = self._load_config()
+        self.backend = self._open_backend()
+        self.index = self._load_index()
+        self.fulltext = FullTextIndex(FULLTEXT_DB)
+        self.embed_queue = EmbedQueue(EMBED_QUEUE_DB)
+        self._listeners: List[Callable[[List[Dict], List[str]], None]] = []
+        # Counter increments not yet committed: {meta key: {field: delta}}
+        self._counter_deltas: Dict[str, Dict[str, int]] = {}
     
     def _ensure_structure(self):
         """Create vault directory structure."""
@@ -56,12 +600,19 @@ class LocalVault:
         for d in dirs:
             d.mkdir(parents=True, exist_ok=True)
     
+    def _open_backend(self):
+        """Open the index backend selected by config (default: sqlite)."""
+        name = self.config.get("index_backend", DEFAULT_INDEX_BACKEND)
+        if name not in INDEX_BACKENDS:
+            print(f"⚠️  Unknown index backend '{name}', using {DEFAULT_INDEX_BACKEND}")
+            name = DEFAULT_INDEX_BACKEND
+        return INDEX_BACKENDS[name]()
+    
     def _load_index(self) -> Dict:
         """Load document index."""
-        if INDEX_FILE.exists():
-            with open(INDEX_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        return {"documents": [], "version": "1.0", "last_updated": datetime.now().isoformat()}
+        index = self.backend.load()
+        index["documents"] = DocumentIndex(index.get("documents", []))
+        return index
     
     def _load_config(self) -> Dict:
         """Load vault configuration."""
@@ -71,15 +622,52 @@ class LocalVault:
         return {
             "default_model": "llama3",
             "auto_embed": True,
+            "index_backend": DEFAULT_INDEX_BACKEND,
+            "dedupe": True,
+            "ask_context_tokens": 2048,
+            "answer_cache_ttl": 86400,
+            "answer_cache_size": 1000,
             "categories": ["Business", "Technical", "Personal", "Project"]
         }
     
     def _save_index(self):
-        """Save document index."""
-        INDEX_FILE.parent.mkdir(parents=True, exist_ok=True)
+        """Save the full document index (rewrites every entry)."""
         self.index["last_updated"] = datetime.now().isoformat()
-        with open(INDEX_FILE, 'w', encoding='utf-8') as f:
-            json.dump(self.index, f, indent=2)
+        self.backend.save(self.index)
+    
+    def _commit(
+        self,
+        upserts: List[Dict] = (),
+        deletes: List[str] = (),
+        touched: List[Dict] = (),
+        scan_rows: Optional[Dict[str, List]] = None,
+        scan_removed: Iterable[str] = ()
+    ):
+        """
+        Persist only the entries that changed.
+        
+        Args:
+            touched: Entries whose tags changed but whose content did not
+                (duplicate merges): persisted, but not queued for
+                embedding and not announced to listeners, so their
+                vectors, summaries and cached answers stay valid
+            scan_rows: Scan-state rows of files the vault itself wrote,
+                so the watcher does not re-parse (and re-embed) them
+            scan_removed: Paths the vault moved away
+        """
+        self.index["last_updated"] = datetime.now().isoformat()
+        counters, self._counter_deltas = self._counter_deltas, {}
+        self.backend.commit(
+            self.index, upserts=[*upserts, *touched], deletes=deletes,
+            counters=counters, scan_rows=scan_rows, scan_removed=scan_removed
+        )
+        self._enqueue_embed(upserts, deletes)
+        self._notify(list(upserts), list(deletes))
+    
+    def _enqueue_embed(self, upserts: List[Dict], deletes: List[str]):
+        """Hand changed documents to the embed worker (config "auto_embed")."""
+        if self.config.get("auto_embed", True) and (upserts or deletes):
+            self.embed_queue.push(upserts, deletes)
     
     def _generate_id(self, content: str) -> str:
         """Generate unique document ID."""
@@ -88,46 +676,30 @@ class LocalVault:
     
     def _extract_keywords(self, content: str) -> List[str]:
         """Extract keywords from content."""
-        # Simple keyword extraction (can be enhanced with Ollama)
-        words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', content)
-        return list(set(words))[:20]  # Top 20 unique capitalized phrases
+        return extract_keywords(content)
     
-    def store(
+    def _storage_path(self, doc_id: str, category: str) -> Path:
+        """Determine where a document lives on disk."""
+        if category in ["Business", "Technical", "Personal"]:
+            return VAULT_ROOT / "Knowledge-Base" / category / f"{doc_id}.md"
+        elif category == "Project":
+            return VAULT_ROOT / "Projects" / "Active" / f"{doc_id}.md"
+        return VAULT_ROOT / "Knowledge-Base" / "General" / f"{doc_id}.md"
+    
+    def _prepare_document(
         self,
         content: str,
         title: str,
         category: str = "General",
         tags: List[str] = None,
         source: str = "",
-        format: str = "markdown"
-    ) -> Dict[str, Any]:
-        """
-        Store a document in the vault.
-        
-        Args:
-            content: Document content
-            title: Document title
-            category: Storage category (Business, Technical, Personal, Project)
-            tags: List of tags for filtering
-            source: Where this came from (email, chat, file, etc.)
-            format: Content format (markdown, text, json)
-        
-        Returns:
-            Document metadata dict
-        """
+        format: str = "markdown",
+        keywords: List[str] = None
+    ) -> Tuple[Path, str, Dict[str, Any]]:
+        """Build the on-disk markdown and the index entry for a document."""
         doc_id = self._generate_id(content)
         timestamp = datetime.now().isoformat()
-        
-        # Determine storage path
-        if category in ["Business", "Technical", "Personal"]:
-            storage_path = VAULT_ROOT / "Knowledge-Base" / category / f"{doc_id}.md"
-        elif category == "Project":
-            storage_path = VAULT_ROOT / "Projects" / "Active" / f"{doc_id}.md"
-        else:
-            storage_path = VAULT_ROOT / "Knowledge-Base" / "General" / f"{doc_id}.md"
-        
-        # Ensure directory exists
-        storage_path.parent.mkdir(parents=True, exist_ok=True)
+        storage_path = self._storage_path(doc_id, category)
         
         # Create markdown with metadata header
         metadata = {
@@ -140,10 +712,9 @@ class LocalVault:
             "modified": timestamp,
             "format": format,
             "word_count": len(content.split()),
-            "keywords": self._extract_keywords(content)
+            "keywords": keywords if keywords is not None else self._extract_keywords(content)
         }
         
-        # Write document
         doc_content = f"""---
 {json.dumps(metadata, indent=2)}
 ---
@@ -153,10 +724,6 @@ class LocalVault:
 {content}
 """
         
-        with open(storage_path, 'w', encoding='utf-8') as f:
-            f.write(doc_content)
-        
-        # Update index
         doc_entry = {
             "id": doc_id,
             "title": title,
@@ -166,26 +733,460 @@ class LocalVault:
             "created": timestamp,
             "modified": timestamp,
             "keywords": metadata["keywords"],
-            "word_count": metadata["word_count"]
+            "word_count": metadata["word_count"],
+            "content_hash": content_hash(content)
         }
+        return storage_path, doc_content, doc_entry
+    
+    @staticmethod
+    def _write_document(storage_path: Path, doc_content: str) -> List:
+        """Write a document file; returns [mtime_ns, size, sha256] for the scan state."""
+        storage_path.parent.mkdir(parents=True, exist_ok=True)
+        return write_tracked(storage_path, doc_content.encode('utf-8'))
+    
+    @staticmethod
+    def _scan_rows(written: Iterable[Tuple[Dict, Optional[List]]]) -> Dict[str, List]:
+        """Scan-state rows for (entry, _write_document() result) pairs."""
+        return {entry["path"]: row + [entry["id"]] for entry, row in written if row}
+    
+    def _find_duplicate(self, content: str) -> Optional[Dict]:
+        """O(1) lookup of an existing document with identical content."""
+        docs = self.index["documents"]
+        doc_id = next(iter(docs.ids_with_hash(content_hash(content))), None)
+        return docs.get(doc_id) if doc_id else None
+    
+    def _merge_duplicate(self, existing: Dict, tags: List[str]) -> Dict:
+        """
+        Fold a duplicate store into the existing entry's tags. "modified"
+        is left alone: it versions the content, which did not change.
+        """
+        merged_tags = list(existing.get("tags", []))
+        merged_tags += [t for t in (tags or []) if t not in merged_tags]
+        updated = {**existing, "tags": merged_tags}
+        self.index["documents"].add(updated)
+        return updated
+    
+    def _count_duplicates(self, count: int, nbytes: int):
+        """Add merged duplicates to the dedupe stats (persisted by the next commit)."""
+        if not count:
+            return
+        dedupe = self.index.setdefault("dedupe", {"duplicates": 0, "bytes_saved": 0})
+        dedupe["duplicates"] += count
+        dedupe["bytes_saved"] += nbytes
+        # The backend adds these to the persisted counters on the next commit
+        delta = self._counter_deltas.setdefault("dedupe", {"duplicates": 0, "bytes_saved": 0})
+        delta["duplicates"] += count
+        delta["bytes_saved"] += nbytes
+    
+    def _rewrite_header(self, doc: Dict) -> Optional[List]:
+        """
+        Write an entry's tags/modified back into its file's JSON header.
         
-        # Remove old entry if exists
-        self.index["documents"] = [d for d in self.index["documents"] if d["id"] != doc_id]
-        self.index["documents"].append(doc_entry)
-        self._save_index()
+        Returns:
+            [mtime_ns, size, sha256] of the rewritten file, or None if it
+            was left alone
+        """
+        path = VAULT_ROOT / doc["path"]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                metadata, body = split_frontmatter(f.read())
+        except OSError:
+            return None
+        if metadata is None:
+            return None  # hand-written file: tags live only in the index
+        metadata.update(tags=doc["tags"], modified=doc["modified"])
+        return write_tracked(path, f"---\n{json.dumps(metadata, indent=2)}\n---\n{body}".encode('utf-8'))
+    
+    def store(
+        self,
+        content: str,
+        title: str,
+        category: str = "General",
+        tags: List[str] = None,
+        source: str = "",
+        format: str = "markdown",
+        dedupe: Optional[bool] = None
+    ) -> Dict[str, Any]:
+        """
+        Store a document in the vault.
+        
+        Args:
+            content: Document content
+            title: Document title
+            category: Storage category (Business, Technical, Personal, Project)
+            tags: List of tags for filtering
+            source: Where this came from (email, chat, file, etc.)
+            format: Content format (markdown, text, json)
+            dedupe: If identical content already exists, update its tags
+                instead of writing a new file (default: config "dedupe")
+        
+        Returns:
+            Document metadata dict (the existing one for duplicates)
+        """
+        if dedupe is None:
+            dedupe = self.config.get("dedupe", True)
+        duplicate = self._find_duplicate(content) if dedupe else None
+        if duplicate:
+            doc_entry = self._merge_duplicate(duplicate, tags)
+            row = self._rewrite_header(doc_entry)
+            self._count_duplicates(1, len(content.encode('utf-8')))
+            self._commit(touched=[doc_entry], scan_rows=self._scan_rows([(doc_entry, row)]))
+            print(f"♻️  Duplicate of: {doc_entry['title']} ({doc_entry['id']}) – tags updated")
+            return doc_entry
+        
+        storage_path, doc_content, doc_entry = self._prepare_document(
+            content, title, category=category, tags=tags, source=source, format=format
+        )
+        row = self._write_document(storage_path, doc_content)
         
-        print(f"✅ Stored: {title} ({doc_id})")
+        # Replaces any old entry with the same id
+        self.index["documents"].add(doc_entry)
+        self._commit(upserts=[doc_entry], scan_rows=self._scan_rows([(doc_entry, row)]))
+        self.fulltext.add(doc_entry["id"], f"{title}\n{content}")
+        
+        print(f"✅ Stored: {title} ({doc_entry['id']})")
         return doc_entry
     
+    def store_many(
+        self,
+        documents: Iterable[Dict],
+        batch_size: int = 0,
+        workers: int = INGEST_WRITE_WORKERS,
+        processes: Optional[int] = None,
+        progress: Optional[Callable[[int, int], None]] = None,
+        dedupe: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Store many documents with a single index flush.
+        
+        Args:
+            documents: Iterable (or generator) of dicts with "content" and
+                "title", plus optional "category", "tags", "source", "format"
+            batch_size: Flush the index every N documents (0 = once at the end)
+            workers: Threads used to write document files
+            processes: Processes used for keyword extraction
+                (None = CPU count, 1 = extract inline); inputs smaller
+                than one INGEST_CHUNK_SIZE chunk are always extracted inline
+            progress: Optional callback(docs_done, bytes_done)
+            dedupe: Merge identical content into existing documents
+                (default: config "dedupe")
+        
+        Returns:
+            List of index entries, in input order
+        """
+        if dedupe is None:
+            dedupe = self.config.get("dedupe", True)
+        processes = processes or os.cpu_count() or 1
+        docs = self.index["documents"]
+        # pending: new documents; touched: existing ones that only gained tags
+        stored, pending, touched, scan_rows = [], {}, {}, {}
+        bytes_done = 0
+        source_iter = iter(documents)
+        
+        def write(item) -> Tuple[Optional[List], Optional[BaseException]]:
+            try:
+                return self._write_document(item[0], item[1]), None
+            except Exception as e:
+                return None, e
+        
+        # Started on the first full chunk: small imports are extracted inline
+        proc_pool = None
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as io_pool:
+                while True:
+                    chunk = list(islice(source_iter, INGEST_CHUNK_SIZE))
+                    if not chunk:
+                        break
+                    
+                    contents = [d["content"] for d in chunk]
+                    if proc_pool is None and processes > 1 and len(chunk) >= INGEST_CHUNK_SIZE:
+                        proc_pool = ProcessPoolExecutor(max_workers=processes)
+                    if proc_pool:
+                        keywords = list(proc_pool.map(
+                            extract_keywords, contents,
+                            chunksize=max(1, len(contents) // (processes * 4))
+                        ))
+                    else:
+                        keywords = [extract_keywords(c) for c in contents]
+                    
+                    # New entries go into the index before their files are
+                    # written (so later duplicates in this chunk find them)
+                    # and come out again if the chunk fails
+                    # merged: {doc_id: [duplicates, bytes]} folded into that document
+                    prepared, texts, merged, added = [], {}, {}, []
+                    try:
+                        for d, kw in zip(chunk, keywords):
+                            duplicate = self._find_duplicate(d["content"]) if dedupe else None
+                            if duplicate:
+                                entry = self._merge_duplicate(duplicate, d.get("tags"))
+                                counts = merged.setdefault(entry["id"], [0, 0])
+                                counts[0] += 1
+                                counts[1] += len(d["content"].encode('utf-8'))
+                            else:
+                                path, doc_content, entry = self._prepare_document(
+                                    d["content"], d["title"],
+                                    category=d.get("category", "General"),
+                                    tags=d.get("tags"),
+                                    source=d.get("source", ""),
+                                    format=d.get("format", "markdown"),
+                                    keywords=kw
+                                )
+                                prepared.append((path, doc_content, entry["id"]))
+                                texts[entry["id"]] = f"{d['title']}\n{d['content']}"
+                                docs.add(entry)
+                                added.append(entry["id"])
+                            stored.append(entry)
+                        written = list(io_pool.map(write, prepared))
+                    except BaseException:
+                        for doc_id in added:
+                            docs.remove(doc_id)
+                        raise
+                    
+                    failed = {item[2]: error for item, (_, error) in zip(prepared, written) if error is not None}
+                    for doc_id in failed:
+                        # Duplicates merged into a document that was never
+                        # written saved nothing: they are not counted
+                        docs.remove(doc_id)
+                        merged.pop(doc_id, None)
+                        texts.pop(doc_id)
+                    self._count_duplicates(
+                        sum(counts[0] for counts in merged.values()),
+                        sum(counts[1] for counts in merged.values())
+                    )
+                    pending.update((doc_id, docs.get(doc_id)) for doc_id in texts)
+                    for doc_id in merged:
+                        (pending if doc_id in pending else touched)[doc_id] = docs.get(doc_id)
+                    scan_rows.update(self._scan_rows(
+                        (pending[item[2]], row) for item, (row, _) in zip(prepared, written) if row
+                    ))
+                    
+                    # list() re-raises the first header rewrite error, if any
+                    rewritten = list(io_pool.map(lambda doc_id: self._rewrite_header(docs.get(doc_id)), merged))
+                    scan_rows.update(self._scan_rows((docs.get(doc_id), row) for doc_id, row in zip(merged, rewritten)))
+                    self.fulltext.add_many(texts.items())
+                    if failed:
+                        # Entries whose files were written are still committed below
+                        raise next(iter(failed.values()))
+                    bytes_done += sum(len(c.encode('utf-8')) for c in contents)
+                    
+                    if batch_size and len(pending) + len(touched) >= batch_size:
+                        self._commit(
+                            upserts=list(pending.values()), touched=list(touched.values()), scan_rows=scan_rows
+                        )
+                        pending, touched, scan_rows = {}, {}, {}
+                    
+                    if progress:
+                        progress(len(stored), bytes_done)
+        finally:
+            if proc_pool:
+                proc_pool.shutdown()
+            if pending or touched:
+                self._commit(upserts=list(pending.values()), touched=list(touched.values()), scan_rows=scan_rows)
+        
+        return stored
+    
+    def read_body(self, doc: Dict) -> str:
+        """Read a document's text without its metadata header."""
+        path = VAULT_ROOT / doc["path"]
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return split_frontmatter(f.read())[1]
+        except (OSError, UnicodeDecodeError):
+            return ""
+    
+    def reindex_fulltext(self):
+        """Rebuild the full-text index from the files on disk."""
+        self.fulltext.clear()
+        self.fulltext.add_many((doc["id"], self.read_body(doc)) for doc in self.index["documents"])
+    
+    def _scan_file(self, rel_path: str, stat: Tuple[int, int], known: Optional[List]) -> Optional[Tuple]:
+        """
+        Hash one changed file and parse it if its content changed.
+        
+        Returns:
+            (rel_path, state_row, entry, fulltext) – entry is None when
+            only the mtime moved (same hash); None if unreadable
+        """
+        try:
+            raw = (VAULT_ROOT / rel_path).read_bytes()
+        except OSError:
+            return None
+        digest = hashlib.sha256(raw).hexdigest()
+        if known and known[2] == digest:
+            return rel_path, [stat[0], stat[1], digest, known[3]], None, None
+        
+        entry, text = parse_vault_file(raw.decode('utf-8', errors='replace'), rel_path, stat[0])
+        return rel_path, [stat[0], stat[1], digest, entry["id"]], entry, text
+    
+    def rebuild_index(self, full: bool = False, workers: int = SCAN_WORKERS) -> Dict[str, Any]:
+        """
+        Rebuild the index from the files on disk.
+        
+        Walks VAULT_ROOT in parallel and re-parses only files whose
+        mtime/size changed since the last scan (and whose content hash
+        differs). Index entries whose file disappeared are removed.
+        
+        Args:
+            full: Ignore the previous scan and re-parse everything
+            workers: Threads used for walking and parsing
+        
+        Returns:
+            Counts of scanned/unchanged/updated/removed files and elapsed seconds
+        """
+        start = time.time()
+        docs = self.index["documents"]
+        state = {} if full else self.backend.scan_state()
+        files = scan_vault_files(VAULT_ROOT, workers)
+        
+        changed = [
+            (rel, stat) for rel, stat in files.items()
+            if rel not in state or tuple(state[rel][:2]) != stat
+        ]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            scanned = list(pool.map(lambda item: self._scan_file(item[0], item[1], state.get(item[0])), changed))
+        
+        gone = {
+            doc["path"] for doc in docs
+            if doc["path"] not in files and _in_scan_scope(doc["path"])
+        }
+        stale = [rel for rel in state if rel not in files]
+        upserts, deletes = self._apply_scan(scanned, gone, state, stale, full=full)
+        
+        return {
+            "scanned": len(files),
+            "unchanged": len(files) - len(changed),
+            "updated": len(upserts),
+            "removed": len(deletes),
+            "elapsed": time.time() - start
+        }
+    
+    def _apply_scan(
+        self,
+        scanned: List[Optional[Tuple]],
+        gone: set,
+        state: Dict[str, List],
+        stale: Iterable[str] = (),
+        full: bool = False
+    ) -> Tuple[List[Dict], List[str]]:
+        """
+        Fold scan results into the index, full-text index and scan state.
+        
+        Args:
+            scanned: Results of _scan_file()
+            gone: Vault-relative paths that no longer exist
+            state: Scan state rows (at least those of `gone`) before this pass
+            stale: Paths whose scan-state rows are dropped
+            full: Rewrite the whole index, full-text index and scan state
+        
+        Returns:
+            (upserted entries, deleted ids)
+        """
+        docs = self.index["documents"]
+        upserts, texts = [], []
+        rows = {}
+        for result in scanned:
+            if result is None:
+                continue
+            rel, row, entry, text = result
+            rows[rel] = row
+            if entry is None:
+                continue
+            existing = docs.get(entry["id"])
+            if existing and entry["id"] == hashlib.sha256(rel.encode()).hexdigest()[:16]:
+                # No header on disk: tags and created date only live in the index
+                entry["tags"] = existing.get("tags", [])
+                entry["created"] = existing.get("created", entry["created"])
+            docs.add(entry)
+            upserts.append(entry)
+            texts.append((entry["id"], text))
+        
+        deletes = []
+        if gone:
+            # Scan state knows most path -> id mappings; fall back to a pass over the index
+            ids = {state[rel][3] for rel in gone if rel in state}
+            if len(ids) < len(gone):
+                ids.update(doc["id"] for doc in docs if doc["path"] in gone)
+            for doc_id in ids:
+                doc = docs.get(doc_id)
+                if doc and doc["path"] in gone:
+                    docs.remove(doc_id)
+                    deletes.append(doc_id)
+        
+        if full:
+            # Start the full-text index over; docs outside the scan keep theirs
+            self.fulltext.clear()
+            parsed_ids = {doc_id for doc_id, _ in texts}
+            texts += [(doc["id"], self.read_body(doc)) for doc in docs if doc["id"] not in parsed_ids]
+            self._save_index()
+            self._enqueue_embed(upserts, deletes)
+            self._notify(list(docs), deletes)
+        elif upserts or deletes:
+            self._commit(upserts=upserts, deletes=deletes)
+        if texts:
+            self.fulltext.add_many(texts)
+        if deletes:
+            self.fulltext.remove_many(deletes)
+        stale = list(stale)
+        if rows or stale or full:
+            self.backend.update_scan_state(rows, removed=stale, replace=full)
+        return upserts, deletes
+    
+    def reindex_paths(self, rel_paths: Iterable[str]) -> Dict[str, int]:
+        """
+        Re-index specific files (used by the watcher).
+        
+        Args:
+            rel_paths: Vault-relative paths that were created, modified or deleted
+        
+        Returns:
+            Counts of updated and removed documents
+        """
+        rel_paths = set(rel_paths)
+        state = self.backend.scan_state(rel_paths)
+        present, gone = {}, set()
+        for rel in rel_paths:
+            if not rel.endswith(SCAN_EXTENSIONS) or not _in_scan_scope(rel):
+                continue
+            try:
+                st = (VAULT_ROOT / rel).stat()
+            except FileNotFoundError:
+                gone.add(rel)
+                continue
+            if rel in state and tuple(state[rel][:2]) == (st.st_mtime_ns, st.st_size):
+                continue
+            present[rel] = (st.st_mtime_ns, st.st_size)
+        
+        scanned = [self._scan_file(rel, stat, state.get(rel)) for rel, stat in present.items()]
+        upserts, deletes = self._apply_scan(scanned, gone, state, [rel for rel in gone if rel in state])
+        return {"updated": len(upserts), "removed": len(deletes)}
+    
+    def add_listener(self, callback: Callable[[List[Dict], List[str]], None]):
+        """
+        Register a callback(upserted_entries, deleted_ids) fired after
+        every index change, so derived indexes (embeddings) stay in sync.
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, upserts: List[Dict], deletes: List[str]):
+        for callback in self._listeners:
+            try:
+                callback(upserts, deletes)
+            except Exception as e:
+                print(f"⚠️  Index listener failed: {e}")
+    
+    def watch(self, **kwargs):
+        """Keep the index live until interrupted (see VaultWatcher)."""
+        VaultWatcher(self, **kwargs).run()
+    
     def retrieve(self, doc_id: str) -> Optional[Dict]:
         """Retrieve a document by ID."""
-        for doc in self.index["documents"]:
-            if doc["id"] == doc_id:
-                path = VAULT_ROOT / doc["path"]
-                if path.exists():
-                    with open(path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    return {"metadata": doc, "content": content}
+        doc = self.index["documents"].get(doc_id)
+        if doc:
+            path = VAULT_ROOT / doc["path"]
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                return {"metadata": doc, "content": content}
         return None
     
     def search(
@@ -194,89 +1195,254 @@ class LocalVault:
         category: str = "",
         tags: List[str] = None,
         keywords: List[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        rank: str = "recency"
     ) -> List[Dict]:
         """
         Search documents by various criteria.
         
         Args:
-            query: Text to search in titles
+            query: Text to search in titles ("recency") or bodies ("bm25")
             category: Filter by category
             tags: Filter by tags (all must match)
             keywords: Filter by keywords (any can match)
             limit: Max results
+            rank: "recency" (title substring, newest first) or "bm25"
+                (full-text relevance, with "score" and "snippet" fields)
         
         Returns:
             List of matching document metadata
         """
-        results = []
+        docs = self.index["documents"]
+        candidates = self._filter_ids(category, tags, keywords)
         
-        for doc in self.index["documents"]:
-            # Category filter
-            if category and doc["category"] != category:
+        if rank == "bm25" and query:
+            return self._search_bm25(query, candidates, limit)
+        
+        if candidates is None:
+            results = iter(docs)
+        else:
+            results = (docs.get(doc_id) for doc_id in candidates)
+        
+        # Text search in title
+        if query:
+            needle = query.lower()
+            results = (doc for doc in results if needle in doc["title"].lower())
+        
+        # Most recent first
+        return heapq.nlargest(limit, results, key=lambda x: x["modified"])
+    
+    def _search_bm25(self, query: str, candidates: Optional[set], limit: int) -> List[Dict]:
+        """Full-text BM25 search with snippets for the top results."""
+        docs = self.index["documents"]
+        if len(docs) and self.fulltext.doc_count() == 0:
+            # Vault predates the full-text index: build it once
+            self.reindex_fulltext()
+        
+        results = []
+        for doc_id, score in self.fulltext.search(query, top_k=limit, candidates=candidates):
+            doc = docs.get(doc_id)
+            if doc is None:
                 continue
-            
-            # Tags filter (all must be present)
-            if tags:
-                if not all(tag in doc.get("tags", []) for tag in tags):
-                    continue
-            
-            # Keywords filter (any can match)
-            if keywords:
-                doc_keywords = set(doc.get("keywords", []))
-                if not any(kw in doc_keywords for kw in keywords):
-                    continue
-            
-            # Text search in title
-            if query:
-                if query.lower() not in doc["title"].lower():
-                    continue
-            
-            results.append(doc)
-        
-        # Sort by recency
-        results.sort(key=lambda x: x["modified"], reverse=True)
-        
-        return results[:limit]
+            results.append({
+                **doc,
+                "score": round(score, 4),
+                "snippet": make_snippet(self.read_body(doc), query)
+            })
+        return results
+    
+    def _filter_ids(
+        self,
+        category: str = "",
+        tags: List[str] = None,
+        keywords: List[str] = None
+    ) -> Optional[set]:
+        """
+        Resolve category/tag/keyword filters to a set of ids via the
+        inverted maps. Returns None when no filter is set (all documents).
+        """
+        docs = self.index["documents"]
+        candidates = None
+        
+        # Category filter
+        if category:
+            candidates = set(docs.ids_in_category(category))
+        
+        # Tags filter (all must be present)
+        if tags:
+            tagged = docs.ids_with_all_tags(tags)
+            candidates = tagged if candidates is None else candidates & tagged
+        
+        # Keywords filter (any can match)
+        if keywords:
+            matched = docs.ids_with_any_keyword(keywords)
+            candidates = matched if candidates is None else candidates & matched
+        
+        return candidates
     
     def list_all(self, category: str = "") -> List[Dict]:
         """List all documents, optionally filtered by category."""
+        docs = self.index["documents"]
         if category:
-            return [d for d in self.index["documents"] if d["category"] == category]
-        return self.index["documents"]
+            return [docs.get(doc_id) for doc_id in docs.ids_in_category(category)]
+        return list(docs)
     
     def delete(self, doc_id: str) -> bool:
         """Delete a document."""
-        for doc in self.index["documents"]:
-            if doc["id"] == doc_id:
-                path = VAULT_ROOT / doc["path"]
-                if path.exists():
-                    # Move to archive instead of permanent delete
-                    archive_path = VAULT_ROOT / "Archive" / f"{doc_id}.md"
-                    shutil.move(path, archive_path)
-                
-                self.index["documents"] = [d for d in self.index["documents"] if d["id"] != doc_id]
-                self._save_index()
-                print(f"🗑️  Archived: {doc['title']}")
-                return True
-        return False
+        doc = self.index["documents"].remove(doc_id)
+        if doc is None:
+            return False
+        
+        path = VAULT_ROOT / doc["path"]
+        if path.exists():
+            # Move to archive instead of permanent delete
+            archive_path = VAULT_ROOT / "Archive" / f"{doc_id}.md"
+            shutil.move(path, archive_path)
+        
+        self._commit(deletes=[doc_id], scan_removed=[doc["path"]])
+        self.fulltext.remove(doc_id)
+        print(f"🗑️  Archived: {doc['title']}")
+        return True
     
     def stats(self) -> Dict:
         """Get vault statistics."""
         docs = self.index["documents"]
-        categories = {}
-        for doc in docs:
-            cat = doc["category"]
-            categories[cat] = categories.get(cat, 0) + 1
+        categories = {cat: len(ids) for cat, ids in docs.by_category.items()}
+        dedupe = self.index.get("dedupe", {})
         
         return {
             "total_documents": len(docs),
             "categories": categories,
+            "duplicates_merged": dedupe.get("duplicates", 0),
+            "bytes_saved": dedupe.get("bytes_saved", 0),
             "last_updated": self.index.get("last_updated", "unknown"),
+            "index_backend": self.backend.name,
+            "auto_embed": self.config.get("auto_embed", True),
+            "embed_queue": self.embed_queue.stats(),
             "vault_root": str(VAULT_ROOT)
         }
 
 
+class VaultWatcher:
+    """
+    Keeps the index live while files are edited outside store()/delete().
+    
+    Uses native filesystem events via watchdog (inotify on Linux, FSEvents
+    on macOS) when installed, otherwise polls file mtimes. Change events
+    are debounced per file and applied through reindex_paths() in small
+    batches, so the index, the full-text index and any listeners are
+    updated in one transaction per batch.
+    """
+    
+    def __init__(
+        self,
+        vault: "LocalVault",
+        debounce: float = WATCH_DEBOUNCE,
+        poll_interval: float = WATCH_POLL_INTERVAL,
+        batch_size: int = WATCH_BATCH_SIZE,
+        use_events: bool = True
+    ):
+        self.vault = vault
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.use_events = use_events and HAS_WATCHDOG
+        self._root = str(VAULT_ROOT)
+        self._pending: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+    
+    def mark(self, rel_path: str):
+        """Record a change to a vault-relative path (debounced)."""
+        if rel_path.endswith(SCAN_EXTENSIONS) and _in_scan_scope(rel_path):
+            with self._lock:
+                self._pending[rel_path] = time.monotonic()
+    
+    def touch(self, abs_path: str):
+        """Record a change event for an absolute path."""
+        if abs_path.startswith(self._root + os.sep):
+            self.mark(abs_path[len(self._root) + 1:])
+    
+    def _due(self) -> List[str]:
+        """Pop paths that have been quiet for at least the debounce window."""
+        cutoff = time.monotonic() - self.debounce
+        with self._lock:
+            due = [rel for rel, seen in self._pending.items() if seen <= cutoff]
+            for rel in due:
+                del self._pending[rel]
+        return due
+    
+    def flush(self):
+        """Re-index every due path, batch_size files per transaction."""
+        due = self._due()
+        for i in range(0, len(due), self.batch_size):
+            batch = due[i:i + self.batch_size]
+            result = self.vault.reindex_paths(batch)
+            if result["updated"] or result["removed"]:
+                print(f"🔄 Re-indexed {len(batch)} file(s): "
+                      f"{result['updated']} updated, {result['removed']} removed")
+    
+    def _poll(self, snapshot: Dict[str, Tuple[int, int]]) -> Dict[str, Tuple[int, int]]:
+        """Diff a fresh scan against the previous one."""
+        current = scan_vault_files()
+        for rel, stat in current.items():
+            if snapshot.get(rel) != stat:
+                self.mark(rel)
+        for rel in snapshot.keys() - current.keys():
+            self.mark(rel)
+        return current
+    
+    def run(self):
+        """Watch until stop() or Ctrl+C."""
+        # Catch up on anything that changed while nobody was watching
+        self.vault.rebuild_index()
+        
+        observer, snapshot = None, {}
+        if self.use_events:
+            observer = Observer()
+            observer.schedule(_WatchHandler(self), self._root, recursive=True)
+            observer.start()
+            print(f"👀 Watching {VAULT_ROOT} (native events)")
+        else:
+            snapshot = scan_vault_files()
+            print(f"👀 Watching {VAULT_ROOT} (polling every {self.poll_interval:.0f}s)")
+        
+        next_poll = time.monotonic() + self.poll_interval
+        try:
+            while not self._stop.wait(min(self.debounce, 0.25)):
+                if observer is None and time.monotonic() >= next_poll:
+                    snapshot = self._poll(snapshot)
+                    next_poll = time.monotonic() + self.poll_interval
+                self.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if observer is not None:
+                observer.stop()
+                observer.join()
+        print("👋 Watcher stopped")
+    
+    def stop(self):
+        self._stop.set()
+
+
+if HAS_WATCHDOG:
+    class _WatchHandler(FileSystemEventHandler):
+        """Forwards watchdog file events to a VaultWatcher."""
+        
+        def __init__(self, watcher: VaultWatcher):
+            super().__init__()
+            self.watcher = watcher
+        
+        def on_any_event(self, event):
+            if event.is_directory:
+                return
+            self.watcher.touch(event.src_path)
+            dest = getattr(event, "dest_path", "")
+            if dest:
+                self.watcher.touch(dest)
+
+
 # Convenience functions for quick access
 _vault_instance = None
 
@@ -301,6 +1467,10 @@ def retrieve(doc_id: str) -> Optional[Dict]:
 
 
 if __name__ == "__main__":
+    if "--watch" in sys.argv[1:]:
+        LocalVault().watch(use_events="--poll" not in sys.argv[1:])
+        sys.exit(0)
+    
     # Demo
     vault = LocalVault()
     
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Local Vault Embedding Pipeline – Bulk, Batched, Resumable Indexing
+
+Embeds the whole vault through Ollama's multi-input /api/embed endpoint.
+Documents are streamed in batches, a bounded number of requests run
+concurrently over the shared pooled Ollama client, and finished batches
+are checkpointed so an interrupted run resumes where it stopped.
+
+Features:
+- Batched requests (many texts per HTTP call) over keep-alive connections
+- Bounded concurrency (never more than N batches in flight)
+- Store-aware: items whose stored row matches their version are skipped
+  (without a store, texts already in the embedding cache are not re-sent)
+- Append-only checkpoint per model, removed when a run completes
+- Falls back to one-text /api/embeddings on older Ollama versions (ollama_client)
+
+Author: Diesel-Goose AI
+Version: 1.0 – Batched Embedding
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Tuple
+
+import requests
+
+from ollama_client import get_client
+from vault_embeddings import EmbeddingCache, EMBEDDINGS_DIR, model_slug
+
+EMBED_BATCH_SIZE = 64      # texts per /api/embed request
+EMBED_CONCURRENCY = 4      # requests in flight
+EMBED_TIMEOUT = 120        # seconds per batch request
+CHECKPOINT_NAME = "checkpoint.tsv"
+
+
+class EmbeddingPipeline:
+    """
+    Batch-embed items into the matrix store, or into the float32
+    embedding cache when there is no store (numpy unavailable). Items
+    are dicts with "id", "modified" (version) and "category" – index
+    entries or document chunks.
+    
+    Only the calling thread touches the cache, store and checkpoint;
+    worker threads just perform HTTP requests.
+    """
+    
+    def __init__(
+        self,
+        model: str,
+        text_for: Callable[[Dict], str],
+        cache: Optional[EmbeddingCache] = None,
+        store=None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        checkpoint_dir: Path = EMBEDDINGS_DIR,
+        priority: Optional[str] = None
+    ):
+        self.model = model
+        self.text_for = text_for
+        self.cache = cache or EmbeddingCache()
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.checkpoint_path = checkpoint_dir / model_slug(model) / CHECKPOINT_NAME
+        # Scheduler priority of this pipeline's requests (default: the client's)
+        self.priority = priority
+        self.client = get_client()
+    
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts in one request.
+        
+        Raises:
+            requests.RequestException: Ollama unreachable or returned an error
+        """
+        return self.client.embed(texts, model=self.model, timeout=EMBED_TIMEOUT, priority=self.priority)
+    
+    def _load_checkpoint(self) -> Dict[str, str]:
+        """{doc_id: version} of documents finished by an interrupted run."""
+        done = {}
+        if self.checkpoint_path.exists():
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) == 2:
+                        done[parts[0]] = parts[1]
+        return done
+    
+    def _append_checkpoint(self, docs: List[Dict]):
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.checkpoint_path, 'a', encoding='utf-8') as f:
+            f.writelines(f"{doc['id']}\t{doc['modified']}\n" for doc in docs)
+    
+    def clear_checkpoint(self):
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+    
+    def _batches(self, docs: Iterable[Dict], done: Dict[str, str]) -> Iterator[List[Dict]]:
+        """Group documents that still need a vector into batches."""
+        batch, candidates = [], []
+        
+        def take():
+            # One store lookup per group of candidates, not one per document
+            stored = self.store.versions(doc["id"] for doc in candidates) if self.store is not None else {}
+            batch.extend(doc for doc in candidates if stored.get(doc["id"]) != doc["modified"])
+            candidates.clear()
+        
+        for doc in docs:
+            if done.get(doc["id"]) == doc["modified"]:
+                continue
+            candidates.append(doc)
+            if len(candidates) >= self.batch_size:
+                take()
+            if len(batch) >= self.batch_size:
+                yield batch[:self.batch_size]
+                del batch[:self.batch_size]
+        take()
+        while batch:
+            yield batch[:self.batch_size]
+            del batch[:self.batch_size]
+    
+    def _save(self, docs: List[Dict], texts: List[str], vectors: List[List[float]]):
+        """Persist one finished batch: matrix store (or cache), checkpoint."""
+        if self.store is not None:
+            self.store.upsert_many(
+                (doc["id"], vector, doc["category"], doc["modified"])
+                for doc, vector in zip(docs, vectors)
+                if vector is not None
+            )
+        else:
+            # Cached vectors are re-tagged too: the same text may now belong
+            # to a different id (e.g. a chunk that moved within its document)
+            self.cache.put_many(self.model, [
+                (text, vector, doc["id"]) for doc, text, vector in zip(docs, texts, vectors) if vector is not None
+            ])
+        self._append_checkpoint(docs)
+    
+    def run(
+        self,
+        docs: Iterable[Dict],
+        resume: bool = True,
+        progress: Optional[Callable[[Dict], None]] = None
+    ) -> Dict:
+        """
+        Embed every document that lacks an up-to-date vector.
+        
+        Args:
+            docs: Index entries (e.g. LocalVault.list_all()), consumed lazily
+            resume: Skip documents recorded by an interrupted run
+            progress: Optional callback(stats) after each saved batch
+        
+        Returns:
+            {"embedded", "cached", "failed", "batches", "elapsed", "items_per_sec", "error"}
+        """
+        if not resume:
+            self.clear_checkpoint()
+        done = self._load_checkpoint()
+        stats = {"embedded": 0, "cached": 0, "failed": 0, "batches": 0, "error": None}
+        start = time.time()
+        
+        def prepare(batch: List[Dict]) -> Tuple[List[Dict], List[str], List, List[int]]:
+            texts = [self.text_for(doc) for doc in batch]
+            # With a store the float32 cache is not written, so only the
+            # no-numpy path can find vectors there
+            cached = self.cache.get_many(self.model, texts) if self.store is None else {}
+            vectors = [cached.get(text) for text in texts]
+            missing = [i for i, vector in enumerate(vectors) if vector is None]
+            return batch, texts, vectors, missing
+        
+        def finish(job, result: Optional[List[List[float]]]):
+            batch, texts, vectors, missing = job
+            for i, vector in zip(missing, result or []):
+                vectors[i] = vector if len(vector) else None
+            fresh = [i for i in missing if vectors[i] is not None]
+            self._save(batch, texts, vectors)
+            stats["embedded"] += len(fresh)
+            stats["cached"] += len(batch) - len(missing)
+            stats["failed"] += len(missing) - len(fresh)
+            stats["batches"] += 1
+            if progress:
+                stats["elapsed"] = time.time() - start
+                progress(stats)
+        
+        batches = self._batches(docs, done)
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            in_flight = {}
+            for batch in batches:
+                job = prepare(batch)
+                if not job[3]:
+                    finish(job, [])
+                    continue
+                future = pool.submit(self.embed_batch, [job[1][i] for i in job[3]])
+                in_flight[future] = job
+                if len(in_flight) < self.concurrency:
+                    continue
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    job = in_flight.pop(future)
+                    try:
+                        finish(job, future.result())
+                    except requests.RequestException as e:
+                        stats["error"] = str(e)
+                if stats["error"]:
+                    break
+            
+            for future in list(in_flight):
+                job = in_flight.pop(future)
+                try:
+                    finish(job, future.result())
+                except requests.RequestException as e:
+                    stats["error"] = str(e)
+        
+        # A complete run needs no checkpoint; a failed one keeps it for resume
+        if not stats["error"]:
+            self.clear_checkpoint()
+        stats["elapsed"] = time.time() - start
+        stats["items_per_sec"] = (stats["embedded"] + stats["cached"]) / max(stats["elapsed"], 1e-6)
+        return stats
+    
+    def close(self):
+        """Nothing to release: connections belong to the shared Ollama client."""
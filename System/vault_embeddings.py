@@ -0,0 +1,935 @@
+#!/usr/bin/env python3
+"""
+Local Vault Embeddings – Persistent Embedding Storage
+
+Keeps document embeddings on disk in .vault so they survive between
+processes. Every `dp ask` used to re-embed the whole vault through Ollama;
+with a warm cache only the query needs a round-trip.
+
+Features:
+- Cache keyed by sha256(model, text) – stable across processes; entries
+  tagged with model and dimension
+- LRU eviction by total vector size
+- Per-document invalidation when content changes or is archived
+- Memory-mapped float32 matrix with precomputed norms for vectorized search
+- Optional float16 / int8 (per-vector scale) quantized matrix, scored
+  in blocks without dequantizing the whole store; optional exact float32
+  re-rank of the top candidates from exact.f32 (keep_exact, rerank_hits)
+- Model generations (generations.json): one active embedding model serves
+  searches while a new one is built alongside it
+
+Author: Diesel-Goose AI
+Version: 1.0 – Persistent Embeddings
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+
+from vault_core import VAULT_ROOT
+
+# Optional numpy for the matrix store
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Optional fcntl for the cross-process store lock (POSIX)
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+
+EMBEDDING_CACHE_DB = VAULT_ROOT / ".vault" / "embedding_cache.db"
+EMBEDDINGS_DIR = VAULT_ROOT / ".vault" / "embeddings"
+GENERATIONS_FILE = EMBEDDINGS_DIR / "generations.json"
+COMPACT_RATIO = 0.25  # rewrite the matrix once a quarter of its rows are dead
+EMBEDDING_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB of float32 vectors
+EVICT_BATCH = 256
+LOOKUP_BATCH = 500
+EMBEDDING_DTYPE = "float32"  # matrix storage: "float32", "float16" or "int8"
+SCORE_BLOCK = 16384  # rows dequantized at a time when scoring a quantized matrix
+VECTOR_FILES = {"float32": "vectors.f32", "float16": "vectors.f16", "int8": "vectors.i8"}
+
+
+def embedding_key(model: str, text: str) -> str:
+    """Cache key for an embedding: sha256 over model name and exact text."""
+    return hashlib.sha256(f"{model}\0{text}".encode('utf-8')).hexdigest()
+
+
+def pack_vector(vector: List[float]) -> bytes:
+    """Serialize a vector as float32 bytes."""
+    return array('f', vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    """Deserialize float32 bytes into a list of floats."""
+    values = array('f')
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """
+    Persistent LRU cache of embeddings in .vault/embedding_cache.db.
+    
+    Entries remember which document produced them, so when a document's
+    text changes (or it is archived) its stale vectors are dropped.
+    """
+    
+    def __init__(self, path: Path = EMBEDDING_CACHE_DB, max_bytes: int = EMBEDDING_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                doc_id TEXT,
+                vector BLOB NOT NULL,
+                nbytes INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+            CREATE INDEX IF NOT EXISTS entries_doc ON entries (doc_id);
+        """)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(entries)")}
+        if "dim" not in columns:
+            # Caches created before vectors were tagged with their dimension
+            self.conn.execute("ALTER TABLE entries ADD COLUMN dim INTEGER")
+            self.conn.execute("UPDATE entries SET dim = nbytes / 4")
+        self.conn.commit()
+        self.total_bytes = self.conn.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+    
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached embedding for (model, text), if any."""
+        return self.get_many(model, [text]).get(text)
+    
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """Bulk lookup; returns {text: vector} for the texts that are cached."""
+        by_key = {embedding_key(model, t): t for t in texts}
+        keys = list(by_key)
+        found = {}
+        with self._lock, self.conn:
+            for i in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[i:i + LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                for key, blob in self.conn.execute(
+                    f"SELECT key, vector FROM entries WHERE key IN ({marks})", batch
+                ):
+                    found[by_key[key]] = unpack_vector(blob)
+            if found:
+                now = time.time()
+                self.conn.executemany(
+                    "UPDATE entries SET last_used = ? WHERE key = ?",
+                    [(now, embedding_key(model, t)) for t in found]
+                )
+        return found
+    
+    def get_for_docs(self, model: str, doc_ids: Iterable[str], dim: Optional[int] = None) -> Dict[str, List[float]]:
+        """Bulk lookup by owning document (optionally of one dimension); returns {doc_id: vector}."""
+        doc_ids = list(doc_ids)
+        found = {}
+        with self._lock:
+            for i in range(0, len(doc_ids), LOOKUP_BATCH):
+                batch = doc_ids[i:i + LOOKUP_BATCH]
+                marks = ",".join("?" * len(batch))
+                for doc_id, blob, size in self.conn.execute(
+                    f"SELECT doc_id, vector, dim FROM entries WHERE model = ? AND doc_id IN ({marks})",
+                    [model, *batch]
+                ):
+                    if dim is None or size == dim:
+                        found[doc_id] = unpack_vector(blob)
+        return found
+    
+    def dim(self, model: str) -> Optional[int]:
+        """Dimension of the most recently stored vector of a model."""
+        row = self.conn.execute(
+            "SELECT dim FROM entries WHERE model = ? ORDER BY last_used DESC LIMIT 1", (model,)
+        ).fetchone()
+        return row[0] if row else None
+    
+    def put(self, model: str, text: str, vector: List[float], doc_id: Optional[str] = None):
+        """
+        Store an embedding. With a doc_id, older vectors for that document
+        and model (from previous versions of its text) are dropped.
+        """
+        self.put_many(model, [(text, vector, doc_id)])
+    
+    def put_many(self, model: str, items: Iterable[Tuple[str, List[float], Optional[str]]]):
+        """Store (text, vector, doc_id) items in one transaction."""
+        with self._lock, self.conn:
+            now = time.time()
+            for text, vector, doc_id in items:
+                if not len(vector):
+                    continue
+                key = embedding_key(model, text)
+                blob = pack_vector(vector)
+                if doc_id:
+                    self._invalidate(doc_id, model=model, keep_key=key)
+                old = self.conn.execute("SELECT nbytes FROM entries WHERE key = ?", (key,)).fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, model, doc_id, vector, nbytes, dim, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, model, doc_id, blob, len(blob), len(vector), now)
+                )
+                self.total_bytes += len(blob) - (old[0] if old else 0)
+            self._evict()
+    
+    def _invalidate(self, doc_id: str, model: Optional[str] = None, keep_key: Optional[str] = None):
+        clause, params = "doc_id = ?", [doc_id]
+        if model is not None:
+            clause += " AND model = ?"
+            params.append(model)
+        if keep_key is not None:
+            clause += " AND key != ?"
+            params.append(keep_key)
+        freed = self.conn.execute(
+            f"SELECT COALESCE(SUM(nbytes), 0) FROM entries WHERE {clause}", params
+        ).fetchone()[0]
+        if freed:
+            self.conn.execute(f"DELETE FROM entries WHERE {clause}", params)
+            self.total_bytes -= freed
+    
+    def invalidate_doc(self, doc_id: str, model: Optional[str] = None, keep_key: Optional[str] = None):
+        """Drop a document's vectors (optionally keeping the current one)."""
+        with self._lock, self.conn:
+            self._invalidate(doc_id, model=model, keep_key=keep_key)
+    
+    def _evict(self):
+        """Drop least-recently-used entries until under max_bytes."""
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, nbytes FROM entries ORDER BY last_used LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                self.total_bytes = 0
+                return
+            victims, freed = [], 0
+            for key, nbytes in rows:
+                victims.append((key,))
+                freed += nbytes
+                if self.total_bytes - freed <= self.max_bytes:
+                    break
+            self.conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+            self.total_bytes -= freed
+    
+    def stats(self) -> Dict:
+        """Entry count and size."""
+        count = self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {"entries": count, "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+    
+    def close(self):
+        self.conn.close()
+
+
+class EmbeddingGenerations:
+    """
+    Which embedding model serves searches, in .vault/embeddings/generations.json.
+    
+    Each generation records its model, vector dimension and status:
+    "active" (exactly one), "building" (being re-embedded alongside the
+    active one) or "retired" (kept on disk, can be re-activated). Vectors
+    of different generations are never compared with each other.
+    """
+    
+    def __init__(self, path: Path = GENERATIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.data: Dict = {"active": None, "generations": {}}
+        self._reload()
+    
+    def _reload(self):
+        """Re-read the file if another process changed it."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.data = json.load(f)
+            self._mtime = mtime
+    
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, self.path)
+        self._mtime = self.path.stat().st_mtime_ns
+    
+    def active(self) -> Optional[str]:
+        """Model of the active generation (None before the first one)."""
+        self._reload()
+        return self.data.get("active")
+    
+    def get(self, model: str) -> Optional[Dict]:
+        self._reload()
+        return self.data["generations"].get(model)
+    
+    def list(self) -> List[Dict]:
+        self._reload()
+        return list(self.data["generations"].values())
+    
+    def _set(self, model: str, **fields):
+        generation = self.data["generations"].setdefault(model, {"model": model, "dim": None, "created": time.time()})
+        generation.update({key: value for key, value in fields.items() if value is not None})
+    
+    def ensure_active(self, model: str, dim: Optional[int] = None) -> str:
+        """Make model the first active generation if there is none; returns the active model."""
+        with self._lock:
+            self._reload()
+            if not self.data.get("active"):
+                self._set(model, status="active", dim=dim, activated=time.time())
+                self.data["active"] = model
+                self._save()
+            return self.data["active"]
+    
+    def record_dim(self, model: str, dim: int):
+        with self._lock:
+            self._reload()
+            generation = self.data["generations"].get(model)
+            if generation is not None and generation.get("dim") != dim:
+                generation["dim"] = dim
+                self._save()
+    
+    def begin(self, model: str):
+        """Register a generation being built (no-op for the active one)."""
+        with self._lock:
+            self._reload()
+            if self.data.get("active") != model:
+                self._set(model, status="building")
+                self._save()
+    
+    def activate(self, model: str, dim: Optional[int] = None):
+        """Switch searches to model; the previous active generation is retired."""
+        with self._lock:
+            self._reload()
+            previous = self.data.get("active")
+            if previous and previous != model:
+                self._set(previous, status="retired")
+            self._set(model, status="active", dim=dim, activated=time.time())
+            self.data["active"] = model
+            self._save()
+
+
+def model_slug(model: str) -> str:
+    """Filesystem-safe directory name for a model."""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in model)
+
+
+def quantize(block: "np.ndarray", dtype: str) -> Tuple["np.ndarray", Optional["np.ndarray"]]:
+    """
+    Convert float32 rows to the storage dtype.
+    
+    Returns:
+        (stored rows, per-row float32 scales or None); int8 rows are
+        round(x / scale) with scale = max|x| / 127
+    """
+    if dtype == "int8":
+        scales = (np.abs(block).max(axis=1) / 127.0).astype(np.float32)
+        safe = np.where(scales > 0, scales, 1.0)[:, None]
+        return np.clip(np.rint(block / safe), -127, 127).astype(np.int8), scales
+    return block.astype(np.dtype(dtype)), None
+
+
+def rerank_hits(
+    query_vector: List[float],
+    hits: List[Tuple[str, float]],
+    exact: Dict[str, List[float]],
+    top_k: int
+) -> List[Tuple[str, float]]:
+    """
+    Re-score (id, similarity) hits with exact float32 vectors.
+    
+    Hits without an exact vector keep their approximate score.
+    """
+    query = np.asarray(query_vector, dtype=np.float32)
+    q_norm = float(np.linalg.norm(query))
+    rescored = []
+    for hit_id, score in hits:
+        vector = exact.get(hit_id)
+        if vector is not None and q_norm and len(vector) == len(query):
+            vector = np.asarray(vector, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            if norm:
+                score = float(vector @ query) / (norm * q_norm)
+        rescored.append((hit_id, score))
+    rescored.sort(key=lambda hit: hit[1], reverse=True)
+    return rescored[:top_k]
+
+
+class EmbeddingStore:
+    """
+    Document embeddings as one contiguous matrix (requires numpy).
+    
+    Layout in .vault/embeddings/<model>/:
+        vectors.f32     N x D rows, memory-mapped read-only (vectors.f16 /
+                        vectors.i8 when stored as float16 / int8)
+        scales.f32      N float32 per-row scales (int8 only)
+        exact.f32       N x D float32 rows kept next to a quantized matrix
+                        for re-ranking (keep_exact only; costs the full
+                        float32 size again on disk)
+        norms.f32       N float32 norms of the stored (dequantized) rows
+        categories.i32  N int32 category codes
+        alive.u8        N live flags (0 = tombstoned)
+        rows.db         SQLite: row -> doc_id, category, version; dim,
+                        dtype and epoch
+        store.lock      flock: writers exclusive, searches shared
+    
+    Several processes may write the same store (embed-worker next to
+    `dp ask`): every write takes the lock and reloads the row count from
+    rows.db before appending, and readers reload when another process
+    has committed (PRAGMA data_version).
+    
+    Replaced or deleted rows are tombstoned (one row updated, one byte
+    flipped) and the files are compacted once enough of them pile up, so
+    an insert costs only its own rows: file appends plus row inserts.
+    Scoring is a single matrix-vector product with argpartition top-k
+    (blockwise for quantized matrices, so only SCORE_BLOCK rows are
+    widened at a time).
+    """
+    
+    def __init__(
+        self,
+        model: str,
+        root: Path = EMBEDDINGS_DIR,
+        dtype: str = EMBEDDING_DTYPE,
+        keep_exact: bool = False
+    ):
+        if not HAS_NUMPY:
+            raise RuntimeError("EmbeddingStore requires numpy")
+        if dtype not in VECTOR_FILES:
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.model = model
+        self.dir = root / model_slug(model)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.norms_path = self.dir / "norms.f32"
+        self.scales_path = self.dir / "scales.f32"
+        self.exact_path = self.dir / "exact.f32"
+        self.codes_path = self.dir / "categories.i32"
+        self.alive_path = self.dir / "alive.u8"
+        self.meta_path = self.dir / "rows.json"  # pre-SQLite layout, imported once
+        self.lock_path = self.dir / "store.lock"
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._data_version = None
+        self.conn = sqlite3.connect(str(self.dir / "rows.db"), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                doc_id TEXT,
+                category TEXT NOT NULL,
+                version TEXT
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS rows_doc ON rows (doc_id);
+            CREATE TABLE IF NOT EXISTS categories (
+                name TEXT PRIMARY KEY,
+                code INTEGER NOT NULL
+            );
+        """)
+        self.conn.commit()
+        with self.locked():
+            if self.meta_path.exists():
+                self._import_json()
+            self._load_meta()
+            if self.dtype != dtype:
+                if not self.quantized:
+                    # Set first, so the float32 matrix is kept as exact.f32
+                    self.set_keep_exact(keep_exact)
+                self.convert(dtype)
+            self.set_keep_exact(keep_exact)
+    
+    @property
+    def vectors_path(self) -> Path:
+        return self.dir / VECTOR_FILES[self.dtype]
+    
+    @property
+    def quantized(self) -> bool:
+        return self.dtype != "float32"
+    
+    @property
+    def has_exact(self) -> bool:
+        """True when exact.f32 holds float32 rows next to the quantized matrix."""
+        return self.quantized and self.keep_exact
+    
+    def _import_json(self):
+        """Move rows.json (one JSON document rewritten per insert) into rows.db."""
+        with open(self.meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        rows = meta.get("rows", [])
+        categories: Dict[str, int] = {}
+        codes = np.array([categories.setdefault(r[1], len(categories)) for r in rows], dtype=np.int32)
+        alive = np.array([r[0] is not None for r in rows], dtype=np.uint8)
+        with self.conn:
+            self.conn.execute("DELETE FROM rows")
+            self.conn.execute("DELETE FROM categories")
+            self.conn.executemany(
+                "INSERT INTO rows (row, doc_id, category, version) VALUES (?, ?, ?, ?)",
+                [(i, *r) for i, r in enumerate(rows)]
+            )
+            self.conn.executemany("INSERT INTO categories (name, code) VALUES (?, ?)", categories.items())
+            self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", [
+                ("dim", str(meta.get("dim", 0))),
+                ("dtype", meta.get("dtype", "float32")),
+                ("epoch", str(meta.get("epoch", 0)))
+            ])
+        codes.tofile(self.codes_path)
+        alive.tofile(self.alive_path)
+        self.meta_path.unlink()
+    
+    def _load_meta(self):
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+        self.dim = int(meta.get("dim", 0))
+        self.dtype = meta.get("dtype", "float32")
+        self.keep_exact = meta.get("exact", "0") == "1"
+        # Bumped whenever row positions change (compact/clear) so row-aligned
+        # side structures such as the ANN index know to rebuild
+        self.epoch = int(meta.get("epoch", 0))
+        self.n_rows = self.conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+        self.live = self.conn.execute("SELECT COUNT(doc_id) FROM rows").fetchone()[0]
+        self.categories: Dict[str, int] = dict(self.conn.execute("SELECT name, code FROM categories"))
+        self._data_version = self._current_version()
+        self._matrix = None
+        self._scales = None
+        self._exact = None
+    
+    def _current_version(self) -> int:
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def refresh(self) -> bool:
+        """Reload row metadata if another process committed since; returns True if it did."""
+        with self._lock:
+            if self._current_version() == self._data_version:
+                return False
+            self._load_meta()
+            return True
+    
+    @contextmanager
+    def locked(self, shared: bool = False):
+        """
+        Hold the store lock (across processes where fcntl exists) with
+        fresh row metadata. Re-entrant; nested calls keep the outer mode.
+        """
+        with self._lock:
+            if self._lock_depth or not HAS_FCNTL:
+                self._lock_depth += 1
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                return
+            with open(self.lock_path, 'a') as f:
+                fcntl.flock(f, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                self._lock_depth += 1
+                try:
+                    self.refresh()
+                    yield
+                finally:
+                    self._lock_depth -= 1
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    
+    def _set_meta(self, **values):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [(key, str(value)) for key, value in values.items()]
+        )
+    
+    def _row_files(self) -> List[Tuple[Path, int]]:
+        """(path, bytes per row) of every row-aligned file."""
+        files = [
+            (self.vectors_path, self.dim * np.dtype(self.dtype).itemsize),
+            (self.norms_path, 4),
+            (self.codes_path, 4),
+            (self.alive_path, 1)
+        ]
+        if self.dtype == "int8":
+            files.append((self.scales_path, 4))
+        if self.has_exact:
+            files.append((self.exact_path, self.dim * 4))
+        return files
+    
+    def _trim(self):
+        """Cut bytes appended by a write that never committed its rows."""
+        for path, width in self._row_files():
+            if path.exists() and path.stat().st_size > self.n_rows * width:
+                os.truncate(path, self.n_rows * width)
+    
+    def _category_code(self, category: str) -> int:
+        code = self.categories.get(category)
+        if code is None:
+            code = len(self.categories)
+            self.conn.execute("INSERT INTO categories (name, code) VALUES (?, ?)", (category, code))
+            self.categories[category] = code
+        return code
+    
+    def _tombstone(self, rows: List[int]):
+        """Clear the live flags of committed dead rows."""
+        if not rows:
+            return
+        with open(self.alive_path, 'r+b') as f:
+            for row in sorted(rows):
+                f.seek(row)
+                f.write(b"\0")
+    
+    def _rows_of(self, doc_ids: List[str]) -> List[int]:
+        rows = []
+        for i in range(0, len(doc_ids), LOOKUP_BATCH):
+            batch = doc_ids[i:i + LOOKUP_BATCH]
+            rows.extend(r for (r,) in self.conn.execute(
+                f"SELECT row FROM rows WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return rows
+    
+    def arrays(self):
+        """
+        Memory-map vectors and load norms/category codes/live flags (cached
+        until the next write, here or in another process). Vectors are in
+        the storage dtype; use decode() for float32 rows.
+        """
+        self.refresh()
+        if self._matrix is None:
+            n = self.n_rows
+            if n == 0 or self.dim == 0:
+                vectors = np.zeros((0, max(self.dim, 1)), dtype=np.dtype(self.dtype))
+                norms = np.zeros(0, dtype=np.float32)
+                codes = np.zeros(0, dtype=np.int32)
+                alive = np.zeros(0, dtype=bool)
+                self._scales = np.zeros(0, dtype=np.float32)
+                self._exact = None
+            else:
+                vectors = np.memmap(self.vectors_path, dtype=np.dtype(self.dtype), mode='r', shape=(n, self.dim))
+                norms = np.fromfile(self.norms_path, dtype=np.float32, count=n)
+                codes = np.fromfile(self.codes_path, dtype=np.int32, count=n)
+                alive = np.fromfile(self.alive_path, dtype=np.uint8, count=n).astype(bool)
+                if self.dtype == "int8":
+                    self._scales = np.fromfile(self.scales_path, dtype=np.float32, count=n)
+                self._exact = None
+                if self.has_exact:
+                    self._exact = np.memmap(self.exact_path, dtype=np.float32, mode='r', shape=(n, self.dim))
+            self._matrix = (vectors, norms, codes, alive, dict(self.categories))
+        return self._matrix
+    
+    def decode(self, rows) -> "np.ndarray":
+        """Float32 copies of the given rows (an index array or a slice)."""
+        vectors = self.arrays()[0]
+        block = np.asarray(vectors[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            block *= self._scales[rows][..., None]
+        return block
+    
+    def exact_vectors(self, doc_ids: Iterable[str]) -> Dict[str, "np.ndarray"]:
+        """
+        {doc_id: float32 vector} from exact.f32 for re-ranking (empty
+        unless the store keeps exact rows).
+        """
+        doc_ids = list(doc_ids)
+        with self.locked(shared=True):
+            self.arrays()
+            if self._exact is None:
+                return {}
+            rows = {}
+            for i in range(0, len(doc_ids), LOOKUP_BATCH):
+                batch = doc_ids[i:i + LOOKUP_BATCH]
+                rows.update(self.conn.execute(
+                    f"SELECT doc_id, row FROM rows WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+                ))
+            return {doc_id: np.array(self._exact[row]) for doc_id, row in rows.items()}
+    
+    def dot(self, query: "np.ndarray", rows=None) -> "np.ndarray":
+        """
+        Raw dot products of a float32 query with the given rows (all rows
+        by default), widening at most SCORE_BLOCK rows at a time.
+        """
+        vectors = self.arrays()[0]
+        if not self.quantized:
+            return np.asarray(vectors if rows is None else vectors[rows]) @ query
+        count = len(vectors) if rows is None else len(rows)
+        out = np.empty(count, dtype=np.float32)
+        for start in range(0, count, SCORE_BLOCK):
+            part = slice(start, start + SCORE_BLOCK) if rows is None else rows[start:start + SCORE_BLOCK]
+            out[start:start + SCORE_BLOCK] = np.asarray(vectors[part], dtype=np.float32) @ query
+        if self.dtype == "int8":
+            out *= self._scales if rows is None else self._scales[rows]
+        return out
+    
+    def version(self, doc_id: str) -> Optional[str]:
+        """Document version (its 'modified' stamp) the stored row was built from."""
+        row = self.conn.execute("SELECT version FROM rows WHERE doc_id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+    
+    def versions(self, doc_ids: Iterable[str]) -> Dict[str, str]:
+        """{doc_id: version} for the given ids that have a live row."""
+        doc_ids = list(doc_ids)
+        found = {}
+        for i in range(0, len(doc_ids), LOOKUP_BATCH):
+            batch = doc_ids[i:i + LOOKUP_BATCH]
+            found.update(self.conn.execute(
+                f"SELECT doc_id, version FROM rows WHERE doc_id IN ({','.join('?' * len(batch))})", batch
+            ))
+        return found
+    
+    def doc_ids(self) -> List[str]:
+        return [doc_id for (doc_id,) in self.conn.execute("SELECT doc_id FROM rows WHERE doc_id IS NOT NULL")]
+    
+    def doc_for(self, rows: Iterable[int]) -> List[Optional[str]]:
+        """doc_id of each row (None for a dead row)."""
+        rows = [int(r) for r in rows]
+        found = {}
+        for i in range(0, len(rows), LOOKUP_BATCH):
+            batch = rows[i:i + LOOKUP_BATCH]
+            found.update(self.conn.execute(
+                f"SELECT row, doc_id FROM rows WHERE row IN ({','.join('?' * len(batch))})", batch
+            ))
+        return [found.get(r) for r in rows]
+    
+    def upsert_many(self, items: Iterable[Tuple[str, List[float], str, str]]):
+        """
+        Append rows for (doc_id, vector, category, version) items,
+        tombstoning any previous row of the same document.
+        """
+        # Last occurrence wins when a batch repeats a document
+        items = list({item[0]: item for item in items if len(item[1])}.values())
+        if not items:
+            return
+        with self.locked():
+            dim = len(items[0][1])
+            if self.dim and dim != self.dim:
+                # Model output size changed: old rows are unusable
+                self.clear()
+            self._trim()
+            block = np.asarray([item[1] for item in items], dtype=np.float32)
+            stored, scales = quantize(block, self.dtype)
+            # Norms of what is actually stored, so cosine scores stay consistent
+            decoded = stored.astype(np.float32) * (scales[:, None] if scales is not None else 1.0)
+            norms = np.linalg.norm(decoded, axis=1).astype(np.float32)
+            start = self.n_rows
+            with self.conn:
+                codes = np.array([self._category_code(item[2]) for item in items], dtype=np.int32)
+                with open(self.vectors_path, 'ab') as f:
+                    f.write(stored.tobytes())
+                with open(self.norms_path, 'ab') as f:
+                    f.write(norms.tobytes())
+                if scales is not None:
+                    with open(self.scales_path, 'ab') as f:
+                        f.write(scales.tobytes())
+                if self.has_exact:
+                    with open(self.exact_path, 'ab') as f:
+                        f.write(block.tobytes())
+                with open(self.codes_path, 'ab') as f:
+                    f.write(codes.tobytes())
+                with open(self.alive_path, 'ab') as f:
+                    f.write(b"\1" * len(items))
+                old = self._rows_of([item[0] for item in items])
+                self.conn.executemany("UPDATE rows SET doc_id = NULL WHERE row = ?", [(r,) for r in old])
+                self.conn.executemany(
+                    "INSERT INTO rows (row, doc_id, category, version) VALUES (?, ?, ?, ?)",
+                    [(start + i, doc_id, category, version) for i, (doc_id, _, category, version) in enumerate(items)]
+                )
+                if self.dim != dim:
+                    self._set_meta(dim=dim, dtype=self.dtype)
+            self.dim = dim
+            self.n_rows += len(items)
+            self.live += len(items) - len(old)
+            self._tombstone(old)
+            self._matrix = None
+            self._maybe_compact()
+    
+    def remove_many(self, doc_ids: Iterable[str]):
+        """Tombstone the rows of the given documents."""
+        with self.locked():
+            with self.conn:
+                rows = self._rows_of(list(doc_ids))
+                self.conn.executemany("UPDATE rows SET doc_id = NULL WHERE row = ?", [(r,) for r in rows])
+            if rows:
+                self.live -= len(rows)
+                self._tombstone(rows)
+                self._matrix = None
+                self._maybe_compact()
+    
+    def _maybe_compact(self):
+        dead = self.n_rows - self.live
+        if self.n_rows and dead / self.n_rows > COMPACT_RATIO:
+            self.compact()
+    
+    def compact(self):
+        """Rewrite the files and row numbers without dead rows."""
+        with self.locked():
+            vectors, norms, codes, _, _ = self.arrays()
+            live = self.conn.execute(
+                "SELECT row, doc_id, category, version FROM rows WHERE doc_id IS NOT NULL ORDER BY row"
+            ).fetchall()
+            keep = np.array([r[0] for r in live], dtype=np.int64)
+            files = [(self.vectors_path, vectors), (self.norms_path, norms), (self.codes_path, codes)]
+            if self.dtype == "int8":
+                files.append((self.scales_path, self._scales))
+            if self._exact is not None:
+                files.append((self.exact_path, self._exact))
+            for path, data in files:
+                np.ascontiguousarray(data[keep]).tofile(path.with_suffix(".tmp"))
+            np.ones(len(keep), dtype=np.uint8).tofile(self.alive_path.with_suffix(".tmp"))
+            files.append((self.alive_path, None))
+            self._matrix = None
+            with self.conn:
+                self.conn.execute("DELETE FROM rows")
+                self.conn.executemany(
+                    "INSERT INTO rows (row, doc_id, category, version) VALUES (?, ?, ?, ?)",
+                    [(i, *r[1:]) for i, r in enumerate(live)]
+                )
+                self.epoch += 1
+                self._set_meta(epoch=self.epoch)
+                for path, _ in files:
+                    os.replace(path.with_suffix(".tmp"), path)
+            self.n_rows = self.live = len(live)
+    
+    def clear(self):
+        """Drop every row."""
+        with self.locked():
+            for path, _ in self._row_files():
+                if path.exists():
+                    path.unlink()
+            for path in (self.scales_path, self.exact_path):
+                if path.exists():
+                    path.unlink()
+            with self.conn:
+                self.conn.execute("DELETE FROM rows")
+                self.conn.execute("DELETE FROM categories")
+                self.epoch += 1
+                self._set_meta(dim=0, epoch=self.epoch)
+            self.dim = self.n_rows = self.live = 0
+            self.categories = {}
+            self._matrix = None
+    
+    def convert(self, dtype: str):
+        """Re-store every row in another dtype (e.g. after config "embedding_dtype" changed)."""
+        with self.locked():
+            old_path = self.vectors_path
+            was_quantized = self.quantized
+            stored, scales, norms = [], [], []
+            for start in range(0, self.n_rows if self.dim else 0, SCORE_BLOCK):
+                rows = slice(start, start + SCORE_BLOCK)
+                # Re-quantize from exact rows when the store has them
+                self.arrays()
+                source = np.array(self._exact[rows]) if self._exact is not None else self.decode(rows)
+                block, block_scales = quantize(source, dtype)
+                decoded = block.astype(np.float32) * (block_scales[:, None] if block_scales is not None else 1.0)
+                stored.append(block)
+                norms.append(np.linalg.norm(decoded, axis=1).astype(np.float32))
+                if block_scales is not None:
+                    scales.append(block_scales)
+            self._matrix = None
+            self.dtype = dtype
+            if stored:
+                for path, parts in ((self.vectors_path, stored), (self.norms_path, norms), (self.scales_path, scales)):
+                    if parts:
+                        np.concatenate(parts).tofile(path.with_suffix(".tmp"))
+                        os.replace(path.with_suffix(".tmp"), path)
+            if old_path != self.vectors_path and old_path.exists():
+                if not was_quantized and self.has_exact:
+                    # The float32 matrix becomes the exact copy as it is
+                    os.replace(old_path, self.exact_path)
+                else:
+                    old_path.unlink()
+            if dtype != "int8" and self.scales_path.exists():
+                self.scales_path.unlink()
+            if not self.quantized and self.exact_path.exists():
+                self.exact_path.unlink()
+            with self.conn:
+                self._set_meta(dtype=dtype)
+    
+    def set_keep_exact(self, keep: bool):
+        """
+        Start or stop keeping float32 rows (exact.f32) next to a quantized
+        matrix. Rows stored before keeping started only have their
+        quantized values, so their dequantized rows are written instead;
+        `--reindex --restart` re-embeds them exactly.
+        """
+        if keep == self.keep_exact:
+            return
+        with self.locked():
+            if keep and self.quantized and self.dim:
+                with open(self.exact_path.with_suffix(".tmp"), 'wb') as f:
+                    for start in range(0, self.n_rows, SCORE_BLOCK):
+                        f.write(self.decode(slice(start, start + SCORE_BLOCK)).tobytes())
+                os.replace(self.exact_path.with_suffix(".tmp"), self.exact_path)
+            elif not keep and self.exact_path.exists():
+                self.exact_path.unlink()
+            with self.conn:
+                self._set_meta(exact=int(keep))
+            self.keep_exact = keep
+            self._matrix = None
+    
+    def nbytes(self) -> int:
+        """Size of the row files on disk (exact.f32 included when kept)."""
+        return sum(p.stat().st_size for p, _ in self._row_files() if p.exists())
+    
+    def disk_usage(self) -> Dict[str, int]:
+        """Bytes on disk of every file in the store directory (rows.db and its WAL included)."""
+        return {p.name: p.stat().st_size for p in sorted(self.dir.iterdir()) if p.is_file()}
+    
+    def search(
+        self,
+        query_vector: List[float],
+        top_k: int = 5,
+        category: str = ""
+    ) -> List[Tuple[str, float]]:
+        """
+        Cosine similarity of the query against every live row.
+        
+        Returns:
+            List of (doc_id, similarity), best first
+        """
+        with self.locked(shared=True):
+            return self._search(query_vector, top_k, category)
+    
+    def _search(self, query_vector: List[float], top_k: int, category: str) -> List[Tuple[str, float]]:
+        vectors, norms, codes, alive, categories = self.arrays()
+        if len(alive) == 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        if query.shape[0] != vectors.shape[1]:
+            return []
+        q_norm = float(np.linalg.norm(query))
+        if q_norm == 0:
+            return []
+        
+        mask = alive & (norms > 0)
+        if category:
+            if category not in categories:
+                return []
+            mask &= codes == categories[category]
+        
+        scores = self.dot(query)
+        scores /= np.where(norms > 0, norms, 1.0) * q_norm
+        scores[~mask] = -np.inf
+        
+        k = min(top_k, int(mask.sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(doc_id, float(scores[i])) for i, doc_id in zip(top, self.doc_for(top)) if doc_id is not None]
+    
+    def close(self):
+        self.conn.close()
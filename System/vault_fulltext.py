@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Local Vault Full-Text Index – BM25 Ranking Over Document Bodies
+
+Persistent inverted index stored in .vault/fulltext.db (SQLite, WAL).
+Postings are maintained incrementally: storing a document replaces only
+that document's postings, deleting it drops them.
+
+Features:
+- Tokenized postings lists (term -> doc_id, term frequency)
+- Okapi BM25 scoring with running corpus statistics
+- Optional candidate filtering (category/tag/keyword pre-filters)
+- Query-term snippets for result display
+
+Author: Diesel-Goose AI
+Version: 1.0 – Full-Text Search
+"""
+
+import re
+import sqlite3
+import threading
+import heapq
+import math
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+
+# BM25 parameters (standard Okapi defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms in more than this fraction of documents only score documents
+# already matched by rarer query terms (point lookups, not a full scan)
+# once those rarer terms have settled the top k (MaxScore bound)
+COMMON_TERM_RATIO = 0.1
+LOOKUP_BATCH = 500
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
+    "has", "have", "in", "into", "is", "it", "its", "of", "on", "or", "so",
+    "that", "the", "their", "then", "there", "these", "this", "to", "was",
+    "were", "will", "with",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and 1-char tokens."""
+    return [t for t in TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def make_snippet(text: str, query: str, width: int = 160) -> str:
+    """Return a window of text around the first query term found."""
+    lowered = text.lower()
+    hit = -1
+    for term in tokenize(query):
+        pos = lowered.find(term)
+        if pos != -1 and (hit == -1 or pos < hit):
+            hit = pos
+    if hit == -1:
+        hit = 0
+    start = max(0, hit - width // 3)
+    end = min(len(text), start + width)
+    snippet = " ".join(text[start:end].split())
+    return ("…" if start > 0 else "") + snippet + ("…" if end < len(text) else "")
+
+
+class FullTextIndex:
+    """
+    Persistent BM25 inverted index.
+    
+    Corpus totals (document count and summed length) are kept in a meta
+    table and updated with each change, so a query only reads the
+    postings of its own terms. Query terms are processed rarest first;
+    very common terms are only looked up for documents that already
+    matched, which keeps latency low on large vaults.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            CREATE TABLE IF NOT EXISTS doc_lengths (
+                doc_id TEXT PRIMARY KEY,
+                length INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('doc_count', 0), ('total_length', 0);
+        """)
+        self.conn.commit()
+    
+    def _bump(self, doc_delta: int, length_delta: int):
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'doc_count'", (doc_delta,))
+        self.conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_length'", (length_delta,))
+    
+    def _remove(self, doc_id: str):
+        row = self.conn.execute("SELECT length FROM doc_lengths WHERE doc_id = ?", (doc_id,)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM doc_lengths WHERE doc_id = ?", (doc_id,))
+        self._bump(-1, -row[0])
+    
+    def add_many(self, documents: Iterable[Tuple[str, str]]):
+        """Index (doc_id, text) pairs in one transaction, replacing old postings."""
+        with self._lock, self.conn:
+            for doc_id, text in documents:
+                self._remove(doc_id)
+                tokens = tokenize(text)
+                counts: Dict[str, int] = {}
+                for token in tokens:
+                    counts[token] = counts.get(token, 0) + 1
+                self.conn.executemany(
+                    "INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                    [(term, doc_id, tf) for term, tf in counts.items()]
+                )
+                self.conn.execute(
+                    "INSERT INTO doc_lengths (doc_id, length) VALUES (?, ?)", (doc_id, len(tokens))
+                )
+                self._bump(1, len(tokens))
+    
+    def add(self, doc_id: str, text: str):
+        """Index (or re-index) one document."""
+        self.add_many([(doc_id, text)])
+    
+    def remove_many(self, doc_ids: Iterable[str]):
+        """Drop documents from the index."""
+        with self._lock, self.conn:
+            for doc_id in doc_ids:
+                self._remove(doc_id)
+    
+    def remove(self, doc_id: str):
+        self.remove_many([doc_id])
+    
+    def clear(self):
+        """Drop every posting (used before a full rebuild)."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM doc_lengths")
+            self.conn.execute("UPDATE meta SET value = 0")
+    
+    def doc_count(self) -> int:
+        return self.conn.execute("SELECT value FROM meta WHERE key = 'doc_count'").fetchone()[0]
+    
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        candidates: Optional[set] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank documents against a query with BM25.
+        
+        Args:
+            query: Free-text query
+            top_k: Number of results
+            candidates: Optional set of allowed doc ids (pre-filter)
+        
+        Returns:
+            List of (doc_id, score), best first
+        """
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+        
+        with self._lock:
+            meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+            n_docs = meta.get("doc_count", 0)
+            if n_docs <= 0:
+                return []
+            avgdl = meta.get("total_length", 0) / n_docs or 1.0
+            
+            doc_freqs = sorted(
+                (self.conn.execute(
+                    "SELECT COUNT(*) FROM postings WHERE term = ?", (term,)
+                ).fetchone()[0], term)
+                for term in terms
+            )
+            
+            idfs = [
+                (math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) if df else 0.0, df, term)
+                for df, term in doc_freqs
+            ]
+            # Most a term can add to any document (tf -> infinity)
+            remaining = sum(idf * (BM25_K1 + 1) for idf, _, _ in idfs)
+            
+            scores: Dict[str, float] = {}
+            for idf, df, term in idfs:
+                bound, remaining = remaining, remaining - idf * (BM25_K1 + 1)
+                if df == 0:
+                    continue
+                # MaxScore pruning: once the k-th best score already reaches
+                # what this and all later terms could give an unseen document,
+                # no new document can enter the top k – only the documents
+                # scored so far need this common term's postings
+                if (df > COMMON_TERM_RATIO * n_docs and len(scores) >= top_k and len(scores) < df
+                        and heapq.nlargest(top_k, scores.values())[-1] >= bound):
+                    rows = self._postings_for(term, list(scores))
+                else:
+                    rows = self.conn.execute(
+                        "SELECT p.doc_id, p.tf, d.length FROM postings p "
+                        "JOIN doc_lengths d ON d.doc_id = p.doc_id WHERE p.term = ?",
+                        (term,)
+                    ).fetchall()
+                for doc_id, tf, length in rows:
+                    if candidates is not None and doc_id not in candidates:
+                        continue
+                    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        
+        return heapq.nlargest(top_k, scores.items(), key=lambda x: x[1])
+    
+    def _postings_for(self, term: str, doc_ids: List[str]) -> List[Tuple[str, int, int]]:
+        """Postings of one term restricted to the given documents."""
+        rows = []
+        for i in range(0, len(doc_ids), LOOKUP_BATCH):
+            batch = doc_ids[i:i + LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+            rows.extend(self.conn.execute(
+                "SELECT p.doc_id, p.tf, d.length FROM postings p "
+                "JOIN doc_lengths d ON d.doc_id = p.doc_id "
+                f"WHERE p.term = ? AND p.doc_id IN ({marks})",
+                (term, *batch)
+            ))
+        return rows
+    
+    def close(self):
+        self.conn.close()
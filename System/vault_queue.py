@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Local Vault Embed Queue – Persistent Embed-on-Store Queue
+
+When config "auto_embed" is on, every index change is recorded in
+.vault/embed_queue.db. A background worker (vault_cli.py embed-worker)
+drains it in batches into the embedding store, so the first search after
+a store no longer pays for embedding.
+
+Features:
+- One row per document (re-storing before it is embedded just updates it)
+- Deletes are queued too, so archived documents leave the embedding store
+- Safe acknowledgement: a document re-queued mid-batch stays queued
+- Queue depth and embedding lag (age of the oldest pending change)
+
+Author: Diesel-Goose AI
+Version: 1.0 – Embed Queue
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Tuple
+
+
+class EmbedQueue:
+    """
+    Persistent FIFO of pending document changes (SQLite, WAL).
+    
+    Each row holds the document's index entry (or NULL for a delete) so
+    the worker does not need an up-to-date copy of the index.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS queue (
+                doc_id TEXT PRIMARY KEY,
+                entry TEXT,
+                seq INTEGER NOT NULL,
+                enqueued_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS queue_seq ON queue (seq);
+        """)
+        self.conn.commit()
+    
+    def _next_seq(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM queue").fetchone()[0]
+    
+    def push(self, upserts: Iterable[Dict] = (), deletes: Iterable[str] = ()):
+        """Queue changed entries and deleted ids (one transaction)."""
+        now = time.time()
+        with self._lock, self.conn:
+            seq = self._next_seq()
+            rows = [(doc["id"], json.dumps(doc), now) for doc in upserts]
+            rows += [(doc_id, None, now) for doc_id in deletes]
+            # Keep the original enqueue time for documents already waiting,
+            # so lag reflects the oldest unembedded change
+            self.conn.executemany(
+                "INSERT INTO queue (doc_id, entry, seq, enqueued_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(doc_id) DO UPDATE SET entry = excluded.entry, seq = excluded.seq",
+                [(doc_id, entry, seq + i, at) for i, (doc_id, entry, at) in enumerate(rows)]
+            )
+    
+    def peek(self, limit: int) -> List[Tuple[str, Optional[Dict], int]]:
+        """Oldest pending changes: (doc_id, entry or None for delete, seq)."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT doc_id, entry, seq FROM queue ORDER BY seq LIMIT ?", (limit,)
+            ).fetchall()
+        return [(doc_id, json.loads(entry) if entry else None, seq) for doc_id, entry, seq in rows]
+    
+    def ack(self, items: Iterable[Tuple[str, int]]):
+        """Remove processed (doc_id, seq) rows unless they were re-queued since."""
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM queue WHERE doc_id = ? AND seq = ?", list(items))
+    
+    def depth(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM queue").fetchone()[0]
+    
+    def lag(self) -> float:
+        """Seconds since the oldest pending change was queued (0 when empty)."""
+        oldest = self.conn.execute("SELECT MIN(enqueued_at) FROM queue").fetchone()[0]
+        return max(0.0, time.time() - oldest) if oldest else 0.0
+    
+    def stats(self) -> Dict:
+        return {"depth": self.depth(), "lag_seconds": self.lag()}
+    
+    def close(self):
+        self.conn.close()
@@ -10,18 +10,56 @@ Features:
 - Natural language queries
 - Document summarization
 - Question answering over documents
+- Persistent embedding cache (only the query is embedded when warm)
+- Vectorized scoring over a memory-mapped embedding matrix (numpy)
+- Approximate (IVF) search for very large vaults: semantic_search(exact=False)
+- Quantized embedding matrix (config "embedding_dtype": float16 / int8)
+  with optional float32 re-rank of the top candidates (config
+  "embedding_rerank", stores an extra float32 copy)
+- Disk usage of the embedding store and cache: --disk
+- Batched, concurrent, resumable bulk embedding: --reindex (searches
+  only score chunks that are already embedded)
+- Chunk-level embeddings of full document content (heading + token windows);
+  results carry their best-matching chunks
+- Hybrid retrieval: BM25 and vector search in parallel, fused with
+  reciprocal rank fusion; lexical-only when Ollama is unreachable
+- Background embed worker draining the embed-on-store queue
+- Embedding model generations: searches use one active embedding model
+  (config "embedding_model"); switching models re-embeds in the
+  background (throttled) while the old generation keeps serving
+- Streaming answers and summaries (ask_stream / summarize_document_stream)
+  with time-to-first-token and tokens/sec
+- Token-budgeted answer context (config "ask_context_tokens")
+- Cached summaries (.vault/summaries.db); long documents summarized
+  map-reduce style, re-summarizing only edited sections
+- Answer cache (.vault/answers.db) keyed on question, model and context
+  document versions; TTL + LRU, invalidated when a source document changes
 
 Author: Diesel-Goose AI
 Version: 1.0 – Ollama Integration
 """
 
+import heapq
 import json
+import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
 import math
 
-from vault_core import get_vault, VAULT_ROOT
+from vault_core import get_vault, content_hash, VAULT_ROOT
+from vault_embeddings import (
+    EmbeddingCache, EmbeddingStore, EmbeddingGenerations, EMBEDDINGS_DIR, EMBEDDING_DTYPE,
+    model_slug, rerank_hits
+)
+from vault_chunks import ChunkIndex, split_markdown, parent_id, pack_chunks, estimate_tokens
+from vault_summaries import SummaryCache, summary_key
+from vault_answers import AnswerCache, answer_key, ANSWER_CACHE_TTL, ANSWER_CACHE_SIZE
+from vault_fulltext import tokenize
+from vault_embed_pipeline import EmbeddingPipeline, EMBED_BATCH_SIZE, EMBED_CONCURRENCY
+from ollama_client import get_client
 
 # Optional numpy for better performance
 try:
@@ -30,52 +68,376 @@ try:
 except ImportError:
     HAS_NUMPY = False
 
-OLLAMA_API = "http://localhost:11434/api"
+if HAS_NUMPY:
+    from vault_ann import IVFIndex, recall_report, ANN_MIN_ROWS, ANN_NPROBE
+
 DEFAULT_MODEL = "llama3"
+EMBED_QUERY_TIMEOUT = 30  # seconds for a query embedding
+HYBRID_EMBED_TIMEOUT = 3.0  # seconds the hybrid vector leg waits before BM25 goes alone
+GENERATE_TIMEOUT = 60  # seconds to wait for streamed tokens
+CHUNK_FANOUT = 4  # chunk hits fetched per requested document (several may share one)
+RERANK_FANOUT = 4  # quantized candidates per hit re-scored in float32
+EMBEDDING_RERANK = False  # keep float32 rows next to a quantized matrix for re-ranking
+HYBRID_DEPTH = 3  # each branch of a hybrid search contributes top_k * HYBRID_DEPTH candidates
+EMBED_QUEUE_BATCH = 64  # queued documents handled per worker round
+EMBED_WORKER_POLL = 2.0  # seconds between queue checks when idle
+EMBED_WORKER_BACKOFF = 30.0  # seconds to wait after Ollama fails
+MIGRATE_BATCH = 32  # chunks re-embedded per migration step
+MIGRATE_CHUNKS_PER_SEC = 20.0  # default migration throttle (config "migration_chunks_per_sec")
+ASK_CONTEXT_TOKENS = 2048  # default prompt budget for retrieved context
+ASK_CANDIDATE_DOCS = 8  # documents retrieved as packing candidates
+LEXICAL_CHUNKS_PER_DOC = 2  # chunks taken from documents only BM25 found
+SUMMARY_DIRECT_TOKENS = 3000  # documents up to this size are summarized in one prompt
+SUMMARY_SECTION_TOKENS = 1500  # section size for the map step on longer documents
+RRF_K = 60  # reciprocal rank fusion damping constant
+OLLAMA_PROBE_TIMEOUT = 1.0  # seconds; a down Ollama is detected in about this long
+OLLAMA_PROBE_TTL = 30.0  # seconds a probe result is reused
+NOT_EMBEDDED_HINT = "📭 No embedded chunks yet – run --reindex or vault_cli.py embed-worker"
+
+
+def fuse_rankings(
+    rankings: Dict[str, List[Dict]],
+    method: str = "rrf",
+    weights: Optional[Dict[str, float]] = None
+) -> List[Dict]:
+    """
+    Fuse ranked result lists (best first) into one ranking.
+    
+    Args:
+        rankings: {source name: results with "id" and "similarity"}
+        method: "rrf" (sum of 1 / (RRF_K + rank)) or "weighted"
+            (weighted sum of per-list max-normalised scores)
+        weights: Optional per-source weights (default 1.0 each)
+    
+    Returns:
+        Merged results; "similarity" holds the fused score and "scores"
+        each source's original score
+    """
+    weights = weights or {}
+    fused: Dict[str, Dict] = {}
+    for source, results in rankings.items():
+        weight = weights.get(source, 1.0)
+        top = max((r["similarity"] for r in results), default=0.0)
+        for rank, result in enumerate(results, 1):
+            if method == "rrf":
+                contribution = weight / (RRF_K + rank)
+            else:
+                contribution = weight * (max(result["similarity"], 0.0) / top if top > 0 else 0.0)
+            entry = fused.get(result["id"])
+            if entry is None:
+                entry = fused[result["id"]] = {**result, "similarity": 0.0, "scores": {}}
+            else:
+                for key, value in result.items():
+                    entry.setdefault(key, value)
+            entry["similarity"] += contribution
+            entry["scores"][source] = result["similarity"]
+    return sorted(fused.values(), key=lambda r: r["similarity"], reverse=True)
+
 
 class VaultSearch:
     """Semantic search engine for Local Vault."""
     
-    def __init__(self, model: str = DEFAULT_MODEL):
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        nprobe: Optional[int] = None,
+        embed_model: Optional[str] = None
+    ):
+        """
+        Args:
+            model: Ollama model for answers and summaries
+            nprobe: IVF clusters scanned per approximate query
+            embed_model: Pin an embedding model; by default the active
+                generation is used (and followed when it switches)
+        """
         self.model = model
+        self.nprobe = nprobe
         self.vault = get_vault()
-        self.embedding_cache = {}
+        self.ollama = get_client()
+        self.embedding_cache = EmbeddingCache()
+        self.generations = EmbeddingGenerations()
+        self.pinned = embed_model is not None
+        # Vaults embedded before generations existed used the answer model
+        legacy = any((EMBEDDINGS_DIR / model_slug(model) / name).exists() for name in ("rows.db", "rows.json"))
+        self.embed_model = embed_model or self.generations.ensure_active(
+            model if legacy else self.vault.config.get("embedding_model", model)
+        )
+        self.store = self._open_store(self.embed_model)
+        # Stores of generations being built, kept in step with chunk removals
+        self.building: Dict[str, EmbeddingStore] = {}
+        self.chunks = ChunkIndex()
+        self.summaries = SummaryCache()
+        self.answers = AnswerCache(
+            ttl=self.vault.config.get("answer_cache_ttl", ANSWER_CACHE_TTL),
+            max_entries=self.vault.config.get("answer_cache_size", ANSWER_CACHE_SIZE)
+        )
+        self._ann = None
+        # doc_id -> version whose chunks all have vectors (checked this session)
+        self._verified: Dict[str, str] = {}
+        self._probe = (0.0, False)  # (checked_at, ollama reachable)
+        # Scheduler priority of bulk embedding (None: the shared client's)
+        self.embed_priority: Optional[str] = None
+        # Timing of the last streamed generation (see _generate_stream)
+        self.last_generation: Dict = {}
+        self.vault.add_listener(self._on_index_change)
+    
+    def _open_store(self, model: str) -> Optional[EmbeddingStore]:
+        if not HAS_NUMPY:
+            return None
+        return EmbeddingStore(
+            model,
+            dtype=self.vault.config.get("embedding_dtype", EMBEDDING_DTYPE),
+            keep_exact=self.vault.config.get("embedding_rerank", EMBEDDING_RERANK)
+        )
+    
+    def _follow_generation(self):
+        """Switch to the active embedding generation if it changed (e.g. a migration finished)."""
+        active = self.generations.active()
+        if self.pinned or not active or active == self.embed_model:
+            return
+        print(f"🔁 Embedding generation switched: {self.embed_model} → {active}")
+        self.embed_model = active
+        self.store = self.building.pop(active, None) or self._open_store(active)
+        self._ann = None
+        self._verified = {}
+    
+    def migration_target(self) -> Optional[str]:
+        """Configured embedding model, if it differs from the active generation."""
+        wanted = self.vault.config.get("embedding_model")
+        if wanted and wanted != self.generations.active():
+            return wanted
+        return None
+    
+    @staticmethod
+    def _chunk_text(doc: Dict, body: str, chunk: Dict) -> str:
+        """Text embedded for a chunk: title and heading path give it context."""
+        heading = f"{chunk['heading']}\n" if chunk["heading"] else ""
+        return f"{doc['title']}\n{heading}{body[chunk['start']:chunk['end']]}"
+    
+    def _on_index_change(self, upserts: List[Dict], deletes: List[str]):
+        """
+        Drop chunks, vectors and summaries of archived documents (changed
+        ones re-chunk lazily) and every cached answer either kind fed.
+        """
+        self.answers.invalidate_docs([doc["id"] for doc in upserts] + list(deletes))
+        if deletes:
+            self._drop_chunks(self.chunks.remove_many(deletes))
+            for doc_id in deletes:
+                self.summaries.prune_doc(doc_id)
+    
+    def _drop_chunks(self, chunk_ids: List[str]):
+        for cid in chunk_ids:
+            self.embedding_cache.invalidate_doc(cid)
+        if chunk_ids:
+            for store in [self.store, *self.building.values()]:
+                if store is not None:
+                    store.remove_many(chunk_ids)
+    
+    def _rechunk(self, doc: Dict) -> str:
+        """Split a document into chunks again; returns its body."""
+        body = self.vault.read_body(doc)
+        self._drop_chunks(self.chunks.replace(doc["id"], doc["modified"], split_markdown(body)))
+        return body
+    
+    def _pending_chunks(
+        self,
+        docs: Iterable[Dict],
+        examined: List[Tuple[str, str]],
+        model: Optional[str] = None,
+        store: Optional[EmbeddingStore] = None
+    ) -> Iterator[Dict]:
+        """
+        Re-chunk documents whose content changed and yield embedding work
+        items for chunks without a vector for the current document version.
+        
+        Args:
+            docs: Index entries to check
+            examined: Receives (doc_id, version) of every document checked
+            model: Generation to check (default: the active one; another
+                model is checked against its own store, never the session's
+                verified set)
+            store: That generation's store
+        """
+        active = model is None
+        if active:
+            model, store = self.embed_model, self.store
+        for doc in docs:
+            if active and self._verified.get(doc["id"]) == doc["modified"]:
+                continue
+            examined.append((doc["id"], doc["modified"]))
+            body = None
+            rechunked = self.chunks.version(doc["id"]) != doc["modified"]
+            if rechunked:
+                body = self._rechunk(doc)
+            ids = self.chunks.chunk_ids(doc["id"])
+            if store is not None:
+                stored = store.versions(ids)
+                missing = [cid for cid in ids if stored.get(cid) != doc["modified"]]
+            elif rechunked and active:
+                missing = ids
+            else:
+                have = self.embedding_cache.get_for_docs(model, ids)
+                missing = [cid for cid in ids if cid not in have]
+            if not missing:
+                continue
+            if body is None:
+                body = self.vault.read_body(doc)
+            for cid, chunk in self.chunks.get_many(missing).items():
+                yield {
+                    "id": cid,
+                    "modified": doc["modified"],
+                    "category": doc["category"],
+                    "text": self._chunk_text(doc, body, chunk)
+                }
     
-    def _get_embedding(self, text: str) -> List[float]:
+    def _sync_chunks(self, docs: Optional[Iterable[Dict]] = None, pipeline=None, **run_kwargs) -> Dict:
+        """
+        Bring chunks and chunk vectors up to date with the vault.
+        
+        Returns:
+            Embedding pipeline stats
+        """
+        self._follow_generation()
+        index = self.vault.index["documents"]
+        if docs is None and not self._verified:
+            # First full sync this session: drop chunks of documents archived elsewhere
+            gone = [doc_id for doc_id in self.chunks.docs if doc_id not in index]
+            self._drop_chunks(self.chunks.remove_many(gone))
+            if self.store is not None:
+                self.store.remove_many([
+                    cid for cid in self.store.doc_ids()
+                    if parent_id(cid) not in self.chunks.docs or "#" not in cid
+                ])
+        
+        examined: List[Tuple[str, str]] = []
+        own = pipeline is None
+        pipeline = pipeline or self.pipeline()
+        try:
+            stats = pipeline.run(self._pending_chunks(index if docs is None else docs, examined), **run_kwargs)
+        finally:
+            if own:
+                pipeline.close()
+        if stats["error"]:
+            print(f"⚠️  Ollama embedding failed: {stats['error']}")
+        else:
+            self._verified.update(examined)
+            if self.store is not None and self.store.dim:
+                self.generations.record_dim(self.embed_model, self.store.dim)
+        return stats
+    
+    def pipeline(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY
+    ) -> EmbeddingPipeline:
+        """Batched embedding pipeline writing to this engine's cache and store."""
+        return EmbeddingPipeline(
+            self.embed_model,
+            lambda item: item["text"],
+            cache=self.embedding_cache,
+            store=self.store,
+            batch_size=batch_size,
+            concurrency=concurrency,
+            priority=self.embed_priority
+        )
+    
+    def reindex(
+        self,
+        batch_size: int = EMBED_BATCH_SIZE,
+        concurrency: int = EMBED_CONCURRENCY,
+        resume: bool = True,
+        progress=None
+    ) -> Dict:
+        """
+        Chunk and embed every vault document that lacks up-to-date vectors.
+        
+        Args:
+            batch_size: Texts per Ollama /api/embed request
+            concurrency: Requests in flight at once
+            resume: Continue an interrupted run from its checkpoint
+            progress: Optional callback(stats) after each batch
+        
+        Returns:
+            Pipeline stats, counted in chunks (embedded, cached, failed,
+            elapsed, items_per_sec, error)
+        """
+        pipeline = self.pipeline(batch_size, concurrency)
+        try:
+            return self._sync_chunks(pipeline=pipeline, resume=resume, progress=progress)
+        finally:
+            pipeline.close()
+    
+    def drain_queue(self, batch_size: int = EMBED_QUEUE_BATCH) -> Dict:
+        """
+        Embed one batch of documents from the embed-on-store queue.
+        
+        Returns:
+            {"processed": queue rows handled, "embedded": chunks embedded,
+             "error": Ollama error or None (the batch stays queued)}
+        """
+        items = self.vault.embed_queue.peek(batch_size)
+        if not items:
+            return {"processed": 0, "embedded": 0, "error": None}
+        deletes = [doc_id for doc_id, entry, _ in items if entry is None]
+        if deletes:
+            self._drop_chunks(self.chunks.remove_many(deletes))
+        stats = self._sync_chunks([entry for _, entry, _ in items if entry is not None])
+        if not stats["error"]:
+            self.vault.embed_queue.ack((doc_id, seq) for doc_id, _, seq in items)
+        return {"processed": len(items), "embedded": stats["embedded"], "error": stats["error"]}
+    
+    def _get_embedding(
+        self,
+        text: str,
+        doc_id: Optional[str] = None,
+        timeout: float = EMBED_QUERY_TIMEOUT,
+        retries: Optional[int] = None
+    ) -> List[float]:
         """
         Get embedding vector from Ollama.
         
-        Uses Ollama's generate API to create embeddings.
+        Document embeddings (doc_id given) are read from and written to the
+        persistent cache; query embeddings are not cached.
         Falls back to simple keyword-based if Ollama unavailable.
         """
         try:
             # Check cache
-            text_hash = hash(text) % 1000000
-            if text_hash in self.embedding_cache:
-                return self.embedding_cache[text_hash]
+            if doc_id:
+                cached = self.embedding_cache.get(self.embed_model, text)
+                if cached:
+                    return cached
             
             # Get embedding from Ollama
-            response = requests.post(
-                f"{OLLAMA_API}/embeddings",
-                json={
-                    "model": self.model,
-                    "prompt": text[:512]  # Truncate for efficiency
-                },
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                embedding = response.json().get("embedding", [])
-                self.embedding_cache[text_hash] = embedding
-                return embedding
-            else:
-                # Fallback: return empty (will use keyword search)
-                return []
+            embeddings = self.ollama.embed([text], model=self.embed_model, timeout=timeout, retries=retries)
+            embedding = embeddings[0] if embeddings else []
+            self._probe = (time.time(), True)
+            if doc_id and embedding:
+                self.embedding_cache.put(self.embed_model, text, embedding, doc_id=doc_id)
+            return embedding
         
+        except requests.HTTPError as e:
+            # Ollama is up but refused (e.g. model not pulled): BM25 fallback
+            print(f"⚠️  Ollama embedding failed: {e}")
+            return []
         except Exception as e:
             print(f"⚠️  Ollama embedding failed: {e}")
+            self._probe = (time.time(), False)
             return []
     
+    def ollama_available(self) -> bool:
+        """Quick reachability probe, cached for OLLAMA_PROBE_TTL seconds."""
+        checked_at, up = self._probe
+        if time.time() - checked_at < OLLAMA_PROBE_TTL:
+            return up
+        up = self.ollama.available(timeout=OLLAMA_PROBE_TIMEOUT)
+        self._probe = (time.time(), up)
+        return up
+    
+    def _known_down(self) -> bool:
+        """True when a call within OLLAMA_PROBE_TTL found Ollama unreachable (sends no request)."""
+        checked_at, up = self._probe
+        return not up and time.time() - checked_at < OLLAMA_PROBE_TTL
+    
     def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
         if not vec1 or not vec2:
@@ -98,11 +460,19 @@ class VaultSearch:
         
         return dot / (norm1 * norm2)
     
+    @property
+    def ann(self):
+        """IVF index over the embedding matrix (built on first use)."""
+        if self._ann is None and self.store is not None:
+            self._ann = IVFIndex(self.store, nprobe=self.nprobe or ANN_NPROBE)
+        return self._ann
+    
     def semantic_search(
         self,
         query: str,
         top_k: int = 5,
-        category: str = ""
+        category: str = "",
+        exact: bool = True
     ) -> List[Dict]:
         """
         Search documents by semantic similarity.
@@ -111,79 +481,328 @@ class VaultSearch:
             query: Natural language query
             top_k: Number of top results
             category: Optional category filter
+            exact: Score every chunk; False uses the IVF index once the
+                vault has at least ANN_MIN_ROWS embedded chunks
         
         Returns:
-            List of documents with similarity scores
+            List of documents with similarity scores (best chunk), each with
+            "chunks": its matching chunks (chunk_id, heading, start, end,
+            similarity, text), best first
         """
         print(f"🔍 Searching: '{query}'")
+        self._follow_generation()
+        if not self._has_vectors():
+            print(NOT_EMBEDDED_HINT)
+            print("⚠️  Nothing embedded yet – using BM25 full-text ranking")
+            return self.lexical_search(query, top_k=top_k, category=category)
         
-        # Get query embedding
-        query_embedding = self._get_embedding(query)
-        
-        # Get all documents
-        documents = self.vault.list_all(category=category)
+        # Get query embedding (skipped when a recent call found Ollama down)
+        query_embedding = self._get_embedding(query) if not self._known_down() else []
+        if not query_embedding:
+            print("⚠️  Ollama unavailable – using BM25 full-text ranking")
+            return self.lexical_search(query, top_k=top_k, category=category)
+        return self._vector_search(query_embedding, top_k, category, exact)
+    
+    def _has_vectors(self) -> bool:
+        """Whether any chunk is embedded in the active generation yet."""
+        if self.store is not None:
+            return self.store.live > 0
+        return self.embedding_cache.dim(self.embed_model) is not None
+    
+    def _vector_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        category: str,
+        exact: bool
+    ) -> List[Dict]:
+        """
+        Rank documents by their best-matching chunks.
         
-        if not documents:
+        Only chunks already embedded are searched: embedding new or
+        changed documents is left to --reindex and the embed worker, so
+        a query never waits on it.
+        """
+        if not len(self.vault.index["documents"]):
             print("📭 No documents in vault")
             return []
         
-        results = []
-        
-        for doc in documents:
-            # Get document embedding (from content preview)
-            doc_text = f"{doc['title']} {' '.join(doc.get('keywords', []))}"
-            doc_embedding = self._get_embedding(doc_text)
-            
-            # Calculate similarity
-            if query_embedding and doc_embedding:
-                similarity = self._cosine_similarity(query_embedding, doc_embedding)
+        fetch = top_k * CHUNK_FANOUT
+        if self.store is not None:
+            if not self.store.live:
+                return []
+            # One matrix-vector product over every embedded chunk
+            # (or over the nearest IVF clusters when exact=False).
+            # A quantized store that keeps exact rows over-fetches, then
+            # re-scores with them
+            rerank = self.store.has_exact
+            want = fetch * RERANK_FANOUT if rerank else fetch
+            if not exact and self.store.live >= ANN_MIN_ROWS:
+                hits = self.ann.search(query_embedding, top_k=want, category=category)
             else:
-                # Fallback to keyword matching
-                similarity = self._keyword_similarity(query.lower(), doc_text.lower())
-            
-            results.append({
-                **doc,
-                "similarity": similarity
+                hits = self.store.search(query_embedding, top_k=want, category=category)
+            if rerank:
+                exact_vectors = self.store.exact_vectors(cid for cid, _ in hits)
+                hits = rerank_hits(query_embedding, hits, exact_vectors, fetch)
+            return self._merge_chunk_hits(hits, top_k)
+        
+        documents = self.vault.list_all(category=category)
+        chunk_ids = [cid for doc in documents for cid in self.chunks.chunk_ids(doc["id"])]
+        vectors = self.embedding_cache.get_for_docs(self.embed_model, chunk_ids, dim=len(query_embedding))
+        hits = heapq.nlargest(
+            fetch,
+            ((cid, self._cosine_similarity(query_embedding, vector)) for cid, vector in vectors.items()),
+            key=lambda hit: hit[1]
+        )
+        return self._merge_chunk_hits(hits, top_k)
+    
+    def lexical_search(self, query: str, top_k: int = 5, category: str = "") -> List[Dict]:
+        """
+        BM25 ranking over document bodies (no Ollama needed).
+        
+        Returns:
+            Documents with "similarity" (BM25 score) and a "snippet"
+        """
+        return [
+            {**doc, "similarity": doc["score"]}
+            for doc in self.vault.search(query, category=category, limit=top_k, rank="bm25")
+        ]
+    
+    def hybrid_search(
+        self,
+        query: str,
+        top_k: int = 5,
+        category: str = "",
+        fusion: str = "rrf",
+        weights: Optional[Dict[str, float]] = None,
+        exact: bool = True
+    ) -> List[Dict]:
+        """
+        Run BM25 and vector search in parallel and fuse the rankings.
+        
+        The query embedding gets HYBRID_EMBED_TIMEOUT seconds, so a
+        stalled Ollama delays the BM25 results by at most that; once a
+        call has found Ollama unreachable, only the BM25 branch runs (for
+        OLLAMA_PROBE_TTL seconds).
+        
+        Args:
+            query: Natural language query
+            top_k: Number of results
+            category: Optional category filter
+            fusion: "rrf" (reciprocal rank fusion) or "weighted"
+            weights: Optional {"bm25": w, "vector": w}
+            exact: Passed to the vector branch (False allows the IVF index)
+        
+        Returns:
+            Fused documents; "scores" has each branch's own score, and
+            "chunks"/"snippet" come from the branch that found them
+        """
+        print(f"🔍 Searching: '{query}'")
+        self._follow_generation()
+        depth = top_k * HYBRID_DEPTH
+        
+        def vector_branch() -> Optional[List[Dict]]:
+            # A stalled Ollama must not hold up the BM25 results: one short
+            # attempt, and a timeout marks Ollama down for OLLAMA_PROBE_TTL
+            embedding = self._get_embedding(query, timeout=HYBRID_EMBED_TIMEOUT, retries=0)
+            return self._vector_search(embedding, depth, category, exact) if embedding else None
+        
+        embedded = self._has_vectors()
+        if not embedded:
+            print(NOT_EMBEDDED_HINT)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            lexical = pool.submit(self.lexical_search, query, depth, category)
+            vector = pool.submit(vector_branch) if embedded and not self._known_down() else None
+            rankings = {"bm25": lexical.result()}
+            if vector is not None and vector.result() is not None:
+                rankings["vector"] = vector.result()
+        
+        if embedded and "vector" not in rankings:
+            print("⚠️  Ollama unavailable – lexical (BM25) results only")
+        return fuse_rankings(rankings, method=fusion, weights=weights)[:top_k]
+    
+    def _merge_chunk_hits(self, hits: List[Tuple[str, float]], top_k: int) -> List[Dict]:
+        """
+        Group chunk hits (best first) by parent document. A document scores
+        as its best chunk and lists every chunk that matched.
+        """
+        docs = self.vault.index["documents"]
+        spans = self.chunks.get_many(cid for cid, _ in hits)
+        results: Dict[str, Dict] = {}
+        for cid, score in hits:
+            doc = docs.get(parent_id(cid))
+            span = spans.get(cid)
+            if doc is None or span is None:
+                continue
+            if doc["id"] not in results:
+                if len(results) >= top_k:
+                    continue
+                results[doc["id"]] = {**doc, "similarity": score, "chunks": []}
+            results[doc["id"]]["chunks"].append({
+                "chunk_id": cid,
+                "heading": span["heading"],
+                "start": span["start"],
+                "end": span["end"],
+                "tokens": span["tokens"],
+                "similarity": score
             })
         
-        # Sort by similarity
-        results.sort(key=lambda x: x["similarity"], reverse=True)
+        for result in results.values():
+            body = self.vault.read_body(result)
+            for chunk in result["chunks"]:
+                chunk["text"] = body[chunk["start"]:chunk["end"]]
+        return list(results.values())
+    
+    def _generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Stream a completion from Ollama, yielding text as it is produced.
+        
+        When the stream finishes, self.last_generation holds its timing
+        (it stays empty for errors and cut-off streams):
+        ttft (seconds to first token), tokens and tokens_per_sec (from
+        Ollama's eval_count / eval_duration), prompt_tokens and total_seconds.
+        """
+        self.last_generation = {}
+        start = time.perf_counter()
+        ttft = None
+        try:
+            for chunk in self.ollama.generate_stream(prompt, model=self.model, timeout=GENERATE_TIMEOUT):
+                if chunk.get("error"):
+                    # Cut off (scheduler deadline, broken upstream): last_generation
+                    # stays empty, so the partial text is never cached
+                    yield f"\n\nError: generation stopped ({chunk['error']})"
+                    return
+                token = chunk.get("response", "")
+                if token:
+                    if ttft is None:
+                        ttft = time.perf_counter() - start
+                    yield token
+                if chunk.get("done"):
+                    eval_count = chunk.get("eval_count", 0)
+                    eval_seconds = chunk.get("eval_duration", 0) / 1e9
+                    self.last_generation = {
+                        "ttft": ttft,
+                        "tokens": eval_count,
+                        "tokens_per_sec": eval_count / eval_seconds if eval_seconds else 0.0,
+                        "prompt_tokens": chunk.get("prompt_eval_count", 0),
+                        "total_seconds": time.perf_counter() - start
+                    }
         
-        return results[:top_k]
+        except requests.HTTPError as e:
+            yield f"Error: Ollama returned {e.response.status_code if e.response is not None else e}"
+        except Exception as e:
+            yield f"Error querying Ollama: {e}"
+    
+    def _lexical_chunks(self, doc: Dict, question: str) -> List[Dict]:
+        """Chunks of a BM25-only hit, ranked by query-term occurrences."""
+        if self.chunks.version(doc["id"]) != doc["modified"]:
+            body = self._rechunk(doc)
+        else:
+            body = self.vault.read_body(doc)
+        terms = set(tokenize(question))
+        chunks = []
+        for chunk in self.chunks.get(doc["id"]):
+            text = body[chunk["start"]:chunk["end"]]
+            hits = sum(1 for token in tokenize(text) if token in terms)
+            chunks.append({**chunk, "chunk_id": f"{doc['id']}#{chunk['ordinal']}", "text": text, "similarity": hits})
+        chunks.sort(key=lambda c: c["similarity"], reverse=True)
+        return chunks[:LEXICAL_CHUNKS_PER_DOC]
     
-    def _keyword_similarity(self, query: str, text: str) -> float:
-        """Fallback keyword matching."""
-        query_words = set(query.split())
-        text_words = set(text.split())
+    def build_context(
+        self,
+        question: str,
+        max_tokens: Optional[int] = None,
+        candidates: int = ASK_CANDIDATE_DOCS
+    ) -> Dict:
+        """
+        Assemble answer context within a token budget.
         
-        if not query_words:
-            return 0.0
+        Retrieves candidate documents (hybrid search), takes their top
+        chunks and packs them greedily with pack_chunks(), so prompt size
+        (and prefill time) is bounded no matter how large the vault is.
         
-        matches = len(query_words & text_words)
-        return matches / len(query_words)
+        Args:
+            question: The question being answered
+            max_tokens: Context budget (default: config "ask_context_tokens")
+            candidates: Documents considered for packing
+        
+        Returns:
+            pack_chunks() result plus "documents" (the ranked candidates)
+            and "budget" (the token budget used)
+        """
+        if max_tokens is None:
+            max_tokens = self.vault.config.get("ask_context_tokens", ASK_CONTEXT_TOKENS)
+        relevant = self.hybrid_search(question, top_k=candidates)
+        for doc in relevant:
+            if not doc.get("chunks"):
+                doc["chunks"] = self._lexical_chunks(doc, question)
+        packed = pack_chunks(relevant, max_tokens)
+        packed["documents"] = relevant
+        packed["budget"] = max_tokens
+        return packed
     
-    def ask(self, question: str, context_docs: int = 3) -> str:
+    def _answer_key(self, question: str, packed: Dict) -> str:
+        """Answer cache key: question, model and versions of the packed documents."""
+        index = self.vault.index["documents"]
+        versions = []
+        for source in packed["sources"]:
+            doc = index.get(source["id"]) or {}
+            versions.append((source["id"], doc.get("content_hash") or doc.get("modified", "")))
+        return answer_key(question, self.model, versions, packed["budget"])
+    
+    def ask_stream(
+        self,
+        question: str,
+        context_docs: int = ASK_CANDIDATE_DOCS,
+        max_context_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> Iterator[str]:
         """
-        Answer a question using vault documents as context.
+        Answer a question using vault documents as context, yielding the
+        answer as Ollama generates it.
+        
+        Answers are cached (.vault/answers.db) under the normalized
+        question, the model and the ids and content hashes of the packed
+        documents; a repeat question over unchanged documents is answered
+        without calling the model.
         
         Args:
             question: Question to answer
-            context_docs: Number of documents to use as context
+            context_docs: Candidate documents to pack context from
+            max_context_tokens: Context budget (default: config "ask_context_tokens")
+            use_cache: Look up and store the answer in the answer cache
         
-        Returns:
-            Generated answer from Ollama
+        Yields:
+            Answer text fragments (timing in self.last_generation afterwards,
+            or {"cached": True} for a cache hit)
         """
-        # Find relevant documents
-        relevant = self.semantic_search(question, top_k=context_docs)
+        self.last_generation = {}
+        
+        # Find relevant passages (BM25 + vector, fused) within the budget
+        packed = self.build_context(question, max_context_tokens, candidates=context_docs)
+        relevant = packed["documents"]
         
         if not relevant:
-            return "I don't have any documents that can help answer that question."
+            yield "I don't have any documents that can help answer that question."
+            return
         
-        # Build context
-        context = "\n\n".join([
-            f"Document {i+1}: {doc['title']}\n{doc.get('keywords', [])}"
-            for i, doc in enumerate(relevant)
-        ])
+        key = self._answer_key(question, packed) if use_cache and packed["sources"] else None
+        cached = self.answers.get(key) if key else None
+        if cached is not None:
+            self.last_generation = {"cached": True}
+            yield cached
+            return
+        
+        if not self.ollama_available():
+            # No model to generate with: point at the best passages instead
+            lines = ["Ollama is unavailable; the most relevant vault passages are:"]
+            for doc in relevant[:3]:
+                passage = doc["chunks"][0]["text"] if doc.get("chunks") else doc.get("snippet", "")
+                lines.append(f"- {doc['title']}: {' '.join(passage.split())[:300]}")
+            yield "\n".join(lines)
+            return
+        
+        context = packed["context"]
         
         # Build prompt
         prompt = f"""You are Diesel-Goose AI, the executive assistant to the Chairman of Greenhead Labs.
@@ -197,68 +816,368 @@ DOCUMENTS:
 QUESTION: {question}
 
 ANSWER:"""
+
+        answer = []
+        for token in self._generate_stream(prompt):
+            answer.append(token)
+            yield token
         
-        try:
-            response = requests.post(
-                f"{OLLAMA_API}/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("response", "No response")
-            else:
-                return f"Error: Ollama returned {response.status_code}"
-        
-        except Exception as e:
-            return f"Error querying Ollama: {e}"
+        # Only completed generations are cached (not errors or cut-off streams)
+        if key and self.last_generation:
+            self.answers.put(key, question, self.model, "".join(answer), [s["id"] for s in packed["sources"]])
     
-    def summarize_document(self, doc_id: str) -> str:
-        """Generate a summary of a document using Ollama."""
-        doc = self.vault.retrieve(doc_id)
+    def ask(
+        self,
+        question: str,
+        context_docs: int = ASK_CANDIDATE_DOCS,
+        max_context_tokens: Optional[int] = None,
+        use_cache: bool = True
+    ) -> str:
+        """
+        Answer a question using vault documents as context.
         
-        if not doc:
-            return "Document not found"
+        Args:
+            question: Question to answer
+            context_docs: Candidate documents to pack context from
+            max_context_tokens: Context budget (default: config "ask_context_tokens")
+            use_cache: Look up and store the answer in the answer cache
         
-        content = doc["content"]
+        Returns:
+            Generated answer from Ollama
+        """
+        return "".join(self.ask_stream(question, context_docs, max_context_tokens, use_cache)) or "No response"
+    
+    def _summarize_text(self, doc_id: str, key: str, kind: str, prompt: str, used: List[str]) -> Optional[str]:
+        """Cached non-streaming summary of one piece of a document (None on failure)."""
+        used.append(key)
+        summary = self.summaries.get(key)
+        if summary is None:
+            self.last_generation = {}
+            summary = "".join(self._generate_stream(prompt))
+            if not self.last_generation:
+                return None
+            self.summaries.put(key, doc_id, self.model, kind, summary)
+        return summary
+    
+    def _section_summaries(self, doc: Dict, body: str, used: List[str]) -> Optional[List[str]]:
+        """
+        Map step for long documents: summarize each section, then merge
+        groups of section summaries until they fit one prompt.
         
-        # Truncate if too long
-        if len(content) > 4000:
-            content = content[:4000] + "..."
+        Every summary is cached by its input text, so after an edit only
+        changed sections (and the groups containing them) are regenerated.
+        """
+        parts = []
+        for section in split_markdown(body, SUMMARY_SECTION_TOKENS, overlap=0):
+            text = body[section["start"]:section["end"]]
+            heading = f" ({section['heading']})" if section["heading"] else ""
+            prompt = f"""Summarize this section of "{doc['title']}"{heading} in a few sentences:
+
+{text}
+
+SUMMARY:"""
+            summary = self._summarize_text(doc["id"], summary_key(self.model, "section", doc["id"], text), "section", prompt, used)
+            if summary is None:
+                return None
+            parts.append(summary.strip())
         
-        prompt = f"""Summarize the following document in 3-5 bullet points:
+        while len(parts) > 1 and estimate_tokens("\n\n".join(parts)) > SUMMARY_DIRECT_TOKENS:
+            groups, group, size = [], [], 0
+            for part in parts:
+                cost = estimate_tokens(part)
+                if group and size + cost > SUMMARY_DIRECT_TOKENS:
+                    groups.append(group)
+                    group, size = [], 0
+                group.append(part)
+                size += cost
+            groups.append(group)
+            if len(groups) == len(parts):
+                break  # every summary is already a group of its own
+            merged = []
+            for group in groups:
+                text = "\n\n".join(group)
+                prompt = f"""Combine these consecutive section summaries of "{doc['title']}" into one short summary:
 
-{content}
+{text}
 
 SUMMARY:"""
+                summary = self._summarize_text(doc["id"], summary_key(self.model, "reduce", doc["id"], text), "reduce", prompt, used)
+                if summary is None:
+                    return None
+                merged.append(summary.strip())
+            parts = merged
+        return parts
+    
+    def summarize_document_stream(self, doc_id: str, refresh: bool = False) -> Iterator[str]:
+        """
+        Summarize a document with Ollama, yielding the summary as it is generated.
         
-        try:
-            response = requests.post(
-                f"{OLLAMA_API}/generate",
-                json={
-                    "model": self.model,
-                    "prompt": prompt,
-                    "stream": False
-                },
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("response", "No summary generated")
-            else:
-                return f"Error: {response.status_code}"
+        Summaries are cached in .vault/summaries.db by document id and
+        content hash, so an unchanged document is answered instantly.
+        Documents over SUMMARY_DIRECT_TOKENS are summarized map-reduce
+        style (see _section_summaries) instead of being truncated.
         
-        except Exception as e:
-            return f"Error: {e}"
+        Args:
+            doc_id: Document to summarize
+            refresh: Ignore the cached document summary
+        
+        Yields:
+            Summary text fragments (self.last_generation has timing, or
+            {"cached": True} for a cache hit)
+        """
+        self.last_generation = {}
+        doc = self.vault.index["documents"].get(doc_id)
+        
+        if not doc:
+            yield "Document not found"
+            return
+        
+        body = self.vault.read_body(doc)
+        key = summary_key(self.model, "doc", doc_id, content_hash(body))
+        cached = None if refresh else self.summaries.get(key)
+        if cached is not None:
+            self.last_generation = {"cached": True}
+            yield cached
+            return
+        
+        used = [key]
+        if estimate_tokens(body) <= SUMMARY_DIRECT_TOKENS:
+            prompt = f"""Summarize the following document in 3-5 bullet points:
+
+{body}
+
+SUMMARY:"""
+        else:
+            parts = self._section_summaries(doc, body, used)
+            if parts is None:
+                yield "Error querying Ollama: section summary failed"
+                return
+            sections = "\n\n".join(parts)
+            prompt = f"""The following are summaries of consecutive parts of the document "{doc['title']}".
+Summarize the whole document in 3-5 bullet points:
+
+{sections}
+
+SUMMARY:"""
+
+        self.last_generation = {}
+        summary = []
+        for token in self._generate_stream(prompt):
+            summary.append(token)
+            yield token
+        
+        # Only a completed generation is cached; older summaries of this
+        # document (previous versions, edited sections) are dropped
+        if self.last_generation:
+            self.summaries.put(key, doc_id, self.model, "doc", "".join(summary))
+            self.summaries.prune_doc(doc_id, self.model, keep=used)
+    
+    def summarize_document(self, doc_id: str) -> str:
+        """Generate a summary of a document using Ollama."""
+        return "".join(self.summarize_document_stream(doc_id)) or "No summary generated"
     
     def list_categories(self) -> Dict[str, int]:
         """List all categories and document counts."""
         stats = self.vault.stats()
         return stats.get("categories", {})
+    
+    def disk_usage(self) -> Dict:
+        """
+        Bytes on disk for semantic search: every file of the active
+        embedding store (matrix, exact.f32, rows.db, IVF index) plus the
+        embedding cache database.
+        
+        Returns:
+            {"files": {name: bytes}, "total": bytes}
+        """
+        files = {}
+        if self.store is not None:
+            files.update(self.store.disk_usage())
+        cache = self.embedding_cache.path
+        for path in (cache, cache.with_name(cache.name + "-wal")):
+            if path.exists():
+                files[f"cache/{path.name}"] = path.stat().st_size
+        return {"files": files, "total": sum(files.values())}
+
+
+class EmbeddingMigrator:
+    """
+    Re-embeds every chunk into a new embedding model generation while the
+    active generation keeps serving searches. Work is done in small,
+    rate-limited steps; once no chunk is missing a vector the new
+    generation is activated (every VaultSearch follows it).
+    """
+    
+    def __init__(
+        self,
+        search: VaultSearch,
+        target: str,
+        batch_size: int = MIGRATE_BATCH,
+        rate: Optional[float] = None
+    ):
+        self.search = search
+        self.target = target
+        self.batch_size = batch_size
+        self.rate = rate or search.vault.config.get("migration_chunks_per_sec", MIGRATE_CHUNKS_PER_SEC)
+        self.store = search.building.get(target) or search._open_store(target)
+        if self.store is not None:
+            search.building[target] = self.store
+        self.pipeline = EmbeddingPipeline(
+            target,
+            lambda item: item["text"],
+            cache=search.embedding_cache,
+            store=self.store,
+            batch_size=batch_size,
+            concurrency=1,
+            priority=search.embed_priority
+        )
+        search.generations.begin(target)
+        self._stop = False
+    
+    def step(self) -> Dict:
+        """
+        Embed up to one batch of chunks missing from the new generation,
+        activating it when none are left.
+        
+        Returns:
+            {"embedded", "items", "done", "error", "elapsed"}
+        """
+        start = time.time()
+        items = self._pending(self.search.vault.index["documents"])
+        if not items:
+            # Other processes may have stored documents this one's index has
+            # not seen: check the persisted index before calling it finished
+            items = self._pending(self.search.vault.backend.load()["documents"])
+        if not items:
+            dim = self.store.dim if self.store is not None else self.search.embedding_cache.dim(self.target)
+            self.search.generations.activate(self.target, dim)
+            self.search._follow_generation()
+            self.pipeline.close()
+            return {"embedded": 0, "items": 0, "done": True, "error": None, "elapsed": time.time() - start}
+        stats = self.pipeline.run(items)
+        return {
+            "embedded": stats["embedded"] + stats["cached"],
+            "items": len(items),
+            "done": False,
+            "error": stats["error"],
+            "elapsed": time.time() - start
+        }
+    
+    def _pending(self, docs: Iterable[Dict]) -> List[Dict]:
+        """Up to one batch of chunks of `docs` missing from the new generation."""
+        return list(islice(
+            self.search._pending_chunks(docs, [], self.target, self.store),
+            self.batch_size
+        ))
+    
+    def throttle(self, result: Dict):
+        """Sleep so the migration stays under `rate` chunks per second."""
+        time.sleep(max(0.0, result["items"] / self.rate - result["elapsed"]))
+    
+    def run(self, progress=None) -> Dict:
+        """
+        Step until the new generation is active, Ollama fails or stop() is called.
+        
+        Returns:
+            {"embedded": chunks embedded, "done": activated, "error": last error}
+        """
+        total = {"embedded": 0, "done": False, "error": None}
+        while not self._stop:
+            result = self.step()
+            total["embedded"] += result["embedded"]
+            total["done"], total["error"] = result["done"], result["error"]
+            if progress:
+                progress(total)
+            if result["done"] or result["error"]:
+                break
+            self.throttle(result)
+        return total
+    
+    def stop(self):
+        self._stop = True
+
+
+class EmbedWorker:
+    """
+    Drains the embed-on-store queue into the embedding store.
+    
+    Run it next to the vault (vault_cli.py embed-worker); stores from any
+    process are picked up within EMBED_WORKER_POLL seconds. When config
+    "embedding_model" names a model other than the active generation, idle
+    time is spent migrating to it (EmbeddingMigrator).
+    """
+    
+    def __init__(
+        self,
+        search: Optional[VaultSearch] = None,
+        batch_size: int = EMBED_QUEUE_BATCH,
+        poll_interval: float = EMBED_WORKER_POLL
+    ):
+        self.search = search or VaultSearch()
+        # Queue draining and migration must not hold up interactive
+        # questions; the shared client keeps its own priority for them
+        self.search.embed_priority = "background"
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.migrator: Optional[EmbeddingMigrator] = None
+        self._stop = False
+    
+    def drain(self) -> int:
+        """Embed until the queue is empty or Ollama fails; returns rows handled."""
+        total = 0
+        while not self._stop:
+            result = self.search.drain_queue(self.batch_size)
+            if result["error"] or not result["processed"]:
+                break
+            total += result["processed"]
+            queue = self.search.vault.embed_queue.stats()
+            print(f"🧮 Embedded {result['embedded']} chunks from {result['processed']} docs "
+                  f"(queue {queue['depth']}, lag {queue['lag_seconds']:.1f}s)")
+        return total
+    
+    def migrate_step(self) -> bool:
+        """
+        One throttled migration step toward config "embedding_model".
+        
+        Returns:
+            True if a step ran (so the worker should not sleep a full poll)
+        """
+        target = self.search.migration_target()
+        if not target:
+            return False
+        if self.migrator is None or self.migrator.target != target:
+            print(f"🔁 Migrating embeddings: {self.search.embed_model} → {target}")
+            self.migrator = EmbeddingMigrator(self.search, target)
+        result = self.migrator.step()
+        if result["error"]:
+            print(f"⚠️  Migration paused: {result['error']}")
+            return False
+        if result["done"]:
+            print(f"✅ Embedding generation {target} is now active")
+            self.migrator = None
+        else:
+            self.migrator.throttle(result)
+        return True
+    
+    def run(self, once: bool = False):
+        """Poll the queue until interrupted (or until empty with once=True)."""
+        print(f"👷 Embed worker running ({self.search.embed_model}, batch {self.batch_size}) – Ctrl+C to stop")
+        try:
+            while not self._stop:
+                self.drain()
+                if once:
+                    break
+                # The queue always wins: migration only runs when it is empty
+                if self.search.vault.embed_queue.depth() == 0 and self.migrate_step():
+                    continue
+                idle = EMBED_WORKER_BACKOFF if not self.search.ollama_available() else self.poll_interval
+                time.sleep(idle)
+        except KeyboardInterrupt:
+            pass
+        print("👋 Embed worker stopped")
+    
+    def stop(self):
+        self._stop = True
 
 
 def main():
@@ -270,9 +1189,16 @@ def main():
     if len(sys.argv) < 2:
         print("🦆 Local Vault Search")
         print("Usage:")
-        print(f"  python vault_search.py 'your query'")
+        print(f"  python vault_search.py 'your query'            (hybrid BM25 + vector)")
+        print(f"  python vault_search.py --vector 'your query'")
+        print(f"  python vault_search.py --lexical 'your query'")
         print(f"  python vault_search.py --ask 'question'")
         print(f"  python vault_search.py --categories")
+        print(f"  python vault_search.py --ann-recall [k]")
+        print(f"  python vault_search.py --disk")
+        print(f"  python vault_search.py --reindex [--batch N] [--concurrency N] [--restart]")
+        print(f"  python vault_search.py --generations")
+        print(f"  python vault_search.py --migrate MODEL [--rate N]")
         return
     
     command = sys.argv[1]
@@ -283,16 +1209,104 @@ def main():
         for cat, count in cats.items():
             print(f"  {cat}: {count} documents")
     
+    elif command == "--ann-recall":
+        if search.store is None:
+            print("❌ numpy is required for the embedding matrix")
+            return
+        k = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+        report = recall_report(search.store, k=k)
+        print(f"📐 IVF recall@{k} vs exact ({search.store.live} vectors)")
+        for row in report:
+            print(f"  nprobe={row['nprobe']:<3} recall={row['recall']:.3f} "
+                  f"ann={row['ann_ms']:.2f}ms exact={row['exact_ms']:.2f}ms")
+    
+    elif command == "--disk":
+        usage = search.disk_usage()
+        print("💾 Embedding disk usage")
+        for name, nbytes in usage["files"].items():
+            print(f"  {name:<30} {nbytes / 1024 / 1024:9.1f} MB")
+        print(f"  {'total':<30} {usage['total'] / 1024 / 1024:9.1f} MB")
+    
+    elif command == "--reindex":
+        args = sys.argv[2:]
+        batch_size = int(args[args.index("--batch") + 1]) if "--batch" in args else EMBED_BATCH_SIZE
+        concurrency = int(args[args.index("--concurrency") + 1]) if "--concurrency" in args else EMBED_CONCURRENCY
+        total = len(search.vault.index["documents"])
+        print(f"🧮 Embedding the chunks of {total} documents with {search.embed_model} "
+              f"(batch {batch_size}, {concurrency} in flight)")
+        
+        def progress(stats):
+            done = stats["embedded"] + stats["cached"] + stats["failed"]
+            rate = done / max(stats["elapsed"], 1e-6)
+            print(f"\r   {done} chunks this run ({rate:.1f} chunks/sec)", end="", flush=True)
+        
+        stats = search.reindex(batch_size, concurrency, resume="--restart" not in args, progress=progress)
+        print()
+        print(f"✅ Chunks embedded {stats['embedded']}, cached {stats['cached']}, failed {stats['failed']} "
+              f"in {stats['elapsed']:.1f}s ({stats['items_per_sec']:.1f} chunks/sec)")
+        if stats["error"]:
+            print(f"⚠️  Stopped early: {stats['error']}")
+            print("   Run --reindex again to resume from the checkpoint")
+    
+    elif command == "--generations":
+        print("🧬 Embedding generations:")
+        for generation in search.generations.list():
+            marker = "▶" if generation["status"] == "active" else " "
+            print(f"  {marker} {generation['model']:<24} dim={generation.get('dim') or '?':<6} {generation['status']}")
+        target = search.migration_target()
+        if target:
+            print(f"\n🔁 Config embedding_model is {target}: the embed worker is migrating to it")
+    
+    elif command == "--migrate":
+        if len(sys.argv) < 3:
+            print("❌ Usage: --migrate MODEL [--rate N]")
+            return
+        args = sys.argv[3:]
+        rate = float(args[args.index("--rate") + 1]) if "--rate" in args else None
+        migrator = EmbeddingMigrator(search, sys.argv[2], rate=rate)
+        print(f"🔁 Re-embedding into {migrator.target} at ≤{migrator.rate:.0f} chunks/sec "
+              f"({search.embed_model} keeps serving searches)")
+        
+        def report(total):
+            print(f"\r   {total['embedded']} chunks embedded", end="", flush=True)
+        
+        try:
+            total = migrator.run(progress=report)
+        except KeyboardInterrupt:
+            total = {"done": False, "error": "interrupted"}
+        print()
+        if total["done"]:
+            print(f"✅ {migrator.target} is now the active embedding generation")
+            if search.vault.config.get("embedding_model", migrator.target) != migrator.target:
+                print(f"   Set \"embedding_model\": \"{migrator.target}\" in config.json so workers don't migrate back")
+        else:
+            print(f"⚠️  Stopped ({total['error']}); run --migrate again to continue")
+    
     elif command == "--ask":
         question = " ".join(sys.argv[2:])
-        answer = search.ask(question)
         print(f"\n❓ {question}")
-        print(f"\n💡 {answer}")
+        print("\n💡 ", end="", flush=True)
+        for token in search.ask_stream(question):
+            print(token, end="", flush=True)
+        print()
+        timing = search.last_generation
+        if timing.get("cached"):
+            print("\n⚡ Cached answer")
+        elif timing:
+            print(f"\n⏱️  First token {timing['ttft'] or 0:.2f}s | "
+                  f"{timing['tokens_per_sec']:.1f} tokens/sec ({timing['tokens']} tokens)")
     
     else:
         # Regular search
-        query = " ".join(sys.argv[1:])
-        results = search.semantic_search(query)
+        if command == "--vector":
+            query = " ".join(sys.argv[2:])
+            results = search.semantic_search(query)
+        elif command == "--lexical":
+            query = " ".join(sys.argv[2:])
+            results = search.lexical_search(query)
+        else:
+            query = " ".join(sys.argv[1:])
+            results = search.hybrid_search(query)
         
         print(f"\n🔍 Results for: '{query}'\n")
         for i, doc in enumerate(results, 1):
@@ -300,6 +1314,11 @@ def main():
             print(f"{i}. {doc['title']}")
             print(f"   Category: {doc['category']} | Score: {similarity:.2f}")
             print(f"   Tags: {', '.join(doc.get('tags', []))}")
+            for chunk in doc.get("chunks", [])[:2]:
+                label = f"{chunk['heading']}: " if chunk["heading"] else ""
+                print(f"   ↳ {label}{' '.join(chunk['text'].split())[:120]}")
+            if not doc.get("chunks") and doc.get("snippet"):
+                print(f"   ↳ {doc['snippet']}")
             print()
 
 
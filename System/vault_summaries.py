@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local Vault Summaries – Persistent Summary Cache
+
+Stores document summaries in .vault/summaries.db so summarizing an
+unchanged document is instant. Long documents are summarized map-reduce
+style; the per-section summaries are cached by their text, so after an
+edit only the sections that changed are sent to the model again.
+
+Features:
+- Document summaries keyed by (model, doc id, content hash)
+- Section summaries keyed by (model, doc id, section text)
+- Old entries of a document dropped when a new summary replaces them
+
+Author: Diesel-Goose AI
+Version: 1.0 – Cached Summaries
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Iterable
+
+from vault_core import VAULT_ROOT
+
+SUMMARIES_DB = VAULT_ROOT / ".vault" / "summaries.db"
+
+
+def summary_key(model: str, *parts: str) -> str:
+    """Cache key: sha256 over the model and the identifying parts."""
+    return hashlib.sha256("\0".join((model, *parts)).encode('utf-8')).hexdigest()
+
+
+class SummaryCache:
+    """Summaries of documents ("doc") and of their sections ("section")."""
+    
+    def __init__(self, path: Path = SUMMARIES_DB):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS summaries (
+                key TEXT PRIMARY KEY,
+                doc_id TEXT NOT NULL,
+                model TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS summaries_doc ON summaries (doc_id);
+        """)
+        self.conn.commit()
+    
+    def get(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT summary FROM summaries WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def put(self, key: str, doc_id: str, model: str, kind: str, summary: str):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, doc_id, model, kind, summary, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, doc_id, model, kind, summary, time.time())
+            )
+    
+    def prune_doc(self, doc_id: str, model: Optional[str] = None, keep: Iterable[str] = ()):
+        """Drop a document's summaries (optionally one model's), except the given keys."""
+        clause, params = "doc_id = ?", [doc_id]
+        if model is not None:
+            clause += " AND model = ?"
+            params.append(model)
+        keep = list(keep)
+        if keep:
+            clause += f" AND key NOT IN ({','.join('?' * len(keep))})"
+            params.extend(keep)
+        with self._lock, self.conn:
+            self.conn.execute(f"DELETE FROM summaries WHERE {clause}", params)
+    
+    def close(self):
+        self.conn.close()